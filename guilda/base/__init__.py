@@ -1,2 +1,3 @@
+from guilda.base.batch import ComponentBatch, uses_method, get_linear_matrices
 from guilda.base.component import Component, ComponentEmpty
 from guilda.base.types import StateEquationRecord
\ No newline at end of file
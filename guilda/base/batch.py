@@ -0,0 +1,103 @@
+from typing import Dict, Hashable, List, Tuple, Any
+import numpy as np
+
+from guilda.base.types import StateEquationRecord
+from guilda.utils.typing import FloatArray, ComplexArray
+
+
+def uses_method(obj: Any, cls: type, *names: str) -> bool:
+    '''
+    Checks if `obj` uses the implementation of `cls` for all methods in `names`,
+    i.e. they are not overridden by a subclass.
+    '''
+    return all(getattr(type(obj), name, None) is getattr(cls, name) for name in names)
+
+
+class ComponentBatch:
+    '''
+    Evaluates the DAE of several components at once.
+
+    The quantities of the components are stacked along the first axis:
+    `V` and `I` are complex arrays of shape (n, ), `x` and `u` are arrays
+    of shape (n, nx) and (n, nu). The outputs `dx` and `constraint` have
+    shapes (n, nx) and (n, 2).
+
+    This class calls the components one by one. Subclasses pack the
+    parameters of the components into arrays and evaluate all of them with
+    vectorized operations.
+    '''
+
+    def __init__(self, components: List[Any], linear: bool = False):
+        self.components = list(components)
+        self.linear = linear
+
+    @property
+    def n(self) -> int:
+        return len(self.components)
+
+    def get_dx_constraint(
+        self,
+        V: ComplexArray,
+        I: ComplexArray,
+        x: FloatArray,
+        u: FloatArray,
+        t: float = 0) -> Tuple[FloatArray, FloatArray]:
+
+        dx = np.zeros(x.shape)
+        con = np.zeros((self.n, 2))
+        for k, c in enumerate(self.components):
+            dx_k, con_k = c.get_dx_con_func(self.linear)(
+                complex(V[k]), complex(I[k]),
+                x[k].reshape((-1, 1)), u[k].reshape((-1, 1)), t
+            )
+            dx[k] = dx_k.flatten()
+            con[k] = con_k.flatten()
+        return dx, con
+
+    def get_jacobian(
+        self,
+        V: ComplexArray,
+        I: ComplexArray,
+        x: FloatArray,
+        u: FloatArray,
+        t: float = 0) -> StateEquationRecord:
+        '''
+        Returns the Jacobians of the components, stacked along the first axis.
+        See `Component.get_jacobian` for the blocks.
+        '''
+        return StateEquationRecord.stack([
+            c.get_jacobian_func(self.linear)(
+                complex(V[k]), complex(I[k]),
+                x[k].reshape((-1, 1)), u[k].reshape((-1, 1)), t
+            ) for k, c in enumerate(self.components)
+        ])
+
+    def get_linear_matrix(self) -> StateEquationRecord:
+        '''
+        Returns the models of the components linearized at their equilibria
+        (see `Component.get_linear_matrix`), stacked along the first axis.
+        '''
+        return StateEquationRecord.stack([
+            c.get_linear_matrix(c.V_equilibrium, c.x_equilibrium)
+            for c in self.components
+        ])
+
+
+def get_linear_matrices(components: List[Any]) -> List[StateEquationRecord]:
+    '''
+    Linearizes the components at their equilibria, evaluating the
+    components of the same batch key together.
+    '''
+    groups: Dict[Hashable, List[int]] = {}
+    records: List[Any] = [None] * len(components)
+    for k, c in enumerate(components):
+        key = c.get_batch_key()
+        if key is None:
+            records[k] = ComponentBatch([c]).get_linear_matrix().unstack()[0]
+        else:
+            groups.setdefault(key, []).append(k)
+    for pos in groups.values():
+        batch = components[pos[0]].make_batch([components[k] for k in pos])
+        for k, r in zip(pos, batch.get_linear_matrix().unstack()):
+            records[k] = r
+    return records
@@ -1,9 +1,11 @@
 from abc import ABC, abstractmethod as AM
-from typing import Optional, Tuple
+from typing import Optional, Tuple, List, Hashable, Callable
 import numpy as np
 
+from guilda.utils.calc import numerical_jacobian
 from guilda.utils.typing import FloatArray
 from guilda.base.types import StateEquationRecord
+from guilda.base.batch import ComponentBatch, uses_method
 
 
 class Component(ABC):
@@ -112,6 +114,92 @@ class Component(ABC):
     def get_dx_con_func(self, linear: bool):
         return self.get_dx_constraint_linear if linear else self.get_dx_constraint
 
+    # jacobian of the dae
+
+    def get_jacobian(
+        self,
+        V: complex = 0,
+        I: complex = 0,
+        x: Optional[FloatArray] = None,
+        u: Optional[FloatArray] = None,
+        t: float = 0) -> StateEquationRecord:
+        '''Returns the Jacobian of `get_dx_constraint` at the given point.
+
+        A, B, BV, BI are the derivatives of dx by x, u, [Vr, Vi] and [Ir, Ii];
+        C, D, DV, DI are those of the constraint.
+        The batch of the component is used if it has an analytic Jacobian,
+        and finite differences otherwise.
+        '''
+        assert x is not None
+        assert u is not None
+        if self.get_batch_key() is not None:
+            batch = self.make_batch([self])
+            if not uses_method(batch, ComponentBatch, 'get_jacobian'):
+                return batch.get_jacobian(
+                    np.array([V]), np.array([I]),
+                    x.reshape((1, -1)), u.reshape((1, -1)), t
+                ).unstack()[0]
+        return get_jacobian_fd(self.get_dx_constraint, V, I, x, u, t)
+
+    def get_jacobian_linear(
+        self,
+        V: complex = 0,
+        I: complex = 0,
+        x: Optional[FloatArray] = None,
+        u: Optional[FloatArray] = None,
+        t: float = 0) -> StateEquationRecord:
+        '''Returns the Jacobian of `get_dx_constraint_linear` at the given point.
+        '''
+        assert x is not None
+        assert u is not None
+        return get_jacobian_fd(self.get_dx_constraint_linear, V, I, x, u, t)
+
+    def get_jacobian_func(self, linear: bool):
+        return self.get_jacobian_linear if linear else self.get_jacobian
+
+    # batched evaluation
+
+    def get_batch_key(self) -> Hashable:
+        '''Returns a key shared by the components that `make_batch` can
+        evaluate together, or None if the component must be evaluated alone.
+        '''
+        return None
+
+    @classmethod
+    def make_batch(cls, components: List['Component']) -> ComponentBatch:
+        '''Packs components of the same batch key into a `ComponentBatch`.'''
+        return ComponentBatch(components)
+
+
+def get_jacobian_fd(
+    f: Callable[..., Tuple[FloatArray, FloatArray]],
+    V: complex, I: complex, x: FloatArray, u: FloatArray, t: float) -> StateEquationRecord:
+    '''Jacobian of a `get_dx_constraint`-like function by finite differences.
+    '''
+    nx = x.size
+    nu = u.size
+
+    def func(z: FloatArray):
+        dx, con = f(
+            complex(z[nx + nu], z[nx + nu + 1]),
+            complex(z[nx + nu + 2], z[nx + nu + 3]),
+            z[:nx].reshape((-1, 1)),
+            z[nx: nx + nu].reshape((-1, 1)),
+            t,
+        )
+        return np.concatenate([np.ravel(dx), np.ravel(con)])
+
+    z0 = np.concatenate([np.ravel(x), np.ravel(u), [V.real, V.imag, I.real, I.imag]])
+    J = numerical_jacobian(func, z0)
+
+    iu = nx + nu
+    return StateEquationRecord(
+        nx=nx, nu=nu,
+        A=J[:nx, :nx], B=J[:nx, nx:iu], BV=J[:nx, iu:iu + 2], BI=J[:nx, iu + 2:],
+        C=J[nx:, :nx], D=J[nx:, nx:iu], DV=J[nx:, iu:iu + 2], DI=J[nx:, iu + 2:],
+        R=np.zeros((nx, 0)), S=np.zeros((0, nx)),
+    )
+
 
 class ComponentEmpty(Component):
 
@@ -152,14 +240,14 @@ class ComponentEmpty(Component):
         return self.get_dx_constraint(V, I, x, u, t)
 
     def get_linear_matrix(self, V: complex = 0, x: Optional[FloatArray] = None) -> StateEquationRecord:
-        A = np.zeros((0, 1))
-        B = np.zeros((0, 1))
+        A = np.zeros((0, 0))
+        B = np.zeros((0, 0))
         C = np.zeros([2, 0])
         D = np.zeros([2, 0])
         BV = np.zeros([0, 2])
         DV = np.zeros([2, 2])
-        R = np.zeros((0, 1))
-        S = np.zeros((0, 1))
+        R = np.zeros((0, 0))
+        S = np.zeros((0, 0))
         DI = -np.identity(2)
         BI = np.zeros([0, 2])
 
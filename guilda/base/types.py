@@ -1,6 +1,6 @@
 import numpy as np
 from dataclasses import dataclass, field
-from typing import Annotated, Literal
+from typing import Annotated, Literal, List
 from numpy.typing import NDArray
 
 from guilda.utils.typing import FloatArray
@@ -53,4 +53,19 @@ class StateEquationRecord:
             R = self.R, S = self.S, 
             nx = self.nx, 
             nu = self.nu,
-        )
\ No newline at end of file
+        )
+
+    @staticmethod
+    def stack(records: List['StateEquationRecord']) -> 'StateEquationRecord':
+        '''Stacks records of components with the same dimensions along a new first axis.'''
+        mats = [np.stack(m) for m in zip(*[r.as_tuple() for r in records])]
+        r0 = records[0]
+        return StateEquationRecord(r0.nx, r0.nu, *mats)
+
+    def unstack(self) -> List['StateEquationRecord']:
+        '''Inverse of `stack`.'''
+        mats = self.as_tuple()
+        return [
+            StateEquationRecord(self.nx, self.nu, *[m[k] for m in mats])
+            for k in range(mats[0].shape[0])
+        ]
@@ -1,4 +1,5 @@
 from guilda.branch.branch import Branch
 from guilda.branch.branch_pi import BranchPi
 from guilda.branch.branch_pi_transformer import BranchPiTransformer
+from guilda.branch.branch_admittance import BranchAdmittance
 from guilda.branch.types import *
\ No newline at end of file
@@ -0,0 +1,18 @@
+import numpy as np
+
+from guilda.branch.branch import Branch
+from guilda.utils.typing import ComplexArray
+
+
+class BranchAdmittance(Branch):
+    '''
+    Branch given directly by its 2x2 admittance matrix, such as the
+    couplings of a network equivalent.
+    '''
+
+    def __init__(self, bus1: int, bus2: int, Y: ComplexArray):
+        super().__init__(bus1, bus2)
+        self.Y: ComplexArray = np.array(Y, dtype=complex).reshape((2, 2))
+
+    def get_admittance_matrix(self) -> ComplexArray:
+        return self.Y
@@ -0,0 +1,432 @@
+from typing import List, Tuple, Any
+import numpy as np
+
+from guilda.avr import Avr, AvrSadamoto2019
+from guilda.base.batch import ComponentBatch, uses_method
+from guilda.base.types import StateEquationRecord
+from guilda.generator.governor import Governor
+from guilda.generator.pss import Pss
+from guilda.utils.typing import FloatArray, ComplexArray
+
+
+def is_batchable(gen: Any, cls: type) -> bool:
+    '''
+    Checks if a generator can be evaluated by the batch of `cls`, i.e. it
+    keeps the dynamics of `cls` and uses one of the built-in AVR, PSS and
+    governor models.
+    '''
+    return uses_method(gen, cls, 'get_dx_constraint', 'get_components_dx') \
+        and type(gen.avr) in (Avr, AvrSadamoto2019) \
+        and uses_method(gen.pss, Pss, 'get_u') \
+        and uses_method(gen.governor, Governor, 'get_P')
+
+
+class GeneratorBatch(ComponentBatch):
+    '''
+    Vectorized evaluation of classical generators.
+
+    All generators in a batch must share the AVR type and the PSS order.
+    '''
+
+    nx_gen = 2
+
+    def __init__(self, components: List[Any]):
+        super().__init__(components)
+
+        def p(name: str):
+            return np.array([getattr(g.parameter, name) for g in components], dtype=float)
+
+        self.Xd = p('Xd')
+        self.Xd_prime = p('Xd_prime')
+        self.Xq = p('Xq')
+        self.Xq_prime = p('Xq_prime')
+        self.Tdo = p('Tdo')
+        self.Tqo = p('Tqo')
+        self.M = p('M')
+        self.D = p('D')
+        self.omega0 = np.array([g.omega0 for g in components], dtype=float)
+
+        # avr
+        g0 = components[0]
+        self.avr_type = type(g0.avr)
+        self.nx_avr: int = g0.avr.nx
+        self.Vfd_st = np.array([np.real(g.avr.Vfd_st) for g in components], dtype=float)
+        self.V_abs_st = np.array([g.avr.V_abs_st for g in components], dtype=float)
+        if self.avr_type is AvrSadamoto2019:
+            self.Te = np.array([g.avr.Te for g in components], dtype=float)
+            self.Ka = np.array([g.avr.Ka for g in components], dtype=float)
+
+        # pss
+        self.nx_pss: int = g0.pss.nx
+        self.pss_A = np.array([g.pss.A for g in components], dtype=float).reshape((self.n, self.nx_pss, self.nx_pss))
+        self.pss_B = np.array([g.pss.B for g in components], dtype=float).reshape((self.n, self.nx_pss))
+        self.pss_C = np.array([g.pss.C for g in components], dtype=float).reshape((self.n, self.nx_pss))
+        self.pss_D = np.array([g.pss.D for g in components], dtype=float).reshape((self.n, ))
+
+        # governor
+        self.P_st = np.array([g.governor.P for g in components], dtype=float)
+
+    def get_components_dx(self, x: FloatArray, u: FloatArray, omega: FloatArray, V_abs: FloatArray, Efd: FloatArray):
+
+        nx = self.nx_gen
+        nx_avr = self.nx_avr
+        nx_pss = self.nx_pss
+
+        x_avr = x[:, nx: nx + nx_avr]
+        x_pss = x[:, nx + nx_avr: nx + nx_avr + nx_pss]
+
+        # pss
+        dx_pss = np.einsum('nij,nj->ni', self.pss_A, x_pss) + self.pss_B * omega[:, None]
+        v = np.einsum('ni,ni->n', self.pss_C, x_pss) + self.pss_D * omega
+
+        # avr
+        u_avr = u[:, 0] - v
+        if self.avr_type is AvrSadamoto2019:
+            Vfd = x_avr[:, 0]
+            Vef = self.Ka * (V_abs - self.V_abs_st + u_avr)
+            dx_avr = ((-Vfd + self.Vfd_st - Vef) / self.Te)[:, None]
+        else:
+            Vfd = self.Vfd_st + u_avr
+            dx_avr = np.zeros((self.n, 0))
+
+        # governor
+        dx_gov = np.zeros((self.n, 0))
+        P = self.P_st + u[:, 1]
+
+        return dx_avr, dx_pss, dx_gov, Vfd, P
+
+    def get_dx_constraint(
+        self,
+        V: ComplexArray,
+        I: ComplexArray,
+        x: FloatArray,
+        u: FloatArray,
+        t: float = 0) -> Tuple[FloatArray, FloatArray]:
+
+        V_abs = np.abs(V)
+
+        delta = x[:, 0]
+        omega = x[:, 1]
+
+        Efd = np.zeros(self.n)
+
+        dx_avr, dx_pss, dx_gov, \
+            Vfd, P_mech = self.get_components_dx(x, u, omega, V_abs, Efd)
+
+        sin_d = np.sin(delta)
+        cos_d = np.cos(delta)
+
+        Vd = V.real * sin_d - V.imag * cos_d
+        Vq = V.real * cos_d + V.imag * sin_d
+        Id = (Vfd - Vq) / self.Xd
+        Iq = Vd / self.Xq
+
+        Ir = Id * sin_d + Iq * cos_d
+        Ii = -Id * cos_d + Iq * sin_d
+
+        dDelta = self.omega0 * omega
+        dOmega = (P_mech - self.D * omega - Vq * Iq - Vd * Id) / self.M
+
+        con = np.column_stack([I.real - Ir, I.imag - Ii])
+        dx = np.column_stack([dDelta, dOmega, dx_avr, dx_pss, dx_gov])
+
+        return dx, con
+
+    def get_dq_jacobian(self, x: FloatArray, Vfd: FloatArray, Vd: FloatArray, Vq: FloatArray, dVd: FloatArray, dVq: FloatArray):
+        '''
+        Returns Id, Iq, their gradients and the gradients of the states
+        after delta and omega, all by z = [x_gen, Vr, Vi, Vfd].
+        '''
+        z_Vfd = self.nx_gen + 2
+        Id = (Vfd - Vq) / self.Xd
+        Iq = Vd / self.Xq
+        dId = -dVq / self.Xd[:, None]
+        dId[:, z_Vfd] += 1 / self.Xd
+        dIq = dVd / self.Xq[:, None]
+        return Id, Iq, dId, dIq, np.zeros((self.n, 0, z_Vfd + 1))
+
+    def get_jacobian(
+        self,
+        V: ComplexArray,
+        I: ComplexArray,
+        x: FloatArray,
+        u: FloatArray,
+        t: float = 0) -> StateEquationRecord:
+
+        n, nx = x.shape
+        ng = self.nx_gen
+        nz = ng + 3
+        z_V = slice(ng, ng + 2)
+        z_Vfd = ng + 2
+
+        V_abs = np.abs(V)
+        delta = x[:, 0]
+        omega = x[:, 1]
+        sin_d = np.sin(delta)
+        cos_d = np.cos(delta)
+
+        Vd = V.real*sin_d - V.imag*cos_d
+        Vq = V.real*cos_d + V.imag*sin_d
+        dVd = np.zeros((n, nz))
+        dVd[:, 0] = Vq
+        dVd[:, ng] = sin_d
+        dVd[:, ng + 1] = -cos_d
+        dVq = np.zeros((n, nz))
+        dVq[:, 0] = -Vd
+        dVq[:, ng] = cos_d
+        dVq[:, ng + 1] = sin_d
+
+        Efd = np.zeros(n)
+        Vfd = self.get_components_dx(x, u, omega, V_abs, Efd)[3]
+
+        # generator by z = [x_gen, Vr, Vi, Vfd]
+
+        Id, Iq, dId, dIq, f_rest = self.get_dq_jacobian(x, Vfd, Vd, Vq, dVd, dVq)
+
+        dIr = sin_d[:, None]*dId + cos_d[:, None]*dIq
+        dIr[:, 0] += Id*cos_d - Iq*sin_d
+        dIi = -cos_d[:, None]*dId + sin_d[:, None]*dIq
+        dIi[:, 0] += Id*sin_d + Iq*cos_d
+        dP = Iq[:, None]*dVq + Vq[:, None]*dIq + Id[:, None]*dVd + Vd[:, None]*dId
+
+        f_z = np.zeros((n, ng, nz))
+        f_z[:, 0, 1] = self.omega0
+        f_z[:, 1] = -dP / self.M[:, None]
+        f_z[:, 1, 1] -= self.D / self.M
+        f_z[:, 2:] = f_rest
+        i_z = np.stack([dIr, dIi], axis=1)
+
+        # Vfd by x, V and u
+
+        nx_avr = self.nx_avr
+        i_pss = slice(ng + nx_avr, ng + nx_avr + self.nx_pss)
+
+        A = np.zeros((n, nx, nx))
+        B = np.zeros((n, nx, 2))
+        BV = np.zeros((n, nx, 2))
+
+        A[:, i_pss, i_pss] = self.pss_A
+        A[:, i_pss, 1] = self.pss_B
+
+        # avr input u_avr = u[0] - v
+        du_avr = np.zeros((n, nx))
+        du_avr[:, i_pss] = -self.pss_C
+        du_avr[:, 1] = -self.pss_D
+
+        Vfd_x = np.zeros((n, nx))
+        Vfd_V = np.zeros((n, 2))
+        Vfd_u = np.zeros((n, 2))
+        if self.avr_type is AvrSadamoto2019:
+            k = self.Ka / self.Te
+            A[:, ng] = -k[:, None] * du_avr
+            A[:, ng, ng] -= 1 / self.Te
+            BV[:, ng] = -k[:, None] * np.column_stack([V.real, V.imag]) / V_abs[:, None]
+            B[:, ng, 0] = -k
+            Vfd_x[:, ng] = 1
+        else:
+            Vfd_x = du_avr
+            Vfd_u[:, 0] = 1
+
+        # chain Vfd and P_mech into the generator
+
+        f_Vfd = f_z[:, :, z_Vfd]
+        A[:, :ng, :ng] += f_z[:, :, :ng]
+        A[:, :ng] += f_Vfd[:, :, None] * Vfd_x[:, None, :]
+        BV[:, :ng] = f_z[:, :, z_V] + f_Vfd[:, :, None] * Vfd_V[:, None, :]
+        B[:, :ng] = f_Vfd[:, :, None] * Vfd_u[:, None, :]
+        B[:, 1, 1] += 1 / self.M
+
+        i_Vfd = i_z[:, :, z_Vfd]
+        C = -i_Vfd[:, :, None] * Vfd_x[:, None, :]
+        C[:, :, :ng] -= i_z[:, :, :ng]
+        DV = -(i_z[:, :, z_V] + i_Vfd[:, :, None] * Vfd_V[:, None, :])
+        D = -i_Vfd[:, :, None] * Vfd_u[:, None, :]
+
+        return StateEquationRecord(
+            nx=nx, nu=2,
+            A=A, B=B, C=C, D=D,
+            BV=BV, DV=DV, BI=np.zeros((n, nx, 2)), DI=np.broadcast_to(np.identity(2), (n, 2, 2)).copy(),
+            R=np.zeros((n, nx, 0)), S=np.zeros((n, 0, nx)),
+        )
+
+    def get_linear_matrix(self) -> StateEquationRecord:
+        '''
+        Closed-loop linear models of the generators with their AVR, PSS and
+        governor at the equilibrium, from the analytic Jacobian. The
+        constraint rows are negated to give `I = C x + D u + DV V`.
+        '''
+        g = self.components
+        V = np.array([c.V_equilibrium for c in g], dtype=complex)
+        I = np.array([c.I_equilibrium for c in g], dtype=complex)
+        x = np.array([c.x_equilibrium.flatten() for c in g], dtype=float)
+        J = self.get_jacobian(V, I, x, np.zeros((self.n, 2)))
+        return StateEquationRecord(
+            nx=J.nx, nu=J.nu,
+            A=J.A, B=J.B, C=-J.C, D=-J.D,
+            BV=J.BV, DV=-J.DV, BI=J.BI, DI=-J.DI,
+            R=J.R, S=J.S,
+        )
+
+
+class Generator1AxisBatch(GeneratorBatch):
+    '''
+    Vectorized evaluation of one-axis generators.
+    '''
+
+    nx_gen = 3
+
+    def get_dx_constraint(
+        self,
+        V: ComplexArray,
+        I: ComplexArray,
+        x: FloatArray,
+        u: FloatArray,
+        t: float = 0) -> Tuple[FloatArray, FloatArray]:
+
+        Xd = self.Xd
+        Xdp = self.Xd_prime
+        Xq = self.Xq
+
+        V_abs = np.abs(V)
+        V_angle = np.arctan2(V.imag, V.real)
+
+        delta = x[:, 0]
+        omega = x[:, 1]
+        E = x[:, 2]
+
+        sin_d = np.sin(delta)
+        cos_d = np.cos(delta)
+
+        V_abs_cos = V.real*cos_d + V.imag*sin_d
+        V_abs_sin = V.real*sin_d - V.imag*cos_d
+
+        Ir = (E-V_abs_cos)*sin_d/Xdp + V_abs_sin*cos_d/Xq
+        Ii = -(E-V_abs_cos)*cos_d/Xdp + V_abs_sin*sin_d/Xq
+
+        con = np.column_stack([I.real - Ir, I.imag - Ii])
+
+        Efd = Xd*E/Xdp - (Xd/Xdp - 1)*V_abs_cos
+
+        dx_avr, dx_pss, dx_gov, \
+            Vfd, P_mech = self.get_components_dx(x, u, omega, V_abs, Efd)
+
+        dE = (-Efd + Vfd)/self.Tdo
+        dDelta = self.omega0*omega
+        dOmega = (
+            P_mech
+            - self.D*omega
+            - V_abs*E*np.sin(delta-V_angle)/Xdp
+            + V_abs**2*(1/Xdp-1/Xq)*np.sin(2*(delta-V_angle))/2
+        )/self.M
+
+        dx = np.column_stack([dDelta, dOmega, dE, dx_avr, dx_pss, dx_gov])
+
+        return dx, con
+
+    def get_dq_jacobian(self, x: FloatArray, Vfd: FloatArray, Vd: FloatArray, Vq: FloatArray, dVd: FloatArray, dVq: FloatArray):
+        Xd = self.Xd
+        Xdp = self.Xd_prime
+        z_E = 2
+        z_Vfd = self.nx_gen + 2
+
+        E = x[:, 2]
+        Id = (E - Vq) / Xdp
+        Iq = Vd / self.Xq
+        dId = -dVq / Xdp[:, None]
+        dId[:, z_E] += 1 / Xdp
+        dIq = dVd / self.Xq[:, None]
+
+        dEfd = -(Xd/Xdp - 1)[:, None] * dVq
+        dEfd[:, z_E] += Xd/Xdp
+        dE = -dEfd
+        dE[:, z_Vfd] += 1
+        dE /= self.Tdo[:, None]
+
+        return Id, Iq, dId, dIq, dE[:, None, :]
+
+
+class Generator2AxisBatch(GeneratorBatch):
+    '''
+    Vectorized evaluation of two-axis generators.
+    '''
+
+    nx_gen = 4
+
+    def get_dx_constraint(
+        self,
+        V: ComplexArray,
+        I: ComplexArray,
+        x: FloatArray,
+        u: FloatArray,
+        t: float = 0) -> Tuple[FloatArray, FloatArray]:
+
+        Xd = self.Xd
+        Xdp = self.Xd_prime
+        Xq = self.Xq
+        Xqp = self.Xq_prime
+
+        V_abs = np.abs(V)
+
+        delta = x[:, 0]
+        omega = x[:, 1]
+        Eq = x[:, 2]
+        Ed = x[:, 3]
+
+        sin_d = np.sin(delta)
+        cos_d = np.cos(delta)
+
+        Vq = V.real*cos_d + V.imag*sin_d
+        Vd = V.real*sin_d - V.imag*cos_d
+
+        Iq = -(Ed-Vd)/Xqp
+        Id = (Eq-Vq)/Xdp
+
+        Ir = Iq*cos_d+Id*sin_d
+        Ii = Iq*sin_d-Id*cos_d
+
+        con = np.column_stack([I.real - Ir, I.imag - Ii])
+
+        Efd = Xd*Eq/Xdp - (Xd/Xdp-1)*Vq
+        Efq = Xq*Ed/Xqp - (Xq/Xqp-1)*Vd
+
+        dx_avr, dx_pss, dx_gov, \
+            Vfd, P = self.get_components_dx(x, u, omega, V_abs, Efd)
+
+        dEq = (-Efd + Vfd)/self.Tdo
+        dEd = (-Efq)/self.Tqo
+        dDelta = self.omega0*omega
+        dOmega = (P - self.D*omega - Vq*Iq - Vd*Id)/self.M
+
+        dx = np.column_stack([dDelta, dOmega, dEq, dEd, dx_avr, dx_pss, dx_gov])
+
+        return dx, con
+
+    def get_dq_jacobian(self, x: FloatArray, Vfd: FloatArray, Vd: FloatArray, Vq: FloatArray, dVd: FloatArray, dVq: FloatArray):
+        Xd = self.Xd
+        Xdp = self.Xd_prime
+        Xq = self.Xq
+        Xqp = self.Xq_prime
+        z_Eq = 2
+        z_Ed = 3
+        z_Vfd = self.nx_gen + 2
+
+        Eq = x[:, 2]
+        Ed = x[:, 3]
+        Id = (Eq - Vq) / Xdp
+        Iq = (Vd - Ed) / Xqp
+        dId = -dVq / Xdp[:, None]
+        dId[:, z_Eq] += 1 / Xdp
+        dIq = dVd / Xqp[:, None]
+        dIq[:, z_Ed] -= 1 / Xqp
+
+        dEfd = -(Xd/Xdp - 1)[:, None] * dVq
+        dEfd[:, z_Eq] += Xd/Xdp
+        dEq = -dEfd
+        dEq[:, z_Vfd] += 1
+        dEq /= self.Tdo[:, None]
+
+        dEfq = -(Xq/Xqp - 1)[:, None] * dVd
+        dEfq[:, z_Ed] += Xq/Xqp
+        dEd = -dEfq / self.Tqo[:, None]
+
+        return Id, Iq, dId, dIq, np.stack([dEq, dEd], axis=1)
@@ -1,6 +1,6 @@
 from functools import cached_property
 from varname import nameof
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Hashable
 import numpy as np
 from math import sin, cos, atan, atan2
 from cmath import phase
@@ -12,6 +12,7 @@ from guilda.utils.data import complex_to_col_vec
 from guilda.utils.runtime import del_cache
 from guilda.utils.typing import FloatArray
 
+from guilda.generator.batch import GeneratorBatch, is_batchable
 from guilda.generator.pss import Pss
 from guilda.generator.governor import Governor
 from guilda.generator.types import GeneratorParameters
@@ -84,6 +85,9 @@ Actually, it is the classical model
     def system_matrix(self):
         if self.omega0 == None:
             return StateEquationRecord()
+        if self.get_batch_key() is not None:
+            # closed form, without interconnecting the subsystems
+            return self.make_batch([self]).get_linear_matrix().unstack()[0]
         return self.get_linear_matrix(self.V_equilibrium, self._x_eq)
 
     @property
@@ -169,6 +173,15 @@ Actually, it is the classical model
 
         return dx, con
 
+    def get_batch_key(self) -> Hashable:
+        if not is_batchable(self, Generator):
+            return None
+        return (Generator, type(self.avr), self.pss.nx)
+
+    @classmethod
+    def make_batch(cls, components: List['Generator']) -> GeneratorBatch:
+        return GeneratorBatch(components)
+
     def get_dx_constraint_linear(
         self,
         V: complex = 0,
@@ -190,6 +203,16 @@ Actually, it is the classical model
 
         return dx, con
 
+    def get_jacobian_linear(
+        self,
+        V: complex = 0,
+        I: complex = 0,
+        x: Optional[FloatArray] = None,
+        u: Optional[FloatArray] = None,
+            t: float = 0) -> StateEquationRecord:
+        # the linearized model is affine in all its arguments
+        return self.system_matrix
+
     def get_linear_matrix(
             self,
             V: complex = 0,
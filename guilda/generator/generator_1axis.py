@@ -1,4 +1,4 @@
-from typing import List, Optional, Tuple, Union
+from typing import List, Optional, Tuple, Union, Hashable
 import numpy as np
 from math import sin, cos, atan, atan2, sqrt
 from cmath import phase
@@ -9,6 +9,7 @@ from guilda.base import StateEquationRecord
 from guilda.utils import complex_to_col_vec
 from guilda.utils.typing import FloatArray
 
+from guilda.generator.batch import Generator1AxisBatch, is_batchable
 from guilda.generator.generator import Generator
 
 
@@ -36,6 +37,15 @@ class Generator1Axis(Generator):
     def nx_gen(self):
         return 3
 
+    def get_batch_key(self) -> Hashable:
+        if not is_batchable(self, Generator1Axis):
+            return None
+        return (Generator1Axis, type(self.avr), self.pss.nx)
+
+    @classmethod
+    def make_batch(cls, components: List[Generator]) -> Generator1AxisBatch:
+        return Generator1AxisBatch(components)
+
     def get_dx_constraint(
         self,
         V: complex = 0,
@@ -229,7 +239,7 @@ class Generator1Axis(Generator):
                 ['sys_fb.Vi', 'sys_V.Vi'],
                 ['sys_avr.V_abs', 'sys_V.V_abs'],
                 ['sys_swing.Vfd', 'sys_avr.Vfd'],
-                ['sys_avr.u_avr', 'sys_pss.v_pss'],
+                ['sys_avr.u_avr', '-sys_pss.v_pss'],
                 ['sys_pss.omega', 'sys_swing.omega'],
                 ['sys_gov.omega_governor', 'sys_swing.omega'],
                 ['sys_swing.Pmech', 'sys_gov.Pmech']
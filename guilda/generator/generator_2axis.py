@@ -1,4 +1,4 @@
-from typing import List, Optional, Tuple, Union
+from typing import List, Optional, Tuple, Union, Hashable
 import numpy as np
 from math import sin, cos, atan, atan2, sqrt
 from cmath import phase
@@ -9,6 +9,7 @@ from guilda.base import StateEquationRecord
 from guilda.utils import complex_to_col_vec
 from guilda.utils.typing import FloatArray
 
+from guilda.generator.batch import Generator2AxisBatch, is_batchable
 from guilda.generator.generator import Generator
 
 
@@ -36,6 +37,15 @@ class Generator2Axis(Generator):
     def nx_gen(self):
         return 4
 
+    def get_batch_key(self) -> Hashable:
+        if not is_batchable(self, Generator2Axis):
+            return None
+        return (Generator2Axis, type(self.avr), self.pss.nx)
+
+    @classmethod
+    def make_batch(cls, components: List[Generator]) -> Generator2AxisBatch:
+        return Generator2AxisBatch(components)
+
     def get_dx_constraint(
         self,
         V: complex = 0,
@@ -59,7 +69,7 @@ class Generator2Axis(Generator):
         V_abs = abs(V)
         V_angle = atan2(V.imag, V.real)
 
-        delta, omega, Eq, Ed = x[:, 0]
+        delta, omega, Eq, Ed = x[:4, 0]
 
         # Vd, Vqを定義
         Vq = V.real*cos(delta) + V.imag*sin(delta)
@@ -1,7 +1,7 @@
 import numpy as np
 from control import StateSpace as SS
 
-from typing import Union, Tuple, List
+from typing import Optional, Union, Tuple, List
 
 from guilda.generator.types import PssParameters
 from guilda.utils.typing import FloatArray
@@ -34,6 +34,9 @@ class Pss():
         self.set_pss(sys)
         self.sys: SS = sys
 
+        # parameters the model was built from, if any
+        self.parameter: Optional[PssParameters] = pss_in if isinstance(pss_in, PssParameters) else None
+
     @property
     def nx(self) -> int:
         return self._nx
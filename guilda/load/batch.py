@@ -0,0 +1,160 @@
+from typing import List, Tuple, Any
+import numpy as np
+
+from guilda.base.batch import ComponentBatch
+from guilda.base.types import StateEquationRecord
+from guilda.utils.typing import FloatArray, ComplexArray
+
+
+class LoadBatch(ComponentBatch):
+    '''
+    Vectorized evaluation of loads of the same model.
+    '''
+
+    def __init__(self, components: List[Any]):
+        super().__init__(components)
+        self.Y = np.array([l.Y for l in components], dtype=complex)
+        self.V_st = np.array([l.V_equilibrium for l in components], dtype=complex)
+        self.I_st = np.array([l.I_equilibrium for l in components], dtype=complex)
+
+    def get_load_jacobian(self, D: FloatArray, DV: FloatArray, DI: FloatArray) -> StateEquationRecord:
+        n = self.n
+        return StateEquationRecord(
+            nx=0, nu=2,
+            A=np.zeros((n, 0, 0)), B=np.zeros((n, 0, 2)), C=np.zeros((n, 2, 0)), D=D,
+            BV=np.zeros((n, 0, 2)), DV=DV, BI=np.zeros((n, 0, 2)), DI=DI,
+            R=np.zeros((n, 0, 0)), S=np.zeros((n, 0, 0)),
+        )
+
+
+def identities(n: int) -> FloatArray:
+    return np.tile(np.identity(2), (n, 1, 1))
+
+
+def complex_to_matrices(z: ComplexArray) -> FloatArray:
+    '''Real 2x2 matrices of multiplication by each entry of `z`.'''
+    return np.stack([
+        np.stack([z.real, -z.imag], axis=-1),
+        np.stack([z.imag, z.real], axis=-1),
+    ], axis=-2)
+
+
+def complex_to_columns(*z: ComplexArray) -> FloatArray:
+    '''Stacks complex arrays as columns [real; imag] of 2 x len(z) matrices.'''
+    return np.stack([
+        np.stack([w.real for w in z], axis=-1),
+        np.stack([w.imag for w in z], axis=-1),
+    ], axis=-2)
+
+
+class LoadImpedanceBatch(LoadBatch):
+
+    def get_dx_constraint(
+        self,
+        V: ComplexArray,
+        I: ComplexArray,
+        x: FloatArray,
+        u: FloatArray,
+        t: float = 0) -> Tuple[FloatArray, FloatArray]:
+        dx = np.zeros((self.n, 0))
+        Y = self.Y.real * (1 + u[:, 0]) + 1j * self.Y.imag * (1 + u[:, 1])
+        I_ = I - Y * V
+        constraint = np.column_stack([I_.real, I_.imag])
+        return dx, constraint
+
+    def get_jacobian(
+        self,
+        V: ComplexArray,
+        I: ComplexArray,
+        x: FloatArray,
+        u: FloatArray,
+        t: float = 0) -> StateEquationRecord:
+        Y = self.Y.real * (1 + u[:, 0]) + 1j * self.Y.imag * (1 + u[:, 1])
+        D = -complex_to_columns(self.Y.real * V, 1j * self.Y.imag * V)
+        return self.get_load_jacobian(D, -complex_to_matrices(Y), identities(self.n))
+
+
+class LoadCurrentBatch(LoadBatch):
+
+    def get_dx_constraint(
+        self,
+        V: ComplexArray,
+        I: ComplexArray,
+        x: FloatArray,
+        u: FloatArray,
+        t: float = 0) -> Tuple[FloatArray, FloatArray]:
+        dx = np.zeros((self.n, 0))
+        constraint = np.column_stack([
+            I.real - self.I_st.real * (1 + u[:, 0]),
+            I.imag - self.I_st.imag * (1 + u[:, 1]),
+        ])
+        return dx, constraint
+
+    def get_jacobian(
+        self,
+        V: ComplexArray,
+        I: ComplexArray,
+        x: FloatArray,
+        u: FloatArray,
+        t: float = 0) -> StateEquationRecord:
+        D = -complex_to_columns(self.I_st.real, 1j * self.I_st.imag)
+        return self.get_load_jacobian(D, np.zeros((self.n, 2, 2)), identities(self.n))
+
+
+class LoadPowerBatch(LoadBatch):
+
+    def __init__(self, components: List[Any]):
+        super().__init__(components)
+        self.P_st = np.array([l.P_st for l in components], dtype=float)
+        self.Q_st = np.array([l.Q_st for l in components], dtype=float)
+
+    def get_dx_constraint(
+        self,
+        V: ComplexArray,
+        I: ComplexArray,
+        x: FloatArray,
+        u: FloatArray,
+        t: float = 0) -> Tuple[FloatArray, FloatArray]:
+        dx = np.zeros((self.n, 0))
+        PQ = self.P_st * (1 + u[:, 0]) + 1j * self.Q_st * (1 + u[:, 1])
+        I_ = I - PQ / V
+        constraint = np.column_stack([I_.real, I_.imag])
+        return dx, constraint
+
+    def get_jacobian(
+        self,
+        V: ComplexArray,
+        I: ComplexArray,
+        x: FloatArray,
+        u: FloatArray,
+        t: float = 0) -> StateEquationRecord:
+        PQ = self.P_st * (1 + u[:, 0]) + 1j * self.Q_st * (1 + u[:, 1])
+        D = -complex_to_columns(self.P_st / V, 1j * self.Q_st / V)
+        return self.get_load_jacobian(D, complex_to_matrices(PQ / V**2), identities(self.n))
+
+
+class LoadVoltageBatch(LoadBatch):
+
+    def get_dx_constraint(
+        self,
+        V: ComplexArray,
+        I: ComplexArray,
+        x: FloatArray,
+        u: FloatArray,
+        t: float = 0) -> Tuple[FloatArray, FloatArray]:
+        dx = np.zeros((self.n, 0))
+        constraint = np.column_stack([
+            V.real - self.V_st.real * (1 + u[:, 0]),
+            V.imag - self.V_st.imag * (1 + u[:, 1]),
+        ])
+        return dx, constraint
+
+    def get_jacobian(
+        self,
+        V: ComplexArray,
+        I: ComplexArray,
+        x: FloatArray,
+        u: FloatArray,
+        t: float = 0) -> StateEquationRecord:
+        D = -complex_to_columns(self.V_st.real, 1j * self.V_st.imag)
+        return self.get_load_jacobian(D, identities(self.n), np.zeros((self.n, 2, 2)))
@@ -1,10 +1,13 @@
+from functools import cached_property
 from typing import Optional, Tuple
 
 import numpy as np
+from varname import nameof
 
-from guilda.base import Component
+from guilda.base import Component, StateEquationRecord
 
 from guilda.utils.data import complex_to_col_vec, complex_to_matrix
+from guilda.utils.runtime import del_cache
 from guilda.utils.typing import FloatArray
 
 class Load(Component):
@@ -26,6 +29,15 @@ class Load(Component):
     
     def set_admittance(self, Y: complex):
         self.Y = Y
+        del_cache(self, nameof(Load.system_matrix))
+
+    def set_equilibrium(self, V: complex, I: complex) -> None:
+        super().set_equilibrium(V, I)
+        del_cache(self, nameof(Load.system_matrix))
+
+    @cached_property
+    def system_matrix(self) -> StateEquationRecord:
+        return self.get_linear_matrix(self.V_equilibrium)
         
     
     def __init__(self):
@@ -44,12 +56,23 @@ class Load(Component):
         u: Optional[FloatArray] = None,
         t: float = 0) -> Tuple[FloatArray, FloatArray]:
         assert u is not None
-        E = self.get_linear_matrix(V, x)
+        # linearized at the equilibrium
+        E = self.system_matrix
         dx = np.zeros([0, 1])
         diff_I: FloatArray = complex_to_col_vec(I) - complex_to_col_vec(self.I_equilibrium)
         diff_V: FloatArray = complex_to_col_vec(V) - complex_to_col_vec(self.V_equilibrium)
         constraint: FloatArray = E.D @ u + E.DI @ diff_I + E.DV @ diff_V
         return dx, constraint
+
+    def get_jacobian_linear(
+        self,
+        V: complex = 0,
+        I: complex = 0,
+        x: Optional[FloatArray] = None,
+        u: Optional[FloatArray] = None,
+        t: float = 0) -> StateEquationRecord:
+        # the linearized model is affine in all its arguments
+        return self.system_matrix
       
     @property
     def nx(self):
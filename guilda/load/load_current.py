@@ -1,8 +1,9 @@
-from typing import Optional, Tuple
+from typing import Optional, Tuple, List, Hashable
 import numpy as np
 
-from guilda.base import StateEquationRecord
+from guilda.base import StateEquationRecord, uses_method
 from guilda.load.load import Load
+from guilda.load.batch import LoadCurrentBatch
 from guilda.utils.data import complex_to_col_vec
 from guilda.utils.typing import FloatArray
 
@@ -21,6 +22,15 @@ class LoadCurrent(Load):
     '''
 
 
+    def get_batch_key(self) -> Hashable:
+        if not uses_method(self, LoadCurrent, 'get_dx_constraint'):
+            return None
+        return LoadCurrent
+
+    @classmethod
+    def make_batch(cls, components: List[Load]) -> LoadCurrentBatch:
+        return LoadCurrentBatch(components)
+
     def get_dx_constraint(
         self,
         V: complex = 0,
@@ -1,9 +1,10 @@
-from typing import Optional, Tuple
+from typing import Optional, Tuple, List, Hashable
 
 import numpy as np
 
-from guilda.base import StateEquationRecord
+from guilda.base import StateEquationRecord, uses_method
 from guilda.load.load import Load
+from guilda.load.batch import LoadImpedanceBatch
 from guilda.utils.data import complex_to_col_vec, complex_to_matrix
 from guilda.utils.typing import FloatArray
 
@@ -26,6 +27,15 @@ class LoadImpedance(Load):
         self.set_admittance(I / V)
 
 
+    def get_batch_key(self) -> Hashable:
+        if not uses_method(self, LoadImpedance, 'get_dx_constraint'):
+            return None
+        return LoadImpedance
+
+    @classmethod
+    def make_batch(cls, components: List[Load]) -> LoadImpedanceBatch:
+        return LoadImpedanceBatch(components)
+
     def get_dx_constraint(
         self,
         V: complex = 0,
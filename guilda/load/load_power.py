@@ -1,9 +1,10 @@
-from typing import Optional, Tuple
+from typing import Optional, Tuple, List, Hashable
 
 import numpy as np
 
-from guilda.base import StateEquationRecord
+from guilda.base import StateEquationRecord, uses_method
 from guilda.load.load import Load
+from guilda.load.batch import LoadPowerBatch
 from guilda.utils.data import complex_to_col_vec
 from guilda.utils.typing import FloatArray
 
@@ -37,6 +38,15 @@ class LoadPower(Load):
         self.Q_st = PQ.imag
         
 
+    def get_batch_key(self) -> Hashable:
+        if not uses_method(self, LoadPower, 'get_dx_constraint'):
+            return None
+        return LoadPower
+
+    @classmethod
+    def make_batch(cls, components: List[Load]) -> LoadPowerBatch:
+        return LoadPowerBatch(components)
+
     def get_dx_constraint(
         self,
         V: complex = 0,
@@ -1,9 +1,10 @@
-from typing import Optional, Tuple
+from typing import Optional, Tuple, List, Hashable
 
 import numpy as np
 
-from guilda.base import StateEquationRecord
+from guilda.base import StateEquationRecord, uses_method
 from guilda.load.load import Load
+from guilda.load.batch import LoadVoltageBatch
 from guilda.utils.data import complex_to_col_vec
 from guilda.utils.typing import FloatArray
 
@@ -21,6 +22,15 @@ class LoadVoltage(Load):
         Component (_type_): _description_
     '''
 
+    def get_batch_key(self) -> Hashable:
+        if not uses_method(self, LoadVoltage, 'get_dx_constraint'):
+            return None
+        return LoadVoltage
+
+    @classmethod
+    def make_batch(cls, components: List[Load]) -> LoadVoltageBatch:
+        return LoadVoltageBatch(components)
+
     def get_dx_constraint(
         self,
         V: complex = 0,
@@ -2,5 +2,14 @@ from guilda.power_network.types import \
   BusEvent, BusConnect, BusFault, BusInput, \
   SimulationOptions,  SimulationScenario, \
   SimulationSegment, SimulationMetadata, \
-  SimulationResult, SimulationResultComponent
-from guilda.power_network.wrapper import PowerNetwork
\ No newline at end of file
+  SimulationResult, SimulationResultComponent, SimulationResultPart
+from guilda.power_network.wrapper import PowerNetwork
+from guilda.power_network.store import ResultBuffer, ResultStore
+from guilda.power_network.response import ResponseLibrary
+from guilda.power_network.modal import ModalAnalysis
+from guilda.power_network.frequency import FrequencyResponse
+from guilda.power_network.reduction import ReducedModel
+from guilda.power_network.power_flow_batch import PowerFlowBatch
+from guilda.power_network.qsts import QstsResult, QstsStore, SetpointChange, TapChange
+from guilda.power_network.continuation import ContinuationResult
+from guilda.power_network.distribution import DistributionFactors
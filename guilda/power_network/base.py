@@ -1,24 +1,33 @@
+from collections import OrderedDict
 from functools import cached_property
 from varname import nameof
 import numpy as np
-from numpy.linalg import inv
 
 from scipy.optimize import root
-from scipy.linalg import block_diag
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
 
 
-from typing import Tuple, List, Optional, Callable, Dict, Hashable, Iterable, overload
+from typing import Tuple, List, Optional, Callable, Dict, Hashable, Iterable, Literal, Union, overload
 
+from guilda.base import get_linear_matrices
 from guilda.bus import Bus
 from guilda.branch import Branch
 from guilda.controller import Controller
-from guilda.utils.calc import complex_mat_to_float
+from guilda.utils.calc import complex_mat_to_float, reduce_admittance_matrix
+from guilda.power_network.power_flow import NewtonPowerFlow, PowerFlowCase, get_power_flow_case
+from guilda.power_network.decoupled import (
+    DCPowerFlow, FastDecoupledPowerFlow, _with_outages, assemble_branches, get_branch_admittances)
 from guilda.utils.runtime import del_cache
 
 from guilda.utils.typing import FloatArray, ComplexArray
 
 _pn_cached_vars: List[str] = []
 
+ReducedAdmittance = Tuple[ComplexArray, FloatArray, ComplexArray, FloatArray]
+PowerFlowSolver = Union[NewtonPowerFlow, FastDecoupledPowerFlow, DCPowerFlow]
+PowerFlowMethod = Literal['newton', 'fdxb', 'fdbx', 'dc']
+
 
 class _PowerNetwork(object):
 
@@ -29,7 +38,15 @@ class _PowerNetwork(object):
         self.a_branch: List[Branch] = []
         self.a_controller_local: List[Controller] = []
         self.a_controller_global: List[Controller] = []
-        
+
+        # reduced admittance matrices, keyed by (admittance version, simulated buses)
+        self.admittance_version: int = 0
+        self.reduced_admittance_cache_size: int = 32
+        self._reduced_admittance: 'OrderedDict[Tuple[int, Tuple[int, ...]], ReducedAdmittance]' = OrderedDict()
+
+        # power flow solvers by method, with their factorizations
+        self._power_flow_solvers: Dict[str, PowerFlowSolver] = {}
+
     # network construction & definition
         
     @overload
@@ -123,9 +140,16 @@ class _PowerNetwork(object):
         return [self.a_bus_dict[b].I_equilibrium or 0 for b in self.bus_indices]
 
 
+    @cached_property
+    def admittance_matrix_sparse(self) -> sp.csr_matrix:
+        return self.get_admittance_matrix_sparse()
+
     def clear_cache(self):
         for name in _pn_cached_vars:
             del_cache(self, name)
+        self.admittance_version += 1
+        self._reduced_admittance.clear()
+        self._power_flow_solvers.clear()
 
     def sort_buses(self):
         sorted_buses = dict(sorted(self.a_bus_dict.items(),
@@ -135,29 +159,169 @@ class _PowerNetwork(object):
     # methods
 
     def get_admittance_matrix(self, bus_index_map: Optional[Dict[Hashable, int]] = None) -> ComplexArray:
+        return self.get_admittance_matrix_sparse(bus_index_map).toarray()
+
+    def get_admittance_matrix_sparse(self, bus_index_map: Optional[Dict[Hashable, int]] = None) -> sp.csr_matrix:
+        '''
+        Admittance matrix of the network as a sparse (csr) matrix.
+        '''
         if not bus_index_map:
             bus_index_map = self.bus_index_map
 
         n: int = len(bus_index_map)
-        Y: ComplexArray = np.zeros((n, n), dtype=complex)
+        rows: List[int] = []
+        cols: List[int] = []
+        vals: List[complex] = []
 
         for br in self.a_branch:
             if (br.bus1 in bus_index_map) and (br.bus2 in bus_index_map):
                 Y_sub = br.get_admittance_matrix()
                 f = bus_index_map[br.bus1]
                 t = bus_index_map[br.bus2]
-                Y[f:f+1, f:f+1] += Y_sub[:1, :1]
-                Y[f:f+1, t:t+1] += Y_sub[:1, 1:]
-                Y[t:t+1, f:f+1] += Y_sub[1:, :1]
-                Y[t:t+1, t:t+1] += Y_sub[1:, 1:]
+                rows += [f, f, t, t]
+                cols += [f, t, f, t]
+                vals += [Y_sub[0, 0], Y_sub[0, 1], Y_sub[1, 0], Y_sub[1, 1]]
 
         for idx in bus_index_map:
             _idx = bus_index_map[idx]
-            Y[_idx, _idx] += self.a_bus_dict[idx].shunt
-
+            rows.append(_idx)
+            cols.append(_idx)
+            vals.append(self.a_bus_dict[idx].shunt)
+
+        # duplicate entries are summed
+        Y = sp.coo_matrix(
+            (np.array(vals, dtype=complex), (rows, cols)), shape=(n, n)).tocsr()
+        Y.eliminate_zeros()
         return Y
 
-    def calculate_power_flow(self) -> Tuple[ComplexArray, ComplexArray]:
+    def get_reduced_admittance(self, index: Iterable[int]) -> ReducedAdmittance:
+        '''
+        Kron reduction of the admittance matrix onto the buses of positions
+        `index`, as returned by `reduce_admittance_matrix`.
+
+        The results are kept in an LRU cache of `reduced_admittance_cache_size`
+        entries and shared between calls, so the arrays are read-only.
+        Call `clear_cache` after modifying branches or shunts in place.
+        '''
+        key = (self.admittance_version, tuple(sorted(set(index))))
+        cache = self._reduced_admittance
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+
+        ret = reduce_admittance_matrix(self.admittance_matrix_sparse, key[1])
+        for mat in ret:
+            mat.setflags(write=False)
+        cache[key] = ret
+        while len(cache) > max(self.reduced_admittance_cache_size, 0):
+            cache.popitem(last=False)
+        return ret
+
+    def get_power_flow_solver(self, method: PowerFlowMethod = 'newton', case: Optional[PowerFlowCase] = None) -> PowerFlowSolver:
+        '''
+        The power flow solver of the network by `method`, kept with its
+        factorizations until `clear_cache` or a change of the bus types.
+        '''
+        if case is None:
+            case = get_power_flow_case(self.a_bus)
+        if case is None:
+            raise ValueError('Power flow solvers only apply to BusSlack, BusPV and BusPQ buses.')
+
+        solver = self._power_flow_solvers.get(method)
+        if solver is not None and all(
+            np.array_equal(getattr(solver.case, name), getattr(case, name)) for name in ('slack', 'pv', 'pq')
+        ):
+            return solver
+
+        Y = self.admittance_matrix_sparse
+        if method == 'newton':
+            solver = NewtonPowerFlow(Y, case)
+        elif method in ('fdxb', 'fdbx'):
+            shunt = np.array([bus.shunt for bus in self.a_bus], dtype=complex)
+            variant = 'XB' if method == 'fdxb' else 'BX'
+            solver = FastDecoupledPowerFlow(Y, case, self.a_branch, self.bus_index_map, shunt, variant)
+        elif method == 'dc':
+            solver = DCPowerFlow(Y, case, self.a_branch, self.bus_index_map)
+        else:
+            raise ValueError(f'Unknown power flow method: {method}')
+        self._power_flow_solvers[method] = solver
+        return solver
+
+    def calculate_power_flow(
+        self,
+        V0: Optional[ComplexArray] = None,
+        tol: Optional[float] = None,
+        max_iter: Optional[int] = None,
+        method: PowerFlowMethod = 'newton',
+        outages: Iterable[int] = (),
+    ) -> Tuple[ComplexArray, ComplexArray]:
+        '''
+        Solves the power flow, by default by Newton-Raphson with a sparse
+        analytic Jacobian (see `NewtonPowerFlow`). Networks with buses of
+        other types than `BusSlack`, `BusPV` and `BusPQ` are solved with
+        MINPACK's hybr on the constraints of the buses instead.
+
+        For screening, 'fdxb' and 'fdbx' solve the fast decoupled power flow
+        (see `FastDecoupledPowerFlow`) and 'dc' the DC power flow (see
+        `DCPowerFlow`), whose matrices are factorized once and kept for
+        later calls.
+
+        Args:
+            V0 (Optional[ComplexArray]): initial voltages in the order of
+              `bus_index_map`, defaults to the equilibrium if all buses have
+              one, or else to a flat start.
+            tol (Optional[float]): the largest power mismatch, defaults to
+              that of the solver of `method`.
+            max_iter (Optional[int]): the maximum number of iterations,
+              defaults to that of the solver of `method`.
+            method (PowerFlowMethod): 'newton', 'fdxb', 'fdbx' or 'dc'.
+            outages (Iterable[int]): positions in `a_branch` of branches
+              taken out for this solution. Raises ValueError if they split
+              the network into islands.
+
+        Returns:
+            the voltages and injected currents as column vectors.
+        '''
+        case = get_power_flow_case(self.a_bus)
+        outages = list(outages)
+        if V0 is None:
+            V0 = self._get_warm_start()
+        if case is None:
+            if method != 'newton' or outages:
+                raise ValueError('Only the Newton-Raphson method applies to buses of other types.')
+            return self._calculate_power_flow_hybr(V0)
+
+        # None leaves the defaults of each solver
+        limits = {name: value for name, value in (('tol', tol), ('max_iter', max_iter)) if value is not None}
+        solver = self.get_power_flow_solver(method, case)
+        if isinstance(solver, NewtonPowerFlow):
+            if outages:
+                # the same check of the islands as the other methods, on B of the DC power flow
+                dc = self.get_power_flow_solver('dc', case)
+                assert isinstance(dc, DCPowerFlow)
+                _with_outages(dc.solve_B, dc.pos_a, dc.ends[outages], dc.blocks_dc[outages])
+                ends, blocks = get_branch_admittances([self.a_branch[k] for k in outages], self.bus_index_map)
+                Y = self.admittance_matrix_sparse - assemble_branches(ends, blocks, case.n)
+                solver = NewtonPowerFlow(Y, case)
+            result = solver.solve(V0, case=case, **limits)
+        else:
+            result = solver.solve(V0, case=case, outages=outages, **limits)
+
+        if not result.converged:
+            raise RuntimeError(
+                f'The power flow did not converge in {result.iterations} iterations '
+                f'(mismatch {result.mismatch:.3g}).')
+        return result.V.reshape((-1, 1)), result.I.reshape((-1, 1))
+
+    def _get_warm_start(self) -> Optional[ComplexArray]:
+        # networks with links of small reactance, such as the external
+        # equivalents, may only converge from their equilibrium
+        V = [self.a_bus_dict[index].V_equilibrium for index in self.bus_indices]
+        if not V or any(v is None for v in V):
+            return None
+        return np.array(V, dtype=complex)
+
+    def _calculate_power_flow_hybr(self, V0: Optional[ComplexArray] = None) -> Tuple[ComplexArray, ComplexArray]:
         n: int = len(self.a_bus_dict)
 
         def func_eq(Y: ComplexArray, x: FloatArray):
@@ -179,7 +343,11 @@ class _PowerNetwork(object):
             return out.flatten()
 
         Y = self.get_admittance_matrix()
-        x0 = np.array([1, 0] * n).reshape((-1, 1))
+        if V0 is None:
+            x0 = np.array([1, 0] * n).reshape((-1, 1))
+        else:
+            V0 = np.ravel(V0)
+            x0 = np.column_stack([V0.real, V0.imag]).reshape((-1, 1))
 
         # this one definitely requires numpy backend
         ans = root(lambda x: func_eq(Y, x), x0, method="hybr")
@@ -202,19 +370,29 @@ class _PowerNetwork(object):
         self.set_equilibrium(V, I)
         self.clear_cache()
 
-    def get_sys(self):
+    def get_sys(self, descriptor: bool = False):
+        '''
+        Linearized model of the network at the equilibrium, with inputs
+        `[u, d]` and outputs `[x, z, V, I]`.
+
+        The component matrices are assembled as sparse block matrices and
+        the algebraic part is factorized once.
+
+        Args:
+            descriptor (bool): if True, returns the sparse descriptor form
+              `[E, A, B, C, D]` over `[x, V, I]` instead of eliminating `V`
+              and `I`.
+
+        Returns:
+            the matrices `[A, B, C, D]`, or `[E, A, B, C, D]`.
+        '''
 
         # A, B, C, D, BV, DV, BI, DI, R, S
-        mats = [[np.zeros((0, 0))] * len(self.a_bus_dict) for _ in range(10)]
-        for index, i in self.bus_index_map.items():
-            b = self.a_bus_dict[index]
-            mat = b.component.get_linear_matrix().as_tuple()
-            for mi in range(len(mats)):
-                # if mat[mi].shape == (0, 0):
-                #     continue
-                mats[mi][i] = mat[mi]
-        [A, B, C, D, BV, DV, BI, DI, R, S] = list(
-            map(lambda mat: block_diag(*mat), mats))
+        records = get_linear_matrices(
+            [self.a_bus_dict[index].component for index in self.bus_index_map])
+        [A, B, C, D, BV, DV, BI, DI, R, S] = [
+            sp.block_diag(mat, format='csr') for mat in zip(*[r.as_tuple() for r in records])
+        ]
         nI = C.shape[0]
         nx = A.shape[0]
 
@@ -222,28 +400,47 @@ class _PowerNetwork(object):
         nd = R.shape[1]
         nu = B.shape[1]
         nz = S.shape[0]
-        Y = self.get_admittance_matrix()
-        Ymat = complex_mat_to_float(Y)
+        Ymat = complex_mat_to_float(self.admittance_matrix_sparse)
 
         A11 = A
-        A12 = np.hstack([BV, BI])
-        A21 = np.vstack([C, np.zeros((nI, nx))])
-        A22 = np.block([[DV, DI], [Ymat, -np.eye(nI)]])
-        B1 = np.hstack([B, R])
-        B2 = np.block([[D, np.zeros([nV, nd])], [np.zeros([nI, nu+nd])]])
-        C1 = np.vstack([np.eye(nx), S, np.zeros([nI+nV, nx])])
-        C2: FloatArray = np.vstack([np.zeros([nx+nz, nV+nI]), np.eye(nV+nI)])
-
-        A_ = A11-A12 @ inv(A22) @ A21
-        B_ = B1-A12 @ inv(A22) @ B2
-        C_ = C1-C2 @ inv(A22) @ A21
-        D_ = 0-C2 @ inv(A22) @ B2
-        return [A_, B_, C_, D_]
+        A12 = sp.hstack([BV, BI], format='csr')
+        A21 = sp.vstack([C, sp.csr_matrix((nI, nx))], format='csr')
+        A22 = sp.bmat([[DV, DI], [Ymat, -sp.identity(nI)]], format='csc')
+        B1 = sp.hstack([B, R], format='csr')
+        B2 = sp.bmat([
+            [D, sp.csr_matrix((nV, nd))],
+            [sp.csr_matrix((nI, nu + nd)), None],
+        ], format='csr')
+
+        if descriptor:
+            nw = nV + nI
+            E = sp.block_diag([sp.identity(nx), sp.csr_matrix((nw, nw))], format='csr')
+            A_d = sp.bmat([[A11, A12], [A21, A22]], format='csr')
+            B_d = sp.vstack([B1, B2], format='csr')
+            C_d = sp.bmat([
+                [sp.identity(nx), None],
+                [S, sp.csr_matrix((nz, nw))],
+                [None, sp.identity(nw)],
+            ], format='csr')
+            D_d = sp.csr_matrix((nx + nz + nw, nu + nd))
+            return [E, A_d, B_d, C_d, D_d]
+
+        # [V, I] = -inv(A22) @ (A21 @ x + B2 @ [u, d])
+        lu = splu(A22)
+        K = -lu.solve(sp.hstack([A21, B2]).toarray())
+        Kx, Ku = K[:, :nx], K[:, nx:]
+
+        A_ = A11 + A12 @ Kx
+        B_ = B1 + A12 @ Ku
+        C_ = np.vstack([np.eye(nx), S.toarray(), Kx])
+        D_ = np.vstack([np.zeros((nx + nz, nu + nd)), Ku])
+        return [np.asarray(A_), np.asarray(B_), C_, D_]
 
 
 _pn_cached_vars += [
     nameof(_PowerNetwork.bus_index_map),
     nameof(_PowerNetwork.bus_indices),
+    nameof(_PowerNetwork.admittance_matrix_sparse),
     # nameof(_PowerNetwork.x_equilibrium),
     # nameof(_PowerNetwork.V_equilibrium),
     # nameof(_PowerNetwork.I_equilibrium),
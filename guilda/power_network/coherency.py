@@ -0,0 +1,281 @@
+from copy import deepcopy
+from typing import Dict, Hashable, Iterable, List, Literal, Optional, Sequence
+
+import numpy as np
+from scipy.cluster.hierarchy import fcluster, linkage
+from scipy.linalg import qr
+from scipy.spatial.distance import squareform
+
+from guilda.avr import Avr, AvrSadamoto2019, AvrSadamoto2019Parameters
+from guilda.branch import BranchPiTransformer
+from guilda.bus import BusPQ, BusPV, BusSlack
+from guilda.generator import Generator1Axis, GeneratorParameters, Pss, PssParameters
+from guilda.power_network.base import _PowerNetwork
+from guilda.power_network.external import get_external_equivalent
+from guilda.power_network.modal import get_modes
+from guilda.power_network.simulate import simulate
+from guilda.power_network.types import BusFault, SimulationOptions, SimulationScenario
+from guilda.utils.typing import FloatArray
+
+
+def get_generator_buses(self: _PowerNetwork, buses: Optional[Iterable[Hashable]] = None) -> List[Hashable]:
+    '''
+    Buses of the given ones, or of the network, with a `Generator1Axis`.
+    '''
+    indices = self.bus_indices if buses is None else list(buses)
+    return [
+        index for index in indices
+        if type(self.a_bus_dict[index].component) is Generator1Axis
+    ]
+
+
+def _group_by_modes(self: _PowerNetwork, gens: List[Hashable], n_groups: int, f_max: float) -> List[int]:
+    '''
+    Slow coherency: the rotor angle shapes of the common mode and of the
+    `n_groups - 1` slowest electromechanical modes are reduced by QR with
+    column pivoting to one reference machine per group, and every machine
+    joins the reference it follows most closely.
+    '''
+    m = get_modes(self, f_min=0.01, f_max=f_max)
+    rows = {s: k for k, s in enumerate(m.states)}
+    swing = [rows[(g, name)] for g in gens for name in ('delta', 'omega')]
+    # modes mostly made of rotor angles and speeds, slowest first
+    electromechanical = [
+        k for k in np.argsort(m.frequency)
+        if m.participation[swing, k].sum() >= 0.5
+    ][:n_groups - 1]
+    if len(electromechanical) < n_groups - 1:
+        raise ValueError(
+            f'Only {len(electromechanical)} electromechanical modes below {f_max} Hz '
+            f'for {n_groups} groups.')
+
+    angles = [rows[(g, 'delta')] for g in gens]
+    V = np.hstack([
+        np.ones((len(gens), 1)),
+        m.shapes[np.ix_(angles, electromechanical)].real,
+    ])
+    _, _, pivots = qr(V.T, pivoting=True)
+    L = V @ np.linalg.inv(V[pivots[:n_groups]])
+    return list(np.argmax(L, axis=1))
+
+
+def _group_by_simulation(
+    self: _PowerNetwork,
+    gens: List[Hashable],
+    n_groups: Optional[int],
+    tol: float,
+    scenario: Optional[SimulationScenario],
+) -> List[int]:
+    '''
+    Coherency of the rotor angle swings in a short simulation: machines are
+    clustered by complete linkage on the largest difference of their angle
+    deviations over time.
+    '''
+    if scenario is None:
+        scenario = SimulationScenario(
+            tend=2, fault=[BusFault(index=self.bus_indices[0], time=(0, 0.05))])
+    result = simulate(self, scenario, SimulationOptions(record_x=gens, record_V=[], record_I=[]))
+    delta = np.array([result[g].x[:, 0] for g in gens])
+    delta -= delta[:, :1]
+
+    n = len(gens)
+    dist = np.zeros((n, n))
+    for i in range(n):
+        dist[i] = np.max(np.abs(delta - delta[i]), axis=1)
+    Z = linkage(squareform(dist, checks=False), method='complete')
+    if n_groups is None:
+        labels = fcluster(Z, tol, criterion='distance')
+    else:
+        labels = fcluster(Z, n_groups, criterion='maxclust')
+    return list(labels - 1)
+
+
+def get_coherent_groups(
+    self: _PowerNetwork,
+    buses: Optional[Iterable[Hashable]] = None,
+    n_groups: Optional[int] = None,
+    method: Literal['modal', 'simulation'] = 'modal',
+    f_max: float = 1.0,
+    tol: float = 0.05,
+    scenario: Optional[SimulationScenario] = None,
+) -> List[List[Hashable]]:
+    '''
+    Groups coherent `Generator1Axis` machines.
+
+    Args:
+        buses (Optional[Iterable[Hashable]]): buses whose machines are
+          grouped, defaults to all.
+        n_groups (Optional[int]): the number of groups. Required by the
+          modal method; for the simulation method, groups are instead
+          formed by `tol` if None.
+        method (Literal['modal', 'simulation']): 'modal' for slow
+          coherency on the mode shapes of the linearized network,
+          'simulation' for the rotor angle swings after a disturbance.
+        f_max (float): upper end in Hz of the band of slow modes.
+        tol (float): the largest angle difference in rad between machines
+          of a group.
+        scenario (Optional[SimulationScenario]): the disturbance, defaults
+          to a 0.05 s fault on the first bus over 2 s.
+
+    Returns:
+        List[List[Hashable]]: bus indices of the machines of each group.
+    '''
+    gens = get_generator_buses(self, buses)
+    if n_groups is not None and n_groups >= len(gens):
+        return [[g] for g in gens]
+
+    if method == 'modal':
+        if n_groups is None:
+            raise ValueError('The modal method needs the number of groups.')
+        labels = _group_by_modes(self, gens, n_groups, f_max)
+    elif method == 'simulation':
+        labels = _group_by_simulation(self, gens, n_groups, tol, scenario)
+    else:
+        raise ValueError(f'Unknown coherency method: {method}')
+
+    groups: Dict[int, List[Hashable]] = {}
+    for g, label in zip(gens, labels):
+        groups.setdefault(int(label), []).append(g)
+    return list(groups.values())
+
+
+def _aggregate_pss(pss: List[Pss], w: FloatArray) -> Pss:
+    if all(p.parameter is not None for p in pss):
+        names = ['Kpss', 'Tpss', 'TL1p', 'TL1', 'TL2p', 'TL2']
+        return Pss(PssParameters(**{
+            name: float(np.dot(w, [getattr(p.parameter, name) for p in pss])) for name in names
+        }))
+    # weighted sum of the transfer functions
+    sys = pss[0].get_sys() * w[0]
+    for p, wi in zip(pss[1:], w[1:]):
+        sys = sys + p.get_sys() * wi
+    return Pss(sys)
+
+
+def _aggregate_avr(avr: List[Avr], w: FloatArray) -> Avr:
+    if all(type(a) is AvrSadamoto2019 for a in avr):
+        return AvrSadamoto2019(AvrSadamoto2019Parameters(
+            Te=float(np.dot(w, [a.Te for a in avr])),  # type: ignore
+            Ka=float(np.dot(w, [a.Ka for a in avr])),  # type: ignore
+        ))
+    if all(type(a) is Avr for a in avr):
+        return Avr()
+    raise ValueError('Only machines with the same type of AVR can be aggregated.')
+
+
+def aggregate_generators(gens: List[Generator1Axis]) -> Generator1Axis:
+    '''
+    Equivalent machine of a coherent group: inertias and dampings add up,
+    reactances combine in parallel, and time constants and the AVR and PSS
+    parameters are averaged with the inertias as weights.
+    '''
+    params = [g.parameter for g in gens]
+    M = np.array([p.M for p in params])
+    w = M / M.sum()
+
+    def parallel(name: str) -> float:
+        return float(1 / np.sum([1 / getattr(p, name) for p in params]))
+
+    parameter = GeneratorParameters(
+        Xd=parallel('Xd'),
+        Xd_prime=parallel('Xd_prime'),
+        Xq=parallel('Xq'),
+        Tdo=float(np.dot(w, [p.Tdo for p in params])),
+        M=float(M.sum()),
+        D=float(np.sum([p.D for p in params])),
+    )
+    g = Generator1Axis(gens[0].omega0, parameter)
+    g.set_avr(_aggregate_avr([g.avr for g in gens], w))
+    g.set_pss(_aggregate_pss([g.pss for g in gens], w))
+    return g
+
+
+def get_dynamic_equivalent(
+    self: _PowerNetwork,
+    study_buses: Iterable[Hashable],
+    groups: Optional[Sequence[Sequence[Hashable]]] = None,
+    n_groups: Optional[int] = None,
+    method: Literal['modal', 'simulation'] = 'modal',
+    x_link: float = 1e-3,
+    reduce_network: bool = True,
+) -> _PowerNetwork:
+    '''
+    Builds a smaller copy of the network in which each coherent group of
+    external `Generator1Axis` machines is replaced by one equivalent
+    machine (see `aggregate_generators`) with its AVR and PSS.
+
+    The equivalent machine is connected to the terminal buses of the group
+    by phase shifting transformers of reactance `x_link`, whose ratios
+    carry the base-case current of each machine, so that the power flow of
+    the copy reproduces the base case. The terminal buses and all other
+    external buses without states are then eliminated by a Ward equivalent
+    (see `get_external_equivalent`), which folds their constant impedance
+    loads into the couplings of the remaining buses. Controllers acting on
+    an aggregated or eliminated bus are dropped.
+
+    Args:
+        study_buses (Iterable[Hashable]): buses whose machines are kept.
+        groups (Optional[Sequence[Sequence[Hashable]]]): groups of machines
+          to aggregate, by default found by `get_coherent_groups` among the
+          machines outside the study area.
+        n_groups (Optional[int]): the number of groups, see `get_coherent_groups`.
+        method (Literal['modal', 'simulation']): the coherency method, see
+          `get_coherent_groups`. Simulations use a fault on the first study bus.
+        x_link (float): the reactance of the connecting transformers.
+        reduce_network (bool): if False, keeps the external network with
+          the terminal buses as buses without injection.
+
+    Returns:
+        PowerNetwork: the initialized equivalent network.
+    '''
+    study = list(study_buses)
+    if groups is None:
+        external = [index for index in self.bus_indices if index not in study]
+        scenario = None
+        if method == 'simulation':
+            scenario = SimulationScenario(tend=2, fault=[BusFault(index=study[0], time=(0, 0.05))])
+        groups = get_coherent_groups(self, external, n_groups, method, scenario=scenario)
+
+    net = deepcopy(self)
+    aggregated = set()
+
+    for group in groups:
+        if len(group) < 2:
+            continue
+        buses = [self.a_bus_dict[index] for index in group]
+        gens: List[Generator1Axis] = [b.component for b in buses]  # type: ignore
+        V = np.array([b.V_equilibrium for b in buses], dtype=complex)
+        I = np.array([b.I_equilibrium for b in buses], dtype=complex)
+        w = np.array([g.parameter.M for g in gens])
+        w = w / w.sum()
+        V_eq = np.dot(w, np.abs(V)) * np.exp(1j * np.dot(w, np.unwrap(np.angle(V))))
+
+        if any(isinstance(b, BusSlack) for b in buses):
+            bus = BusSlack(abs(V_eq), float(np.angle(V_eq)), 0)
+        else:
+            bus = BusPV(float(np.sum((V * I.conj()).real)), abs(V_eq), 0)
+        net.add_bus(bus)
+        bus.set_component(aggregate_generators(gens))
+
+        z = 1j * x_link
+        for index, b, Vi, Ii in zip(group, buses, V, I):
+            # the current of the machine flows from the equivalent bus
+            a = V_eq / (Vi + z * Ii)
+            net.add_branch(BranchPiTransformer(bus.index, index, z, 0, abs(a), float(np.angle(a))))  # type: ignore
+            net.a_bus_dict[index] = BusPQ(0, 0, b.shunt, index=index)
+            aggregated.add(index)
+
+    def keep(ctrl) -> bool:
+        return not aggregated & set([*ctrl.index_input, *ctrl.index_observe])
+
+    net.a_controller_local = [c for c in net.a_controller_local if keep(c)]
+    net.a_controller_global = [c for c in net.a_controller_global if keep(c)]
+
+    net.clear_cache()
+    net.initialize()
+    if not reduce_network:
+        return net
+
+    kept = set(study) | set(
+        index for index in net.bus_indices if net.a_bus_dict[index].component.nx > 0)
+    return get_external_equivalent(net, [index for index in net.bus_indices if index in kept], 'ward', x_link)
@@ -0,0 +1,187 @@
+from dataclasses import dataclass
+from typing import Hashable, List, Literal, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from guilda.power_network.base import _PowerNetwork
+from guilda.power_network.power_flow import NewtonPowerFlow, get_power_flow_case
+from guilda.utils.typing import ComplexArray, FloatArray
+
+
+@dataclass
+class ContinuationResult:
+    '''
+    Points of a traced PV curve, where the setpoints are the base case plus
+    `lam` times the direction, with the buses in the order of `bus_index_map`.
+    '''
+
+    lam: FloatArray  # (n_points, )
+    V: ComplexArray  # (n_points, n_bus)
+
+    # the largest load parameter, interpolated around the point `nose`
+    lambda_max: float
+    nose: int
+
+    # magnitudes of the voltage changes along the curve at the nose,
+    # normalized to a largest value of 1, and the buses by decreasing value
+    participation: FloatArray  # (n_bus, )
+    critical_buses: List[Hashable]
+
+    def get_pv_curve(self, bus: int) -> Tuple[FloatArray, FloatArray]:
+        '''
+        The load parameters and the voltage magnitudes of the bus at
+        position `bus`.
+        '''
+        return self.lam, np.abs(self.V[:, bus])
+
+
+def trace_pv_curve(
+    self: _PowerNetwork,
+    dP: Optional[FloatArray] = None,
+    dQ: Optional[FloatArray] = None,
+    stop: Literal['nose', 'full'] = 'nose',
+    step: float = 0.1,
+    min_step: float = 1e-4,
+    max_step: float = 1.0,
+    max_points: int = 500,
+    tol: float = 1e-8,
+    max_iter: int = 10,
+) -> ContinuationResult:
+    '''
+    Continuation power flow: traces the solutions of the power flow as the
+    setpoints of PV and PQ buses move along a direction, by a tangent
+    predictor and a Newton corrector on the pseudo arc length, which stays
+    regular at the nose of the curve.
+
+    The Jacobian is assembled by `NewtonPowerFlow`, with its structure and
+    column ordering kept from step to step, and the last factorization of
+    each corrector gives the tangent of the next step. The step length is
+    doubled after corrections in at most 3 iterations and halved after
+    failed ones, and also when a step passes the nose, until it is about
+    `min_step`. Reactive power limits of PV buses are not considered.
+
+    Args:
+        dP (Optional[FloatArray]): active power increase of PV and PQ buses
+          per unit of the load parameter, defaults to their setpoints.
+        dQ (Optional[FloatArray]): reactive power increase of PQ buses,
+          defaults to their setpoints. Both are in the order of `bus_index_map`.
+        stop (Literal['nose', 'full']): 'nose' stops after the nose,
+          'full' traces the lower half of the curve back to zero.
+        step (float): the initial step length.
+        min_step (float): the shortest step length before giving up.
+        max_step (float): the longest step length.
+        max_points (int): the maximum number of points.
+        tol (float): the largest power mismatch.
+        max_iter (int): the maximum number of corrector iterations.
+
+    Returns:
+        ContinuationResult: the points of the curve and its nose.
+    '''
+    case = get_power_flow_case(self.a_bus)
+    if case is None:
+        raise ValueError('Continuation power flows only apply to BusSlack, BusPV and BusPQ buses.')
+
+    solver = NewtonPowerFlow(self.admittance_matrix_sparse, case)
+    pvpq, pq = solver.pvpq, solver.pq
+    npvpq = len(pvpq)
+
+    dS = (case.P if dP is None else np.asarray(dP, dtype=float)) \
+        + 1j * (case.Q if dQ is None else np.asarray(dQ, dtype=float))
+    d = np.concatenate([dS.real[pvpq], dS.imag[pq]])
+    S_base = case.P + 1j * case.Q
+
+    base = solver.solve()
+    if not base.converged:
+        raise RuntimeError('The power flow of the base case did not converge.')
+    Va0, Vm0 = np.angle(base.V), np.abs(base.V)
+
+    def get_V(y: FloatArray) -> ComplexArray:
+        Va, Vm = Va0.copy(), Vm0.copy()
+        Va[pvpq] = y[:npvpq]
+        Vm[pq] = y[npvpq:-1]
+        return Vm * np.exp(1j * Va)
+
+    def get_residual(y: FloatArray) -> FloatArray:
+        return solver.get_mismatch(get_V(y), S_base + y[-1] * dS)
+
+    def factorize(y: FloatArray, z: FloatArray):
+        # the Jacobian bordered by the load direction and the arc length row
+        J = solver.get_jacobian(get_V(y))
+        A = sp.bmat([[J, sp.csc_matrix(-d[:, None])], [sp.csc_matrix(z[None, :-1]), sp.csc_matrix([[z[-1]]])]], format='csc')
+        solver.factorizations += 1
+        return solver.factorize(A)
+
+    def get_tangent(solve, z: FloatArray) -> FloatArray:
+        e = np.zeros(len(z))
+        e[-1] = 1
+        t = solve(e)
+        return t / np.linalg.norm(t)
+
+    y = np.concatenate([Va0[pvpq], Vm0[pq], [0]])
+    z = np.zeros(len(y))
+    z[-1] = 1
+    t = get_tangent(factorize(y, z), z)
+
+    points = [y]
+    tangents = [t]
+    while len(points) < max_points:
+        # predictor and corrector on the arc length
+        y_new = y + step * t
+        solve = None
+        converged = False
+        for iteration in range(max_iter):
+            F = np.append(get_residual(y_new), t @ (y_new - y) - step)
+            if np.abs(F).max() <= tol:
+                converged = True
+                break
+            solve = factorize(y_new, t)
+            y_new = y_new + solve(-F)
+
+        if not converged or not np.all(np.isfinite(y_new)):
+            step /= 2
+            if step < min_step:
+                break
+            continue
+
+        t_new = get_tangent(factorize(y_new, t) if solve is None else solve, t)
+        # keep going the same way along the curve
+        if t_new @ t < 0:
+            t_new = -t_new
+        passed_nose = t_new[-1] < 0 <= t[-1]
+        if passed_nose and step > 2 * min_step:
+            step /= 2
+            continue
+
+        y, t = y_new, t_new
+        points.append(y)
+        tangents.append(t)
+        if iteration <= 3 and not passed_nose:
+            step = min(2 * step, max_step)
+
+        if (stop == 'nose' and passed_nose) or y[-1] < 0:
+            break
+
+    lam = np.array([p[-1] for p in points])
+    V = np.array([get_V(p) for p in points])
+
+    # a parabola through the highest point and its neighbours
+    nose = int(np.argmax(lam))
+    lambda_max = float(lam[nose])
+    if 0 < nose < len(lam) - 1:
+        s = np.cumsum(np.r_[0, np.linalg.norm(np.diff(points, axis=0), axis=1)])
+        a, b, c = np.polyfit(s[nose - 1:nose + 2], lam[nose - 1:nose + 2], 2)
+        if a < 0:
+            lambda_max = float(max(lambda_max, c - b**2 / (4 * a)))
+
+    participation = np.zeros(case.n)
+    participation[pq] = np.abs(tangents[nose][npvpq:-1])
+    participation /= max(participation.max(), np.finfo(float).tiny)
+    indices = self.bus_indices
+    critical = [indices[i] for i in np.argsort(-participation) if participation[i] > 0]
+
+    return ContinuationResult(
+        lam=lam, V=V,
+        lambda_max=lambda_max, nose=nose,
+        participation=participation, critical_buses=critical,
+    )
@@ -1,11 +1,17 @@
 from typing import Callable, List, Dict, Hashable, Tuple
 import numpy as np
+from numpy.typing import NDArray
 
+from guilda.base import ComponentBatch
 from guilda.bus import Bus
 from guilda.controller import Controller
+from guilda.power_network.types import SimulationMetadata, SimulationSegment
+from guilda.utils.calc import numerical_jacobian
 from guilda.utils.data import sep_col_vec
 from guilda.utils.typing import FloatArray
 
+IntArray = NDArray[np.int_]
+
 
 def get_dx_con(
 
@@ -167,3 +173,366 @@ def get_dx_con(
     ])
 
     return dx, algebraic_constraint
+
+
+class SegmentResidual:
+    '''
+    DAE residual of one simulation segment.
+
+    All index arrays and work buffers are built once on construction, so
+    each call only evaluates the controllers and components and writes the
+    residual in place.
+
+    The layout of `y` is `[x_buses, x_ctrls_global, x_ctrls, V, I_fault]`,
+    where `x_buses` and `V` only cover the simulated buses, and `I_fault`
+    the faulted ones. The residual follows the same layout.
+    '''
+
+    def __init__(
+        self,
+        segment: SimulationSegment,
+        meta: SimulationMetadata,
+        linear: bool = False,
+    ):
+
+        self.segment = segment
+        self.linear = linear
+
+        sim = list(segment.buses_simulated)
+        fault = list(segment.buses_fault)
+        n_bus = len(meta.buses)
+        pos_sim = {b: k for k, b in enumerate(sim)}
+
+        # states
+
+        nx_sim = [meta.nx_bus[b] for b in sim]
+        offsets = np.cumsum(
+            [0, *nx_sim, *meta.nx_ctrl_global, *meta.nx_ctrl], dtype=int)
+        n_sim = len(sim)
+        n_kg = len(meta.ctrls_global)
+
+        self.x_bus: Dict[int, slice] = {
+            b: slice(offsets[k], offsets[k + 1]) for k, b in enumerate(sim)
+        }
+        self.x_ctrl_global: List[slice] = [
+            slice(offsets[n_sim + k], offsets[n_sim + k + 1]) for k in range(n_kg)
+        ]
+        self.x_ctrl: List[slice] = [
+            slice(offsets[n_sim + n_kg + k], offsets[n_sim + n_kg + k + 1])
+            for k in range(len(meta.ctrls))
+        ]
+
+        self.nx: int = int(offsets[-1])
+        self.nV: int = 2 * n_sim
+        self.nI: int = 2 * len(fault)
+        self.ny: int = self.nx + self.nV + self.nI
+
+        # voltages and currents
+
+        self.sim_buses = np.array(sim, dtype=int)
+        self.fault_buses = np.array(fault, dtype=int)
+        self.fault_pos = np.array([pos_sim[b] for b in fault], dtype=int)
+
+        self.V_slice = slice(self.nx, self.nx + self.nV)
+        self.I_slice = slice(self.nx + self.nV, self.ny)
+        # positions of the faulted voltages in y, which are forced to 0
+        self.fault_V_idx = (
+            self.nx + 2 * self.fault_pos[:, None] + np.arange(2)).flatten()
+        self.fault_con_slice = slice(self.nx + self.nV, self.ny)
+
+        self.admittance = np.ascontiguousarray(segment.admittance_reduced)
+
+        self.I_sim_flat = np.zeros(self.nV)
+        self.V_all = np.zeros((2, n_bus))
+        self.I_all = np.zeros((2, n_bus))
+
+        # inputs, stored flat with a column view for each bus
+
+        u_offsets = np.cumsum([0, *meta.nu_bus], dtype=int)
+        self.u_flat = np.zeros(int(u_offsets[-1]))
+        self.u_buses: List[FloatArray] = [
+            self.u_flat[u_offsets[b]: u_offsets[b + 1]].reshape((-1, 1))
+            for b in range(n_bus)
+        ]
+
+        # controllers: (dx/input function, observed buses, input buses)
+
+        self.ctrls_global = [
+            (c.get_dx_u_func(linear), np.array(o, dtype=int), np.array(i, dtype=int))
+            for c, (o, i) in zip(meta.ctrls_global, meta.ctrls_global_indices)
+        ]
+        self.ctrls = [
+            (c.get_dx_u_func(linear), np.array(o, dtype=int), np.array(i, dtype=int))
+            for c, (o, i) in zip(meta.ctrls, meta.ctrls_indices)
+        ]
+
+        # input of each bus comes from the last controller of each kind
+        # that drives the bus: bus -> (controller, start, end)
+        self.u_map_global = self._get_input_map(meta.ctrls_global_indices, meta.nu_bus)
+        self.u_map = self._get_input_map(meta.ctrls_indices, meta.nu_bus)
+
+        self.u_scenario = [
+            (b, f) for b, f in segment.buses_input.items() if meta.nu_bus[b] > 0
+        ]
+
+        # components, grouped into batches evaluated together:
+        # (batch, positions among simulated buses, state indices, input indices, constraint indices)
+
+        groups: Dict[Hashable, List[int]] = {}
+        singles: List[int] = []
+        for k, b in enumerate(sim):
+            key = None if linear else meta.buses[b].component.get_batch_key()
+            if key is None:
+                singles.append(k)
+            else:
+                groups.setdefault(key, []).append(k)
+
+        parts: List[Tuple[ComponentBatch, List[int]]] = []
+        for pos in groups.values():
+            components = [meta.buses[sim[k]].component for k in pos]
+            parts.append((components[0].make_batch(components), pos))
+        for k in singles:
+            parts.append((ComponentBatch([meta.buses[sim[k]].component], linear), [k]))
+
+        self.batches: List[Tuple[ComponentBatch, IntArray, IntArray, IntArray, IntArray]] = []
+        for batch, pos in parts:
+            self.batches.append((
+                batch,
+                np.array(pos, dtype=int),
+                np.array([np.arange(self.x_bus[sim[k]].start, self.x_bus[sim[k]].stop) for k in pos], dtype=int),
+                np.array([np.arange(u_offsets[sim[k]], u_offsets[sim[k] + 1]) for k in pos], dtype=int),
+                self.nx + 2 * np.array(pos, dtype=int)[:, None] + np.arange(2),
+            ))
+
+        # derivatives of the bus voltages and currents by y
+
+        self.dI_sim: FloatArray = np.zeros((self.nV, self.ny))
+        self.dI_sim[:, self.V_slice] = self.admittance
+        fault_I_rows = self.fault_V_idx - self.nx
+        self.dI_sim[fault_I_rows] = 0
+        self.dI_sim[fault_I_rows, np.arange(self.nx + self.nV, self.ny)] = 1
+
+        self.dV_all: FloatArray = np.zeros((n_bus, 2, self.ny))
+        self.dI_all: FloatArray = np.zeros((n_bus, 2, self.ny))
+        for k, b in enumerate(sim):
+            self.dV_all[b, :, self.nx + 2 * k: self.nx + 2 * k + 2] = np.identity(2)
+            self.dI_all[b] = self.dI_sim[2 * k: 2 * k + 2]
+
+        self.u_index: List[slice] = [
+            slice(u_offsets[b], u_offsets[b + 1]) for b in range(n_bus)
+        ]
+
+        self.res = np.zeros(self.ny)
+
+    @staticmethod
+    def _get_input_map(indices: List[Tuple[List[int], List[int]]], nu_bus: List[int]):
+        ret: Dict[int, Tuple[int, int, int]] = {}
+        for k, (_, i_input) in enumerate(indices):
+            idx = 0
+            for b in i_input:
+                ret[b] = (k, idx, idx + nu_bus[b])
+                idx += nu_bus[b]
+        return ret
+
+    def __call__(self, t: float, y: FloatArray, dy: FloatArray) -> FloatArray:
+        return self.residual(t, y, dy, self.res)
+
+    def _set_network(self, y: FloatArray) -> Tuple[FloatArray, FloatArray]:
+        '''
+        Computes the currents of the simulated buses and fills the voltages
+        and currents of all buses. Returns the flat voltages and the (n, 2)
+        currents of the simulated buses.
+        '''
+        V_sim = y[self.V_slice]
+        I_sim = self.I_sim_flat
+        np.dot(self.admittance, V_sim, out=I_sim)
+        I_sim = I_sim.reshape((-1, 2))
+        I_sim[self.fault_pos] = y[self.I_slice].reshape((-1, 2))
+
+        self.V_all[:, self.sim_buses] = V_sim.reshape((-1, 2)).T
+        self.I_all[:, self.sim_buses] = I_sim.T
+        return V_sim, I_sim
+
+    def _get_ctrl_args(self, k: int, is_global: bool, y_col: FloatArray):
+        if is_global:
+            _, i_observe, i_input = self.ctrls_global[k]
+            return (
+                self.V_all[:, i_observe], self.I_all[:, i_input],
+                y_col[self.x_ctrl_global[k]],
+                [y_col[self.x_bus[b]] for b in i_observe], None,
+            )
+        _, i_observe, _ = self.ctrls[k]
+        return (
+            self.V_all[:, i_observe], self.I_all[:, i_observe],
+            y_col[self.x_ctrl[k]],
+            [y_col[self.x_bus[b]] for b in i_observe],
+            [self.u_buses[b] for b in i_observe],
+        )
+
+    def residual(self, t: float, y: FloatArray, dy: FloatArray, out: FloatArray) -> FloatArray:
+        '''
+        Writes the residual `[dx - dy, constraint]` into `out` and returns it.
+        '''
+
+        y_col = y.reshape((-1, 1))
+        V_sim, I_sim = self._set_network(y)
+
+        # inputs of controllers
+
+        u_buses = self.u_buses
+        self.u_flat.fill(0)
+
+        u_ctrls_global: List[FloatArray] = []
+        for k, (f, _, _) in enumerate(self.ctrls_global):
+            dx_k, u_k = f(*self._get_ctrl_args(k, True, y_col), t)
+            out[self.x_ctrl_global[k]] = dx_k.flatten() - dy[self.x_ctrl_global[k]]
+            u_ctrls_global.append(u_k)
+
+        for b, (k, s, e) in self.u_map_global.items():
+            u_buses[b] += u_ctrls_global[k][s: e]
+
+        u_ctrls: List[FloatArray] = []
+        for k, (f, _, _) in enumerate(self.ctrls):
+            dx_k, u_k = f(*self._get_ctrl_args(k, False, y_col), t)
+            out[self.x_ctrl[k]] = dx_k.flatten() - dy[self.x_ctrl[k]]
+            u_ctrls.append(u_k)
+
+        for b, (k, s, e) in self.u_map.items():
+            u_buses[b] += u_ctrls[k][s: e]
+
+        # inputs of simulation scenario
+
+        for b, f in self.u_scenario:
+            u_buses[b] += f(t).reshape((-1, 1))
+
+        # DAE residues of network components
+
+        V_c = V_sim[0::2] + 1j * V_sim[1::2]
+        I_c = I_sim[:, 0] + 1j * I_sim[:, 1]
+        u_flat = self.u_flat
+
+        for batch, pos, idx_x, idx_u, idx_con in self.batches:
+            idx_x_flat = idx_x.reshape(-1)
+            dx, con = batch.get_dx_constraint(
+                V_c[pos], I_c[pos], y[idx_x], u_flat[idx_u], t)
+            out[idx_x_flat] = dx.reshape(-1) - dy[idx_x_flat]
+            out[idx_con] = con
+
+        out[self.fault_con_slice] = y[self.fault_V_idx]
+
+        return out
+
+    def jacobian(self, c: float, t: float, y: FloatArray, dy: FloatArray) -> FloatArray:
+        '''
+        Returns the iteration matrix `dF/dy + c * dF/d(dy)` of the residual,
+        in the form expected by IDA.
+
+        The components contribute their analytic Jacobians (see
+        `Component.get_jacobian`); the controllers are differentiated by
+        finite differences with respect to their own arguments.
+        '''
+
+        ny = self.ny
+        J: FloatArray = np.zeros((ny, ny))
+
+        y_col = y.reshape((-1, 1))
+        V_sim, I_sim = self._set_network(y)
+
+        # inputs of controllers and their derivatives by y
+
+        u_buses = self.u_buses
+        self.u_flat.fill(0)
+        dU: FloatArray = np.zeros((self.u_flat.size, ny))
+        eye = np.identity(ny)
+
+        for is_global, ctrls, x_ctrl, u_map in (
+            (True, self.ctrls_global, self.x_ctrl_global, self.u_map_global),
+            (False, self.ctrls, self.x_ctrl, self.u_map),
+        ):
+            u_ctrls: List[FloatArray] = []
+            du_ctrls: List[FloatArray] = []
+            for k, (f, i_observe, i_input) in enumerate(ctrls):
+                args = self._get_ctrl_args(k, is_global, y_col)
+                i_current = i_input if is_global else i_observe
+                dx_k, u_k, F = _get_ctrl_jacobian(f, args, t)
+                Z = np.vstack([
+                    self.dV_all[i_observe, 0], self.dV_all[i_observe, 1],
+                    self.dI_all[i_current, 0], self.dI_all[i_current, 1],
+                    eye[x_ctrl[k]],
+                    *[eye[self.x_bus[b]] for b in i_observe],
+                    *([] if is_global else [dU[self.u_index[b]] for b in i_observe]),
+                ])
+                dF = F @ Z
+                nx_k = dx_k.size
+                J[x_ctrl[k]] = dF[:nx_k]
+                u_ctrls.append(u_k)
+                du_ctrls.append(dF[nx_k:])
+
+            for b, (k, s, e) in u_map.items():
+                u_buses[b] += u_ctrls[k][s: e]
+                dU[self.u_index[b]] += du_ctrls[k][s: e]
+
+        for b, f in self.u_scenario:
+            u_buses[b] += f(t).reshape((-1, 1))
+
+        # Jacobians of network components
+
+        V_c = V_sim[0::2] + 1j * V_sim[1::2]
+        I_c = I_sim[:, 0] + 1j * I_sim[:, 1]
+        u_flat = self.u_flat
+        has_ctrl = len(self.ctrls_global) + len(self.ctrls) > 0
+
+        for batch, pos, idx_x, idx_u, idx_con in self.batches:
+            rec = batch.get_jacobian(
+                V_c[pos], I_c[pos], y[idx_x], u_flat[idx_u], t)
+            n = len(pos)
+            idx_V = idx_con
+            dI = self.dI_sim[idx_con - self.nx]
+            rows = np.arange(n)[:, None, None]
+
+            for idx_row, M_x, M_V, M_I, M_u in (
+                (idx_x, rec.A, rec.BV, rec.BI, rec.B),
+                (idx_con, rec.C, rec.DV, rec.DI, rec.D),
+            ):
+                nr = idx_row.shape[1]
+                J_b = np.matmul(M_I, dI)
+                cols = np.arange(nr)[None, :, None]
+                J_b[rows, cols, idx_x[:, None, :]] += M_x
+                J_b[rows, cols, idx_V[:, None, :]] += M_V
+                if has_ctrl:
+                    J_b += np.matmul(M_u, dU[idx_u])
+                J[idx_row.reshape(-1)] = J_b.reshape((-1, ny))
+
+        J[np.arange(self.nx + self.nV, ny), self.fault_V_idx] = 1
+
+        x_diag = np.arange(self.nx)
+        J[x_diag, x_diag] -= c
+
+        return J
+
+
+def _get_ctrl_jacobian(f: Callable, args: tuple, t: float):
+    '''
+    Evaluates the controller function `f` and differentiates `[dx, u]` by
+    its arguments, flattened in order: V, I, x, X, U.
+    '''
+    V, I, x, X, U = args
+    shapes = [V.shape, I.shape, x.shape, *[X_b.shape for X_b in X]]
+    if U is not None:
+        shapes += [U_b.shape for U_b in U]
+    sizes = [int(np.prod(sh)) for sh in shapes]
+    n_X = len(X)
+
+    def unpack(z: FloatArray):
+        parts = np.split(z, np.cumsum(sizes)[:-1])
+        parts = [p.reshape(sh) for p, sh in zip(parts, shapes)]
+        U_ = None if U is None else parts[3 + n_X:]
+        return parts[0], parts[1], parts[2], parts[3: 3 + n_X], U_
+
+    def func(z: FloatArray):
+        dx, u = f(*unpack(z), t)
+        return np.concatenate([np.ravel(dx), np.ravel(u)])
+
+    z0 = np.concatenate([np.ravel(a) for a in [V, I, x, *X, *(U or [])]])
+    dx, u = f(V, I, x, X, U, t)
+    return dx, u, numerical_jacobian(func, z0)
@@ -0,0 +1,300 @@
+from copy import copy
+from typing import Callable, Dict, Hashable, Iterable, List, Literal, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+
+from guilda.branch import Branch, BranchPi, BranchPiTransformer
+from guilda.power_network.power_flow import IntArray, PowerFlowCase, PowerFlowResult
+from guilda.utils.typing import ComplexArray, FloatArray
+
+# outages whose low-rank update is conditioned worse than this split the
+# network, within rounding errors of the factorizations
+_ISLAND_COND = 1e10
+
+
+def get_branch_admittances(
+    branches: List[Branch],
+    bus_index_map: Dict[Hashable, int],
+    resistance: bool = True,
+    shunt: bool = True,
+    tap: bool = True,
+    phase: bool = True,
+) -> Tuple[IntArray, ComplexArray]:
+    '''
+    Positions of the ends and 2x2 admittance matrices of the branches,
+    with shapes (n_branch, 2) and (n_branch, 2, 2).
+
+    The resistances, the shunt admittances, and the taps and phases of
+    `BranchPi` and `BranchPiTransformer` can be left out. Branches with an
+    end outside `bus_index_map` are given zero admittance.
+    '''
+    ends = np.zeros((len(branches), 2), dtype=int)
+    blocks = np.zeros((len(branches), 2, 2), dtype=complex)
+    for k, br in enumerate(branches):
+        if br.bus1 not in bus_index_map or br.bus2 not in bus_index_map:
+            continue
+        ends[k] = bus_index_map[br.bus1], bus_index_map[br.bus2]
+        if isinstance(br, (BranchPi, BranchPiTransformer)):
+            br = copy(br)
+            if not resistance:
+                br.z = complex(0, np.imag(br.z))
+            if not shunt:
+                br.y = 0
+            if isinstance(br, BranchPiTransformer):
+                if not tap:
+                    br.tap = 1
+                if not phase:
+                    br.phase = 0
+        blocks[k] = br.get_admittance_matrix()
+    return ends, blocks
+
+
+def assemble_branches(ends: IntArray, blocks: np.ndarray, n: int, diagonal: Optional[np.ndarray] = None) -> sp.csr_matrix:
+    '''
+    Sums the 2x2 blocks of the branches, and the diagonal, into an n x n matrix.
+    '''
+    rows = np.repeat(ends, 2, axis=1).ravel()
+    cols = np.tile(ends, (1, 2)).ravel()
+    M = sp.csr_matrix((blocks.ravel(), (rows, cols)), shape=(n, n))
+    if diagonal is not None:
+        M = M + sp.diags(diagonal)
+    return sp.csr_matrix(M)
+
+
+def _with_outages(
+    solve: Callable[[np.ndarray], np.ndarray],
+    position: IntArray,
+    ends: IntArray,
+    blocks: np.ndarray,
+) -> Callable[[np.ndarray], np.ndarray]:
+    '''
+    Solver of `B - sum of the blocks` from a solver of `B`, by the Woodbury
+    identity. `position` maps buses to rows of `B`, or -1 for other buses.
+    Raises ValueError if the outages split the network.
+    '''
+    if len(ends) == 0:
+        return solve
+    k = len(ends)
+    n = int(position.max()) + 1
+    U = np.zeros((n, 2 * k))
+    for j, (f, t) in enumerate(ends):
+        for e, bus in enumerate((f, t)):
+            if position[bus] >= 0:
+                U[position[bus], 2 * j + e] = 1
+    M = np.zeros((2 * k, 2 * k))
+    for j in range(k):
+        M[2 * j:2 * j + 2, 2 * j:2 * j + 2] = -blocks[j]
+
+    Z = solve(U)
+    K = np.eye(2 * k) + M @ (U.T @ Z)
+    if np.linalg.cond(K) > _ISLAND_COND:
+        raise ValueError('The outages split the network into islands.')
+    K_inv = np.linalg.inv(K)
+
+    def solve_updated(b: np.ndarray) -> np.ndarray:
+        x = solve(b)
+        return x - Z @ (K_inv @ (M @ (U.T @ x)))
+    return solve_updated
+
+
+class _BranchPowerFlow:
+    '''
+    Power flow solvers on constant matrices derived from the branches.
+    '''
+
+    def __init__(self, Y: sp.spmatrix, case: PowerFlowCase, branches: List[Branch], bus_index_map: Dict[Hashable, int]):
+        self.Y = sp.csr_matrix(Y, dtype=complex)
+        self.case = case
+        self.pvpq = np.sort(np.concatenate([case.pv, case.pq]))
+        self.pq = np.sort(case.pq)
+        self.ends, self.blocks = get_branch_admittances(branches, bus_index_map)
+
+        # rows of the buses in the angle and magnitude equations
+        self.pos_a = np.full(case.n, -1)
+        self.pos_a[self.pvpq] = np.arange(len(self.pvpq))
+        self.pos_m = np.full(case.n, -1)
+        self.pos_m[self.pq] = np.arange(len(self.pq))
+
+    def get_admittance(self, outages: Iterable[int] = ()) -> sp.csr_matrix:
+        outages = list(outages)
+        if not outages:
+            return self.Y
+        dY = assemble_branches(self.ends[outages], self.blocks[outages], self.case.n)
+        return sp.csr_matrix(self.Y - dY)
+
+
+class FastDecoupledPowerFlow(_BranchPowerFlow):
+    '''
+    Fast decoupled power flow: the angles are corrected with the constant
+    matrix B' and the magnitudes with B'', each factorized once.
+
+    B' leaves out the shunts and the taps of the branches, and B'' the
+    phases. The 'XB' variant also leaves out the resistances in B', the
+    'BX' variant in B''. B' takes the voltage magnitudes as 1, so the angle
+    corrections are divided by the mean setpoint of the PV and slack buses.
+    Branch outages are solved by low-rank updates of the factorizations.
+    '''
+
+    def __init__(
+        self,
+        Y: sp.spmatrix,
+        case: PowerFlowCase,
+        branches: List[Branch],
+        bus_index_map: Dict[Hashable, int],
+        shunt: ComplexArray,
+        variant: Literal['XB', 'BX'] = 'XB',
+    ):
+        super().__init__(Y, case, branches, bus_index_map)
+        n = case.n
+        _, Yp = get_branch_admittances(
+            branches, bus_index_map, resistance=variant == 'BX', shunt=False, tap=False, phase=False)
+        _, Ypp = get_branch_admittances(
+            branches, bus_index_map, resistance=variant == 'XB', phase=False)
+        self.blocks_p = -Yp.imag
+        self.blocks_pp = -Ypp.imag
+
+        Bp = assemble_branches(self.ends, self.blocks_p, n)
+        Bpp = assemble_branches(self.ends, self.blocks_pp, n, -np.imag(shunt))
+        self.solve_p = splu(sp.csc_matrix(Bp[self.pvpq][:, self.pvpq])).solve
+        self.solve_pp = splu(sp.csc_matrix(Bpp[self.pq][:, self.pq])).solve if len(self.pq) else None
+
+    def solve(
+        self,
+        V0: Optional[ComplexArray] = None,
+        tol: float = 1e-8,
+        max_iter: int = 100,
+        case: Optional[PowerFlowCase] = None,
+        outages: Iterable[int] = (),
+    ) -> PowerFlowResult:
+        '''
+        Args:
+            V0 (Optional[ComplexArray]): initial voltages, defaults to a flat start.
+            tol (float): the largest power mismatch.
+            max_iter (int): the maximum number of iterations.
+            case (Optional[PowerFlowCase]): setpoints on the same buses and
+              bus types, defaults to those of the solver.
+            outages (Iterable[int]): positions of the branches taken out.
+
+        Returns:
+            PowerFlowResult: the voltages and injected currents.
+        '''
+        case = self.case if case is None else case
+        outages = list(outages)
+        Y = self.get_admittance(outages)
+        ends = self.ends[outages]
+        solve_p = _with_outages(self.solve_p, self.pos_a, ends, self.blocks_p[outages])
+        solve_pp = self.solve_pp
+        if solve_pp is not None:
+            solve_pp = _with_outages(solve_pp, self.pos_m, ends, self.blocks_pp[outages])
+
+        V = case.get_flat_start() if V0 is None else np.array(V0, dtype=complex).ravel()
+        V[case.pv] *= case.V_abs[case.pv] / np.abs(V[case.pv])
+        V[case.slack] = case.V_abs[case.slack] * np.exp(1j * case.V_angle[case.slack])
+        Va, Vm = np.angle(V), np.abs(V)
+        regulated = np.concatenate([case.slack, case.pv])
+        V_nom = case.V_abs[regulated].mean() if len(regulated) else 1
+        S_set = case.P + 1j * case.Q
+
+        def get_mismatch(V: ComplexArray) -> Tuple[ComplexArray, float]:
+            dS = V * np.conj(Y @ V) - S_set
+            norm = max(np.abs(dS.real[self.pvpq]).max(initial=0), np.abs(dS.imag[self.pq]).max(initial=0))
+            return dS / np.abs(V), norm
+
+        mis, norm = get_mismatch(V)
+        iterations = 0
+        while norm > tol and iterations < max_iter:
+            Va[self.pvpq] -= solve_p(mis.real[self.pvpq]) / V_nom
+            V = Vm * np.exp(1j * Va)
+            mis, norm = get_mismatch(V)
+            iterations += 1
+            if norm <= tol or solve_pp is None:
+                continue
+
+            Vm[self.pq] -= solve_pp(mis.imag[self.pq])
+            V = Vm * np.exp(1j * Va)
+            mis, norm = get_mismatch(V)
+
+        return PowerFlowResult(
+            V=V, I=Y @ V,
+            converged=norm <= tol,
+            iterations=iterations,
+            mismatch=float(norm),
+        )
+
+
+class DCPowerFlow(_BranchPowerFlow):
+    '''
+    DC power flow: lossless branches, voltage magnitudes of 1 and small
+    angle differences make the active powers linear in the angles,
+    `P = B θ + P_shift`, where `P_shift` comes from the phases of the
+    transformers and taps are left out. B is factorized once, and branch
+    outages are solved by low-rank updates of the factorization.
+    '''
+
+    def __init__(self, Y: sp.spmatrix, case: PowerFlowCase, branches: List[Branch], bus_index_map: Dict[Hashable, int]):
+        super().__init__(Y, case, branches, bus_index_map)
+        n = case.n
+        _, Yb = get_branch_admittances(
+            branches, bus_index_map, resistance=False, shunt=False, tap=False, phase=False)
+        self.blocks_dc = -Yb.imag
+        self.b = self.blocks_dc[:, 0, 0]
+        self.phase = np.array([getattr(br, 'phase', 0) for br in branches], dtype=float)
+
+        self.B = assemble_branches(self.ends, self.blocks_dc, n)
+        self.solve_B = splu(sp.csc_matrix(self.B[self.pvpq][:, self.pvpq])).solve
+
+    def get_shift(self, branches: IntArray) -> FloatArray:
+        '''
+        Injections that the phases of the given branches add to `B θ`.
+        '''
+        P_shift = np.zeros(self.case.n)
+        flow = self.b[branches] * self.phase[branches]
+        np.add.at(P_shift, self.ends[branches, 0], -flow)
+        np.add.at(P_shift, self.ends[branches, 1], flow)
+        return P_shift
+
+    def get_angles(self, P: FloatArray, V_angle: FloatArray, outages: Iterable[int] = ()) -> FloatArray:
+        '''
+        Bus angles for the active powers `P` of the buses and the angles
+        `V_angle` of the slack buses.
+        '''
+        outages = list(outages)
+        kept = np.setdiff1d(np.arange(len(self.b)), outages)
+        slack = self.case.slack
+        solve = _with_outages(self.solve_B, self.pos_a, self.ends[outages], self.blocks_dc[outages])
+
+        theta = np.zeros(self.case.n)
+        theta[slack] = V_angle[slack]
+        B = self.B - assemble_branches(self.ends[outages], self.blocks_dc[outages], self.case.n)
+        rhs = P - self.get_shift(kept) - B[:, slack] @ theta[slack]
+        theta[self.pvpq] = solve(rhs[self.pvpq])
+        return theta
+
+    def solve(
+        self,
+        V0: Optional[ComplexArray] = None,
+        tol: float = 1e-8,
+        max_iter: int = 1,
+        case: Optional[PowerFlowCase] = None,
+        outages: Iterable[int] = (),
+    ) -> PowerFlowResult:
+        '''
+        See `FastDecoupledPowerFlow.solve`; `V0`, `tol` and `max_iter` are
+        not used. The mismatch is that of the active powers of the DC model.
+        '''
+        case = self.case if case is None else case
+        outages = list(outages)
+        theta = self.get_angles(case.P, case.V_angle, outages)
+        V = np.exp(1j * theta)
+
+        kept = np.setdiff1d(np.arange(len(self.b)), outages)
+        B = self.B - assemble_branches(self.ends[outages], self.blocks_dc[outages], case.n)
+        P = B @ theta + self.get_shift(kept)
+        return PowerFlowResult(
+            V=V, I=self.get_admittance(outages) @ V,
+            converged=True,
+            iterations=1,
+            mismatch=float(np.abs(P - case.P)[self.pvpq].max(initial=0)),
+        )
@@ -0,0 +1,115 @@
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import numpy as np
+
+from guilda.power_network.base import _PowerNetwork
+from guilda.power_network.decoupled import _ISLAND_COND, DCPowerFlow
+from guilda.power_network.power_flow import IntArray
+from guilda.utils.typing import FloatArray
+
+
+@dataclass
+class DistributionFactors:
+    '''
+    Distribution factors of the DC power flow (see `DCPowerFlow`), with the
+    branches in the order of `a_branch` and the buses in the order of
+    `bus_index_map`. Flows are active powers from `bus1` to `bus2`.
+
+    `ptdf[l, i]` is the change of the flow of branch `l` per unit of power
+    injected at bus `i` and taken out at the slack buses. `lodf[l, k]` is
+    the change of the flow of branch `l` per unit of the flow of branch `k`
+    before its outage, with `lodf[k, k] = -1`, and NaN for outages that
+    split the network.
+    '''
+
+    ptdf: FloatArray  # (n_branch, n_bus)
+    lodf: FloatArray  # (n_branch, n_branch)
+    flows: FloatArray  # (n_branch, ), of the base case
+
+    ends: IntArray  # (n_branch, 2), positions of the buses of the branches
+
+    def get_transfer(self, branches: Iterable[int]) -> FloatArray:
+        '''
+        Changes of the flows per unit of power sent from `bus1` to `bus2`
+        of each of the given branches, as columns.
+        '''
+        ends = self.ends[list(branches)]
+        return self.ptdf[:, ends[:, 0]] - self.ptdf[:, ends[:, 1]]
+
+    def get_flows(self, dP: Optional[FloatArray] = None, outages: Iterable[int] = ()) -> FloatArray:
+        '''
+        Flows of the branches after a change of the injections and the
+        outage of branches, by products with the distribution factors.
+
+        Args:
+            dP (Optional[FloatArray]): changes of the active powers injected
+              at the buses, balanced by the slack buses.
+            outages (Iterable[int]): positions in `a_branch` of branches
+              taken out; their flows are 0.
+
+        Returns:
+            FloatArray: the flows of all branches.
+        '''
+        flows = self.flows if dP is None else self.flows + self.ptdf @ np.asarray(dP, dtype=float)
+        outages = list(outages)
+        if not outages:
+            return flows
+        if len(outages) == 1:
+            k = outages[0]
+            if np.isnan(self.lodf[:, k]).any():
+                raise ValueError('The outages split the network into islands.')
+            return flows + self.lodf[:, k] * flows[k]
+
+        # the outaged branches carry flows that cancel their own
+        H = self.get_transfer(outages)
+        K = np.eye(len(outages)) - H[outages]
+        if np.linalg.cond(K) > _ISLAND_COND:
+            raise ValueError('The outages split the network into islands.')
+        ret = flows + H @ np.linalg.solve(K, flows[outages])
+        ret[outages] = 0
+        return ret
+
+
+def get_distribution_factors(self: _PowerNetwork) -> DistributionFactors:
+    '''
+    Power transfer (PTDF) and line outage (LODF) distribution factors of the
+    DC power flow.
+
+    The PTDF is computed by solving with the factorization of the
+    susceptance matrix that `DCPowerFlow` keeps, with one right-hand side
+    per branch, and the LODF from the PTDF of the transfers between the
+    ends of each branch. The flows of any change of the injections or
+    outage then follow from matrix-vector products, see
+    `DistributionFactors.get_flows`.
+
+    Returns:
+        DistributionFactors: the PTDF, the LODF and the base case flows.
+    '''
+    solver = self.get_power_flow_solver('dc')
+    assert isinstance(solver, DCPowerFlow)
+    case, pvpq = solver.case, solver.pvpq
+    ends, b = solver.ends, solver.b
+    n_branch = len(b)
+
+    # flows per unit of the angles, b (θ1 - θ2), on the unknown angles
+    C = np.zeros((n_branch, case.n))
+    C[np.arange(n_branch), ends[:, 0]] += b
+    C[np.arange(n_branch), ends[:, 1]] -= b
+    ptdf = np.zeros((n_branch, case.n))
+    if len(pvpq):
+        # B is symmetric, so C B^-1 = (B^-1 C^T)^T
+        ptdf[:, pvpq] = solver.solve_B(np.ascontiguousarray(C[:, pvpq].T)).T
+
+    H = ptdf[:, ends[:, 0]] - ptdf[:, ends[:, 1]]
+    remaining = 1 - np.diag(H)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lodf = H / remaining
+    # the outage of a branch that carries all of its own transfer splits the network
+    lodf[:, np.abs(remaining) < 1 / _ISLAND_COND] = np.nan
+    lodf[np.arange(n_branch), np.arange(n_branch)] = -1
+
+    theta = solver.get_angles(case.P, case.V_angle)
+    flows = b * (theta[ends[:, 0]] - theta[ends[:, 1]] - solver.phase)
+
+    return DistributionFactors(ptdf=ptdf, lodf=lodf, flows=flows, ends=ends)
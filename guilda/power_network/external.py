@@ -0,0 +1,253 @@
+from copy import deepcopy
+from typing import Dict, Hashable, Iterable, List, Literal
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+
+from guilda.base import ComponentEmpty, uses_method
+from guilda.branch import BranchAdmittance, BranchPiTransformer
+from guilda.bus import Bus, BusPQ, BusPV, BusSlack
+from guilda.generator import Generator
+from guilda.load import LoadCurrent, LoadImpedance
+from guilda.power_network.base import _PowerNetwork
+from guilda.power_network.modal import get_modes
+from guilda.utils.typing import ComplexArray
+
+
+def _replace_bus(net: _PowerNetwork, index: Hashable, bus: Bus) -> None:
+    '''
+    Replaces a bus in place, keeping its position, shunt and component.
+    '''
+    old = net.a_bus_dict[index]
+    bus.index = index
+    bus.set_shunt(old.shunt)
+    bus.set_component(old.component)
+    net.a_bus_dict[index] = bus
+
+
+def _is_impedance(component) -> bool:
+    return isinstance(component, LoadImpedance) \
+        and uses_method(component, LoadImpedance, 'get_dx_constraint')
+
+
+def get_unstable_eigenvalues(
+    net: _PowerNetwork,
+    tol: float = 1e-6,
+    f_max: float = 2.0,
+    sigma_max: float = 10.0,
+) -> ComplexArray:
+    '''
+    Eigenvalues of the linearized network with a real part above `tol`,
+    among those below `f_max` Hz with a real part up to `sigma_max`, found
+    by one sparse shift-invert search of `get_modes`.
+    '''
+    if not sum(b.component.nx for b in net.a_bus):
+        return np.zeros(0, dtype=complex)
+    # the band starts a little below 0 Hz to keep the real eigenvalues
+    m = get_modes(net, f_min=-1e-3, f_max=f_max, n_shifts=1, sigma_min=-sigma_max)
+    return m.eigenvalues[m.eigenvalues.real > tol]
+
+
+def get_external_equivalent(
+    self: _PowerNetwork,
+    study_buses: Iterable[Hashable],
+    method: Literal['ward', 'rei'] = 'ward',
+    x_link: float = 1e-3,
+    tol: float = 1e-10,
+    check_stability: bool = True,
+) -> _PowerNetwork:
+    '''
+    Builds a copy of the network in which the buses outside the study area
+    are replaced by a static equivalent at the base case.
+
+    The constant impedance loads of the external buses are first folded
+    into the admittance matrix, and the external buses are then eliminated
+    by a sparse Kron reduction, which only fills in the block of the
+    boundary buses. The equivalent couplings become `BranchAdmittance`s
+    between boundary buses and shunts on them. With 'ward', the other
+    external injections move to the boundary buses as constant current
+    injections. With 'rei', they are first gathered through zero power
+    balance networks into one new bus for the generators and one for the
+    other components, which are kept as constant current injections.
+
+    A boundary injection goes to the boundary bus itself if that is a PQ
+    bus without component. Otherwise it goes to a new bus linked by a
+    phase shifting transformer of reactance `x_link` that carries the
+    injected current. The copy is set at the base case without solving a
+    power flow, and its power flows start from the base case, since the
+    links keep them from converging from a flat start. If the slack bus is external, the first PV bus of the study
+    area, or else the largest equivalent injection, becomes the slack.
+    Controllers acting on external buses are dropped.
+
+    Args:
+        study_buses (Iterable[Hashable]): buses that are kept.
+        method (Literal['ward', 'rei']): the kind of equivalent.
+        x_link (float): the reactance of the links of injections.
+        tol (float): couplings below `tol` times the largest one are dropped.
+        check_stability (bool): if True, raises RuntimeError when the
+          linearized equivalent is unstable (see `get_unstable_eigenvalues`),
+          which only depends on the size of the equivalent.
+
+    Returns:
+        PowerNetwork: the equivalent network.
+    '''
+    if method not in ('ward', 'rei'):
+        raise ValueError(f'Unknown equivalent: {method}')
+
+    study = set(study_buses)
+    keys = list(self.bus_index_map)
+    n = len(keys)
+    kept = [i for i, key in enumerate(keys) if key in study]
+    external = [i for i, key in enumerate(keys) if key not in study]
+
+    Y = sp.coo_matrix(self.admittance_matrix_sparse)
+    V = np.array(self.V_equilibrium, dtype=complex).ravel()
+    I = np.array(self.I_equilibrium, dtype=complex).ravel()
+
+    rows: List[int] = list(Y.row)
+    cols: List[int] = list(Y.col)
+    vals: List[complex] = list(Y.data)
+
+    # constant impedance loads of external buses become shunts, I = y V
+    I_inj = I.copy()
+    for i in external:
+        if _is_impedance(self.a_bus_dict[keys[i]].component) and V[i] != 0:
+            rows.append(i)
+            cols.append(i)
+            vals.append(-I[i] / V[i])
+            I_inj[i] = 0
+
+    def add_branch(i: int, j: int, y: complex):
+        rows.extend([i, i, j, j])
+        cols.extend([i, j, i, j])
+        vals.extend([y, -y, -y, y])
+
+    # REI: injections into a ground node G at zero voltage, fed from R
+    V_aug = list(V)
+    I_aug = list(I_inj)
+    rei: List[int] = []
+    if method == 'rei':
+        is_gen = [isinstance(self.a_bus_dict[keys[i]].component, Generator) for i in range(n)]
+        groups = [
+            [i for i in external if is_gen[i] and I_inj[i] != 0],
+            [i for i in external if not is_gen[i] and I_inj[i] != 0],
+        ]
+        for group in groups:
+            I_R = I[group].sum()
+            if not group or abs(I_R) <= tol * np.abs(I).max():
+                continue
+            V_R = np.sum(V[group] * I[group].conj()) / np.conj(I_R)
+            g, r = len(V_aug), len(V_aug) + 1
+            for k in group:
+                add_branch(k, g, -I[k] / V[k])
+                I_aug[k] = 0
+            add_branch(g, r, I_R / V_R)
+            V_aug += [0, V_R]
+            I_aug += [0, I_R]
+            rei.append(r)
+
+    n_aug = len(V_aug)
+    V_aug = np.array(V_aug, dtype=complex)
+    I_aug = np.array(I_aug, dtype=complex)
+    Y_aug = sp.csr_matrix((vals, (rows, cols)), shape=(n_aug, n_aug), dtype=complex)
+
+    kept_aug = kept + rei
+    elim = [i for i in range(n_aug) if i not in set(kept_aug)]
+    Y_ke = Y_aug[kept_aug][:, elim]
+    boundary = [kept_aug[k] for k in np.flatnonzero(np.diff(Y_ke.tocsr().indptr))]
+
+    # Kron reduction onto the boundary
+    dY = np.zeros((len(boundary), len(boundary)), dtype=complex)
+    I_b = np.zeros(len(boundary), dtype=complex)
+    if elim and boundary:
+        lu = splu(sp.csc_matrix(Y_aug[elim][:, elim]))
+        Y_be = Y_aug[boundary][:, elim]
+        dY = -(Y_be @ lu.solve(Y_aug[elim][:, boundary].toarray()))
+        I_b = -(Y_be @ lu.solve(I_aug[elim]))
+        # the REI buses keep their own injections
+        I_b[[k for k, i in enumerate(boundary) if i in rei]] += I_aug[rei]
+
+    net = deepcopy(self)
+    net.a_bus_dict = {keys[i]: net.a_bus_dict[keys[i]] for i in kept}
+    # the kept ends of the tie branches stay in the self-admittances
+    for br in net.a_branch:
+        if (br.bus1 in study) != (br.bus2 in study):
+            end = 0 if br.bus1 in study else 1
+            bus = net.a_bus_dict[(br.bus1, br.bus2)[end]]
+            bus.set_shunt(bus.shunt + br.get_admittance_matrix()[end, end])
+    net.a_branch = [br for br in net.a_branch if br.bus1 in study and br.bus2 in study]
+
+    def keep(ctrl) -> bool:
+        return set([*ctrl.index_input, *ctrl.index_observe]) <= study
+
+    net.a_controller_local = [c for c in net.a_controller_local if keep(c)]
+    net.a_controller_global = [c for c in net.a_controller_global if keep(c)]
+
+    # buses of the equivalent and their base-case voltages
+    key_of: Dict[int, Hashable] = {i: keys[i] for i in kept}
+    V_new: Dict[Hashable, complex] = {keys[i]: V[i] for i in kept}
+    injections: List[Hashable] = []
+    for i in rei:
+        bus = net.add_bus(BusPQ(0, 0, 0))
+        bus.set_component(LoadCurrent())
+        key_of[i] = bus.index
+        V_new[bus.index] = V_aug[i]
+        injections.append(bus.index)
+
+    scale = np.abs(dY).max(initial=0)
+    shunt = np.diag(dY).copy()
+    for a in range(len(boundary)):
+        for b in range(a + 1, len(boundary)):
+            if max(abs(dY[a, b]), abs(dY[b, a])) <= tol * scale:
+                continue
+            net.add_branch(BranchAdmittance(
+                key_of[boundary[a]], key_of[boundary[b]],  # type: ignore
+                [[-dY[a, b], dY[a, b]], [dY[b, a], -dY[b, a]]]))
+            shunt[a] += dY[a, b]
+            shunt[b] += dY[b, a]
+
+    z = 1j * x_link
+    for k, i in enumerate(boundary):
+        bus = net.a_bus_dict[key_of[i]]
+        bus.set_shunt(bus.shunt + shunt[k])
+        if i in rei or abs(I_b[k]) <= tol * np.abs(I).max():
+            continue
+        if isinstance(bus, BusPQ) and type(bus.component) is ComponentEmpty:
+            bus.set_component(LoadCurrent())
+            injections.append(bus.index)
+            continue
+        # the link carries the injected current
+        aux = net.add_bus(BusPQ(0, 0, 0))
+        aux.set_component(LoadCurrent())
+        a = V[i] / (V[i] + z * I_b[k])
+        net.add_branch(BranchPiTransformer(aux.index, bus.index, z, 0, abs(a), float(np.angle(a))))  # type: ignore
+        V_new[aux.index] = V[i]
+        injections.append(aux.index)
+
+    if not any(isinstance(b, BusSlack) for b in net.a_bus):
+        candidates = [b.index for b in net.a_bus if isinstance(b, BusPV)]
+        if not candidates and injections:
+            I_eq = net.get_admittance_matrix_sparse() @ np.array([V_new[k] for k in net.bus_index_map])
+            position = {key: p for p, key in enumerate(net.a_bus_dict)}
+            candidates = [max(injections, key=lambda key: abs(V_new[key] * I_eq[position[key]]))]
+        if not candidates:
+            raise ValueError('No bus of the equivalent can be the slack bus.')
+        Vs = V_new[candidates[0]]
+        _replace_bus(net, candidates[0], BusSlack(abs(Vs), float(np.angle(Vs)), 0))
+
+    net.clear_cache()
+    V_eq = np.array([V_new[key] for key in net.bus_index_map], dtype=complex)
+    I_eq: ComplexArray = net.admittance_matrix_sparse @ V_eq
+    for key, i in net.bus_index_map.items():
+        bus = net.a_bus_dict[key]
+        if isinstance(bus, BusPQ) and key in injections:
+            S = V_eq[i] * np.conj(I_eq[i])
+            bus.P, bus.Q = S.real, S.imag
+    net.set_equilibrium(V_eq.reshape((-1, 1)), I_eq.reshape((-1, 1)))
+
+    if check_stability and len(get_unstable_eigenvalues(net)):
+        raise RuntimeError(
+            'The linearized equivalent is unstable; '
+            'use check_stability=False if the network itself is.')
+    return net
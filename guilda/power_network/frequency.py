@@ -0,0 +1,100 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.sparse.linalg import splu
+
+from guilda.power_network.base import _PowerNetwork
+from guilda.power_network.response import get_input_ports
+from guilda.utils.typing import ComplexArray, FloatArray
+
+
+@dataclass
+class FrequencyResponse:
+    '''
+    Transfer functions of the linearized network (see `get_sys`) from its
+    input ports to selected outputs, on a grid of angular frequencies.
+    '''
+
+    omega: FloatArray  # (n_freq, )
+    response: ComplexArray  # (n_freq, n_outputs, n_inputs)
+
+    # (bus index, port) of each input, and rows of the output of `get_sys`
+    inputs: List[Tuple[Hashable, int]]
+    outputs: List[int]
+
+    @property
+    def frequency(self) -> FloatArray:
+        '''Frequencies in Hz.'''
+        return self.omega / (2 * np.pi)
+
+    @property
+    def magnitude(self) -> FloatArray:
+        return np.abs(self.response)
+
+    @property
+    def phase(self) -> FloatArray:
+        '''Unwrapped phases in radians.'''
+        return np.unwrap(np.angle(self.response), axis=0)
+
+
+def get_frequency_response(
+    self: _PowerNetwork,
+    omega: Iterable[float],
+    inputs: Optional[Iterable[Hashable]] = None,
+    outputs: Optional[Sequence[int]] = None,
+    workers: Optional[int] = None,
+) -> FrequencyResponse:
+    '''
+    Evaluates `C (jw E - A)^-1 B` of the sparse descriptor form of the
+    linearized network at each frequency.
+
+    Each frequency takes one sparse factorization, solved against the
+    selected inputs or, if there are fewer outputs than inputs, against the
+    selected outputs through the adjoint. The frequencies are split among
+    a pool of threads.
+
+    Args:
+        omega (Iterable[float]): angular frequencies in rad/s.
+        inputs (Optional[Iterable[Hashable]]): buses whose input ports are
+          included, defaults to all buses with inputs.
+        outputs (Optional[Sequence[int]]): rows of the output `[x, z, V, I]`
+          of `get_sys`, defaults to all.
+        workers (Optional[int]): number of threads, defaults to the number of CPUs.
+
+    Returns:
+        FrequencyResponse: the responses at each frequency.
+    '''
+    omega = np.asarray(list(omega), dtype=float)
+    E, A, B, C, _ = self.get_sys(descriptor=True)
+
+    ports, cols = get_input_ports(self, inputs)
+    rows = list(range(C.shape[0])) if outputs is None else list(outputs)
+    B = B[:, cols].toarray()
+    C = C[rows]
+    adjoint = len(rows) < len(cols)
+    CH = C.conj().T.toarray()
+
+    E = E.tocsc()
+    A = A.tocsc()
+
+    def solve(w: float) -> ComplexArray:
+        lu = splu((1j * w * E - A).tocsc())
+        if adjoint:
+            return lu.solve(CH.astype(complex), trans='H').conj().T @ B
+        return C @ lu.solve(B.astype(complex))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(omega)))
+
+    if workers == 1:
+        H = [solve(w) for w in omega]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            H = list(executor.map(solve, omega))
+
+    response = np.array(H, dtype=complex).reshape((len(omega), len(rows), len(cols)))
+    return FrequencyResponse(omega=omega, response=response, inputs=ports, outputs=rows)
@@ -0,0 +1,175 @@
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Tuple
+
+import numpy as np
+from scipy.sparse.linalg import LinearOperator, eigs, splu
+
+from guilda.power_network.base import _PowerNetwork
+from guilda.utils.typing import ComplexArray, FloatArray
+
+
+@dataclass
+class ModalAnalysis:
+    '''
+    Oscillatory modes of the linearized network (see `get_sys`), sorted by
+    frequency.
+
+    The mode shapes are the state parts of the right eigenvectors, scaled
+    so that their largest entry is 1. The participation factors are the
+    magnitudes of the products of the right and left eigenvectors on each
+    state, normalized to sum to 1 for each mode.
+    '''
+
+    eigenvalues: ComplexArray  # (n_modes, )
+    shapes: ComplexArray  # (nx, n_modes)
+    participation: FloatArray  # (nx, n_modes)
+
+    # (bus index, state name) of each state
+    states: List[Tuple[Hashable, str]]
+
+    @property
+    def frequency(self) -> FloatArray:
+        '''Frequencies in Hz.'''
+        return self.eigenvalues.imag / (2 * np.pi)
+
+    @property
+    def damping(self) -> FloatArray:
+        '''Damping ratios.'''
+        return -self.eigenvalues.real / np.abs(self.eigenvalues)
+
+    def get_participation(self, mode: int) -> Dict[Tuple[Hashable, str], float]:
+        '''
+        Participation factors of a mode by (bus index, state name).
+        '''
+        return {s: float(p) for s, p in zip(self.states, self.participation[:, mode])}
+
+    def get_bus_participation(self) -> Dict[Hashable, FloatArray]:
+        '''
+        Participation factors of all modes summed over the states of each bus.
+        '''
+        ret: Dict[Hashable, FloatArray] = {}
+        for (index, _), p in zip(self.states, self.participation):
+            ret[index] = ret.get(index, 0) + p
+        return ret
+
+
+def _get_state_names(self: _PowerNetwork) -> List[Tuple[Hashable, str]]:
+    states: List[Tuple[Hashable, str]] = []
+    for index in self.bus_index_map:
+        c = self.a_bus_dict[index].component
+        names = c.get_x_name() if hasattr(c, 'get_x_name') else []
+        if len(names) != c.nx:
+            names = [f'x{k + 1}' for k in range(c.nx)]
+        states += [(index, name) for name in names]
+    return states
+
+
+def _get_left_vector(A, E, lam: complex, v: ComplexArray) -> ComplexArray:
+    # inverse iteration on the adjoint pencil, slightly off the eigenvalue
+    lu = splu((A - (lam + 1e-8 * max(1, abs(lam))) * E).tocsc())
+    EH = E.conj().T.tocsc()
+    w = v
+    for _ in range(3):
+        w = lu.solve(EH @ w, trans='H')
+        w = w / np.linalg.norm(w)
+    return w
+
+
+def get_modes(
+    self: _PowerNetwork,
+    f_min: float = 0.1,
+    f_max: float = 2.0,
+    n_shifts: int = 4,
+    k: int = 6,
+    tol: float = 0,
+    sigma_min: float = -10.0,
+) -> ModalAnalysis:
+    '''
+    Finds the oscillatory modes in a frequency band by shift-invert Arnoldi
+    iterations on the sparse descriptor form of the linearized network.
+
+    The shifts are spread over the band on the imaginary axis, and around
+    each of them the number of eigenvalues sought is doubled until all
+    those within the reach of its sub-band are found: every mode of the
+    band with a real part between `sigma_min` and `-sigma_min` is found.
+    For each shift, the pencil `A - s E` is factorized once and the
+    factorization serves both the right eigenvectors and, through its
+    adjoint, the left ones used by the participation factors. A left
+    eigenvector whose eigenvalue does not match is found by inverse
+    iteration at the eigenvalue instead.
+
+    Args:
+        f_min (float): lower end of the band in Hz.
+        f_max (float): upper end of the band in Hz.
+        n_shifts (int): number of shifts in the band.
+        k (int): initial number of eigenvalues sought around each shift.
+        tol (float): relative accuracy of the eigenvalues, 0 for machine precision.
+        sigma_min (float): the most negative real part of the modes sought.
+
+    Returns:
+        ModalAnalysis: the modes with a frequency in `[f_min, f_max]` and
+          a real part of at least `sigma_min`.
+    '''
+    E, A, _, _, _ = self.get_sys(descriptor=True)
+    n = A.shape[0]
+    nx = int(E.diagonal().sum())
+    E = E.astype(complex).tocsc()
+    EH = E.conj().T.tocsc()
+    k = min(k, n - 2)
+
+    lams: List[complex] = []
+    right: List[ComplexArray] = []
+    left: List[ComplexArray] = []
+
+    # shifts at the centers of equal sub-bands, each reaching the corners
+    # of its part of the band
+    half = np.pi * (f_max - f_min) / n_shifts
+    radius = np.hypot(half, sigma_min)
+    for f in f_min + (f_max - f_min) * (np.arange(n_shifts) + 0.5) / n_shifts:
+        s = 2j * np.pi * f
+        lu = splu((A - s * E).tocsc())
+
+        op = LinearOperator((n, n), matvec=lambda v: lu.solve(E @ v), dtype=complex)
+        op_H = LinearOperator((n, n), matvec=lambda v: lu.solve(EH @ v, trans='H'), dtype=complex)
+        # more eigenvalues until all within the radius of the shift are found
+        k_s = k
+        while True:
+            mu, V = eigs(op, k=k_s, which='LM', tol=tol)
+            if k_s >= n - 2 or np.min(np.abs(mu)) * radius <= 1:
+                break
+            k_s = min(2 * k_s, n - 2)
+        nu, W = eigs(op_H, k=k_s, which='LM', tol=tol)
+
+        for i in range(len(mu)):
+            if mu[i] == 0:
+                continue
+            lam = s + 1 / mu[i]
+            if not f_min <= lam.imag / (2 * np.pi) <= f_max or lam.real < sigma_min:
+                continue
+            if any(abs(lam - l) <= 1e-6 * max(1, abs(lam)) for l in lams):
+                continue
+            # the adjoint operator has the conjugate eigenvalues
+            j = int(np.argmin(np.abs(np.conj(nu) - mu[i])))
+            if abs(np.conj(nu[j]) - mu[i]) <= 1e-6 * abs(mu[i]):
+                w = W[:, j]
+            else:
+                w = _get_left_vector(A, E, lam, V[:, i])
+            lams.append(lam)
+            right.append(V[:nx, i])
+            left.append(w[:nx])
+
+    order = np.argsort([l.imag for l in lams])
+    eigenvalues = np.array(lams, dtype=complex)[order]
+    Vx = np.array(right, dtype=complex).reshape((-1, nx)).T[:, order]
+    Wx = np.array(left, dtype=complex).reshape((-1, nx)).T[:, order]
+
+    shapes = Vx / Vx[np.argmax(np.abs(Vx), axis=0), np.arange(Vx.shape[1])]
+    P = np.abs(Wx.conj() * Vx)
+    participation = P / np.maximum(P.sum(axis=0), np.finfo(float).tiny)
+
+    return ModalAnalysis(
+        eigenvalues=eigenvalues,
+        shapes=shapes,
+        participation=participation,
+        states=_get_state_names(self),
+    )
@@ -0,0 +1,159 @@
+import io
+import os
+import pickle
+from contextlib import redirect_stderr
+from dataclasses import replace
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Optional, Iterable, List, Tuple
+
+import numpy as np
+
+from guilda.power_network.base import _PowerNetwork
+from guilda.power_network.simulate import simulate
+from guilda.power_network.types import SimulationOptions, SimulationScenario, SimulationResult
+from guilda.utils.typing import FloatArray
+
+# (shared memory name, [(shape, dtype, offset)])
+ArrayLayout = Tuple[str, List[Tuple[Tuple[int, ...], str, int]]]
+
+_worker_net: Optional[_PowerNetwork] = None
+
+
+def _init_worker(name: str, size: int):
+    global _worker_net
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        _worker_net = pickle.loads(shm.buf[:size])
+    finally:
+        shm.close()
+
+
+def _get_arrays(r: SimulationResult) -> List[FloatArray]:
+    arrays = [r._t, r._x]
+    for p in r.parts:
+        arrays += [p.V, p.I]
+    return [np.asarray(a) for a in arrays]
+
+
+def _set_arrays(r: SimulationResult, arrays: List[FloatArray]):
+    it = iter(arrays)
+    r._t = next(it)
+    r._x = next(it)
+    for p in r.parts:
+        p.V, p.I = next(it), next(it)
+
+
+def _to_shared_memory(arrays: List[FloatArray]) -> ArrayLayout:
+    layout: List[Tuple[Tuple[int, ...], str, int]] = []
+    size = 0
+    for a in arrays:
+        layout.append((a.shape, a.dtype.str, size))
+        size += -(-a.nbytes // 8) * 8  # 8-byte aligned
+
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for a, (shape, dtype, offset) in zip(arrays, layout):
+        np.ndarray(shape, dtype, buffer=shm.buf, offset=offset)[...] = a
+    shm.close()
+    # the receiving process owns and unlinks the block
+    return shm.name, layout
+
+
+def _from_shared_memory(data: ArrayLayout) -> List[FloatArray]:
+    name, layout = data
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        return [
+            np.ndarray(shape, dtype, buffer=shm.buf, offset=offset).copy()
+            for shape, dtype, offset in layout
+        ]
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _simulate_worker(scenario: SimulationScenario, options: SimulationOptions):
+    assert _worker_net is not None
+    with redirect_stderr(io.StringIO()):
+        r = simulate(_worker_net, scenario, options)
+
+    data = _to_shared_memory(_get_arrays(r))
+    # the arrays are put back by the caller, the rest comes pickled
+    _set_arrays(r, [np.zeros(0)] * len(data[1]))
+    return r, data
+
+
+def simulate_many(
+    self: _PowerNetwork,
+    scenarios: Iterable[SimulationScenario],
+    options: Optional[SimulationOptions] = None,
+    workers: Optional[int] = None,
+) -> List[SimulationResult]:
+    '''
+    Simulates several scenarios in parallel processes.
+
+    The network is pickled once into shared memory, which each worker
+    reads when it starts, and the result arrays are passed back through
+    shared memory. The metadata and segments of the results come from the
+    workers. Scenarios (including their input functions) must be picklable.
+
+    Args:
+        scenarios (Iterable[SimulationScenario]): the scenarios to simulate.
+        options (Optional[SimulationOptions]): options shared by all scenarios.
+          With `store_path`, the scenario at position `i` is stored under
+          the subdirectory `i` of it.
+        workers (Optional[int]): number of processes, defaults to the number of CPUs.
+          With 1 worker, the scenarios are simulated in this process.
+
+    Returns:
+        List[SimulationResult]: the results, in the order of `scenarios`.
+    '''
+    scenarios = list(scenarios)
+    if options is None:
+        options = SimulationOptions()
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(scenarios)))
+
+    # the scenarios must not stream to the same files
+    options_list = [options] * len(scenarios)
+    if options.store_path:
+        options_list = [
+            replace(options, store_path=os.path.join(options.store_path, str(i)))
+            for i in range(len(scenarios))
+        ]
+
+    if workers == 1:
+        return [simulate(self, s, o) for s, o in zip(scenarios, options_list)]
+
+    # created before the workers, so that they share the resource tracker of
+    # this process, which forgets their blocks as they are unlinked here
+    net_pickled = pickle.dumps(self)
+    net_shm = shared_memory.SharedMemory(create=True, size=max(len(net_pickled), 1))
+    net_shm.buf[:len(net_pickled)] = net_pickled
+
+    results: List[SimulationResult] = []
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(net_shm.name, len(net_pickled)),
+        ) as executor:
+            futures = [executor.submit(_simulate_worker, s, o) for s, o in zip(scenarios, options_list)]
+            try:
+                for future in futures:
+                    r, data = future.result()
+                    _set_arrays(r, _from_shared_memory(data))
+                    results.append(r)
+            except BaseException:
+                # release the blocks of the results not collected yet
+                for future in futures[len(results) + 1:]:
+                    future.cancel()
+                    if not future.cancelled() and future.exception() is None:
+                        _from_shared_memory(future.result()[1])
+                raise
+    finally:
+        net_shm.close()
+        net_shm.unlink()
+
+    return results
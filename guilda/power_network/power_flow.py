@@ -0,0 +1,275 @@
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+import scipy.sparse as sp
+from numpy.typing import NDArray
+from scipy.sparse.linalg import splu
+
+from guilda.base import uses_method
+from guilda.bus import Bus, BusPQ, BusPV, BusSlack
+from guilda.utils.typing import ComplexArray, FloatArray
+
+IntArray = NDArray[np.int_]
+
+# a reused factorization is renewed when the mismatch shrinks less than this
+_CHORD_RATE = 0.2
+
+
+@dataclass
+class PowerFlowCase:
+    '''
+    Bus types and setpoints of a power flow, in the order of the buses.
+    Setpoints that do not apply to the type of a bus are 0.
+    '''
+
+    # positions of the buses of each type
+    slack: IntArray
+    pv: IntArray
+    pq: IntArray
+
+    P: FloatArray
+    Q: FloatArray
+    V_abs: FloatArray
+    V_angle: FloatArray
+
+    @property
+    def n(self) -> int:
+        return len(self.P)
+
+    def get_flat_start(self) -> ComplexArray:
+        '''
+        Voltages of the setpoints at slack buses, and otherwise at zero
+        angle, of the setpoint magnitudes at PV buses and of their mean with
+        the slack buses at PQ buses.
+        '''
+        regulated = np.concatenate([self.slack, self.pv])
+        V = np.full(self.n, self.V_abs[regulated].mean() if len(regulated) else 1, dtype=complex)
+        V[self.pv] = self.V_abs[self.pv]
+        V[self.slack] = self.V_abs[self.slack] * np.exp(1j * self.V_angle[self.slack])
+        return V
+
+    def get_constraint(self, V: ComplexArray, S: ComplexArray) -> FloatArray:
+        '''
+        Residuals of the constraints of all buses at voltages `V` and
+        injected powers `S`, two per bus as in `Bus.get_constraint`.
+        '''
+        out = np.zeros((self.n, 2))
+        out[:, 0] = S.real - self.P
+        out[self.pq, 1] = S.imag[self.pq] - self.Q[self.pq]
+        out[self.pv, 1] = np.abs(V[self.pv]) - self.V_abs[self.pv]
+        out[self.slack, 0] = np.abs(V[self.slack]) - self.V_abs[self.slack]
+        out[self.slack, 1] = np.angle(V[self.slack]) - self.V_angle[self.slack]
+        return out.ravel()
+
+
+def get_power_flow_case(buses: Iterable[Bus]) -> Optional[PowerFlowCase]:
+    '''
+    Collects the setpoints of `BusSlack`, `BusPV` and `BusPQ` buses, or
+    returns None if a bus has another type or its own constraint.
+    '''
+    types = {BusSlack: [], BusPV: [], BusPQ: []}
+    buses = list(buses)
+    n = len(buses)
+    P, Q, V_abs, V_angle = np.zeros(n), np.zeros(n), np.zeros(n), np.zeros(n)
+
+    for i, bus in enumerate(buses):
+        cls = next((c for c in types if isinstance(bus, c)), None)
+        if cls is None or not uses_method(bus, cls, 'get_constraint'):
+            return None
+        types[cls].append(i)
+        if isinstance(bus, BusSlack):
+            V_abs[i], V_angle[i] = bus.V_abs, bus.V_angle
+        elif isinstance(bus, BusPV):
+            P[i], V_abs[i] = bus.P, bus.V_abs
+        elif isinstance(bus, BusPQ):
+            P[i], Q[i] = bus.P, bus.Q
+
+    return PowerFlowCase(
+        slack=np.array(types[BusSlack], dtype=int),
+        pv=np.array(types[BusPV], dtype=int),
+        pq=np.array(types[BusPQ], dtype=int),
+        P=P, Q=Q, V_abs=V_abs, V_angle=V_angle,
+    )
+
+
+@dataclass
+class PowerFlowResult:
+    V: ComplexArray  # (n, )
+    I: ComplexArray  # (n, )
+
+    converged: bool
+    iterations: int
+    mismatch: float  # largest power mismatch
+
+
+class NewtonPowerFlow:
+    '''
+    Newton-Raphson power flow in polar coordinates.
+
+    The unknowns are the angles of the PV and PQ buses and the magnitudes
+    of the PQ buses. The Jacobian is assembled sparse from the analytic
+    derivatives of the injected powers and solved by sparse LU. Its
+    structure only depends on the admittance matrix and the bus types, so
+    the positions of its entries and the fill-reducing column ordering of
+    the first factorization are kept for all later ones.
+
+    With `reuse`, the last factorization is kept across iterations and
+    solves as long as the mismatch contracts fast enough; a step that does
+    not is redone with a new factorization.
+    '''
+
+    def __init__(self, Y: sp.spmatrix, case: PowerFlowCase):
+        self.Y = sp.csr_matrix(Y, dtype=complex)
+        self.case = case
+        self.pvpq = np.sort(np.concatenate([case.pv, case.pq]))
+        self.pq = np.sort(case.pq)
+
+        n = case.n
+        npvpq = len(self.pvpq)
+        self.n_unknown = npvpq + len(self.pq)
+
+        # entries of Y and the diagonal, each a derivative of S[r] by V[c]
+        Y_coo = self.Y.tocoo()
+        self.r = np.concatenate([Y_coo.row, np.arange(n)])
+        self.c = np.concatenate([Y_coo.col, np.arange(n)])
+        self.y = np.concatenate([Y_coo.data, np.zeros(n)])
+        self.nnz = Y_coo.nnz
+
+        # rows of P and Q, columns of angles and magnitudes
+        pos_a = np.full(n, -1)
+        pos_a[self.pvpq] = np.arange(npvpq)
+        pos_m = np.full(n, -1)
+        pos_m[self.pq] = npvpq + np.arange(len(self.pq))
+        self.blocks = []
+        J_rows, J_cols = [], []
+        for rows, cols in ((pos_a, pos_a), (pos_a, pos_m), (pos_m, pos_a), (pos_m, pos_m)):
+            mask = (rows[self.r] >= 0) & (cols[self.c] >= 0)
+            self.blocks.append(mask)
+            J_rows.append(rows[self.r[mask]])
+            J_cols.append(cols[self.c[mask]])
+        self.J_rows = np.concatenate(J_rows)
+        self.J_cols = np.concatenate(J_cols)
+
+        self.col_order: Optional[IntArray] = None
+        self.lu: Optional[Callable[[FloatArray], FloatArray]] = None
+        self.factorizations: int = 0
+
+    def update_admittance(self, dY: sp.spmatrix) -> None:
+        '''
+        Adds `dY` to the admittance matrix. Its entries must be within the
+        pattern of the admittance matrix.
+        '''
+        self.Y = sp.csr_matrix(self.Y + dY)
+        self.y[:self.nnz] = np.asarray(self.Y[self.r[:self.nnz], self.c[:self.nnz]]).ravel()
+        self.lu = None
+
+    def get_mismatch(self, V: ComplexArray, S_set: ComplexArray) -> FloatArray:
+        S = V * np.conj(self.Y @ V)
+        dS = S - S_set
+        return np.concatenate([dS.real[self.pvpq], dS.imag[self.pq]])
+
+    def get_jacobian(self, V: ComplexArray) -> sp.csc_matrix:
+        '''
+        Derivatives of the mismatch by the angles and magnitudes.
+        '''
+        r, c, y, nnz = self.r, self.c, self.y, self.nnz
+        I = self.Y @ V
+        Vn = V / np.abs(V)
+
+        dS_dVm = V[r] * np.conj(y * Vn[c])
+        dS_dVm[nnz:] += np.conj(I) * Vn
+        dS_dVa = -1j * V[r] * np.conj(y * V[c])
+        dS_dVa[nnz:] += 1j * V * np.conj(I)
+
+        a, b, c_, d = self.blocks
+        vals = np.concatenate([dS_dVa[a].real, dS_dVm[b].real, dS_dVa[c_].imag, dS_dVm[d].imag])
+        shape = (self.n_unknown, self.n_unknown)
+        return sp.csc_matrix((vals, (self.J_rows, self.J_cols)), shape=shape)
+
+    def factorize(self, J: sp.csc_matrix) -> Callable[[FloatArray], FloatArray]:
+        '''
+        Returns a solver of `J x = b`, reusing the column ordering of the
+        first factorization of the same size.
+        '''
+        if self.col_order is None or len(self.col_order) != J.shape[1]:
+            lu = splu(J)
+            self.col_order = np.argsort(lu.perm_c)
+            return lu.solve
+
+        order = self.col_order
+        lu = splu(J[:, order], permc_spec='NATURAL')
+
+        def solve(b: FloatArray) -> FloatArray:
+            x = np.empty_like(b)
+            x[order] = lu.solve(b)
+            return x
+        return solve
+
+    def solve(
+        self,
+        V0: Optional[ComplexArray] = None,
+        tol: float = 1e-10,
+        max_iter: int = 30,
+        case: Optional[PowerFlowCase] = None,
+        reuse: bool = False,
+    ) -> PowerFlowResult:
+        '''
+        Args:
+            V0 (Optional[ComplexArray]): initial voltages, defaults to a
+              flat start. The setpoints of PV and slack buses are imposed.
+            tol (float): the largest power mismatch.
+            max_iter (int): the maximum number of iterations.
+            case (Optional[PowerFlowCase]): setpoints on the same buses
+              and bus types, defaults to those of the solver.
+            reuse (bool): if True, starts from the last factorization and
+              only renews it when the convergence slows down.
+
+        Returns:
+            PowerFlowResult: the voltages and injected currents.
+        '''
+        case = self.case if case is None else case
+        if V0 is None:
+            V = case.get_flat_start()
+        else:
+            V = np.array(V0, dtype=complex).ravel()
+            V[case.pv] *= case.V_abs[case.pv] / np.abs(V[case.pv])
+            V[case.slack] = case.V_abs[case.slack] * np.exp(1j * case.V_angle[case.slack])
+
+        S_set = case.P + 1j * case.Q
+        Va = np.angle(V)
+        Vm = np.abs(V)
+        npvpq = len(self.pvpq)
+
+        iterations = 0
+        F = self.get_mismatch(V, S_set)
+        norm = np.abs(F).max(initial=0)
+        solve = self.lu if reuse else None
+        while norm > tol and iterations < max_iter:
+            stale = solve is not None
+            if not stale:
+                solve = self.factorize(self.get_jacobian(V))
+                self.factorizations += 1
+            dx = solve(-F)
+            Va_next, Vm_next = Va.copy(), Vm.copy()
+            Va_next[self.pvpq] += dx[:npvpq]
+            Vm_next[self.pq] += dx[npvpq:]
+            V_next = Vm_next * np.exp(1j * Va_next)
+            F_next = self.get_mismatch(V_next, S_set)
+            norm_next = np.abs(F_next).max(initial=0)
+            iterations += 1
+            if not reuse or norm_next > _CHORD_RATE * norm:
+                solve = None
+                # the step of a kept factorization is redone with a new one
+                if stale:
+                    continue
+            Va, Vm, V, F, norm = Va_next, Vm_next, V_next, F_next, norm_next
+        self.lu = solve
+
+        mismatch = float(np.abs(F).max(initial=0))
+        return PowerFlowResult(
+            V=V, I=self.Y @ V,
+            converged=mismatch <= tol,
+            iterations=iterations,
+            mismatch=mismatch,
+        )
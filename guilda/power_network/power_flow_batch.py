@@ -0,0 +1,88 @@
+from dataclasses import dataclass, replace
+from typing import Optional
+
+import numpy as np
+
+from guilda.power_network.base import _PowerNetwork
+from guilda.power_network.power_flow import NewtonPowerFlow, get_power_flow_case
+from guilda.utils.typing import ComplexArray, FloatArray
+
+
+@dataclass
+class PowerFlowBatch:
+    '''
+    Power flows of a series of snapshots, in the order of `bus_index_map`.
+    '''
+
+    V: ComplexArray  # (n_snapshots, n_bus)
+    I: ComplexArray  # (n_snapshots, n_bus)
+
+    converged: np.ndarray  # (n_snapshots, ), bool
+    iterations: np.ndarray  # (n_snapshots, ), int
+
+
+def calculate_power_flow_batch(
+    self: _PowerNetwork,
+    P: Optional[FloatArray] = None,
+    Q: Optional[FloatArray] = None,
+    V_abs: Optional[FloatArray] = None,
+    V0: Optional[ComplexArray] = None,
+    tol: float = 1e-10,
+    max_iter: int = 30,
+) -> PowerFlowBatch:
+    '''
+    Solves the power flow of many snapshots of the setpoints on the same
+    network by Newton-Raphson (see `NewtonPowerFlow`).
+
+    The snapshots share the admittance matrix, the structure of the
+    Jacobian and its column ordering. Each snapshot starts from the
+    solution of the previous converged one and from its last
+    factorization, which is only renewed when the convergence slows down.
+
+    Args:
+        P (Optional[FloatArray]): active powers of PV and PQ buses.
+        Q (Optional[FloatArray]): reactive powers of PQ buses.
+        V_abs (Optional[FloatArray]): voltage magnitudes of PV and slack buses.
+          The setpoints have shape (n_snapshots, n_bus) in the order of
+          `bus_index_map`; entries of other buses are ignored, and each
+          defaults to the setpoints of the buses.
+        V0 (Optional[ComplexArray]): initial voltages of the first
+          snapshot, defaults to a flat start.
+        tol (float): the largest power mismatch.
+        max_iter (int): the maximum number of iterations per snapshot.
+
+    Returns:
+        PowerFlowBatch: the voltages and injected currents of all snapshots.
+    '''
+    case = get_power_flow_case(self.a_bus)
+    if case is None:
+        raise ValueError('Batched power flows only apply to BusSlack, BusPV and BusPQ buses.')
+
+    setpoints = {'P': P, 'Q': Q, 'V_abs': V_abs}
+    given = [np.asarray(value, dtype=float) for value in setpoints.values() if value is not None]
+    n_snapshots = given[0].shape[0] if given else 1
+    if any(array.shape != (n_snapshots, case.n) for array in given):
+        raise ValueError(f'The setpoints must all have the shape (n_snapshots, {case.n}).')
+    arrays = {
+        name: np.broadcast_to(getattr(case, name), (n_snapshots, case.n)) if value is None
+        else np.asarray(value, dtype=float)
+        for name, value in setpoints.items()
+    }
+
+    solver = NewtonPowerFlow(self.admittance_matrix_sparse, case)
+    V = np.zeros((n_snapshots, case.n), dtype=complex)
+    converged = np.zeros(n_snapshots, dtype=bool)
+    iterations = np.zeros(n_snapshots, dtype=int)
+
+    V_start = V0
+    for k in range(n_snapshots):
+        snapshot = replace(case, **{name: array[k] for name, array in arrays.items()})
+        result = solver.solve(V_start, tol, max_iter, snapshot, reuse=True)
+        V[k] = result.V
+        converged[k] = result.converged
+        iterations[k] = result.iterations
+        if result.converged:
+            V_start = result.V
+
+    I = (solver.Y @ V.T).T
+    return PowerFlowBatch(V=V, I=I, converged=converged, iterations=iterations)
@@ -0,0 +1,251 @@
+import json
+import os
+import tempfile
+from copy import copy
+from dataclasses import dataclass, replace
+from typing import BinaryIO, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import scipy.sparse as sp
+
+from guilda.branch import BranchPiTransformer
+from guilda.power_network.base import _PowerNetwork
+from guilda.power_network.power_flow import NewtonPowerFlow, get_power_flow_case
+from guilda.power_network.types import BusEvent
+from guilda.utils.typing import ComplexArray, FloatArray
+
+
+@dataclass
+class SetpointChange(BusEvent):
+    '''
+    New setpoints of a bus from `time` on, replacing its profiles, such as
+    the active power ordered by an AGC to a PV bus.
+    '''
+
+    time: float = 0
+    P: Optional[float] = None
+    Q: Optional[float] = None
+    V_abs: Optional[float] = None
+
+
+@dataclass
+class TapChange:
+    '''
+    New ratio, and optionally phase, of the `BranchPiTransformer` at
+    position `branch` of `a_branch` from `time` on.
+    '''
+
+    branch: int = 0
+    time: float = 0
+    tap: float = 1
+    phase: Optional[float] = None
+
+
+QstsEvent = Union[SetpointChange, TapChange]
+
+
+@dataclass
+class QstsResult:
+    '''
+    Power flows of a quasi-steady-state time series, with the buses in
+    the order of `bus_index_map`. `path` is the directory of the run when
+    the results are on disk, see `QstsStore.load`.
+    '''
+
+    t: FloatArray  # (n_steps, )
+    V: ComplexArray  # (n_steps, n_bus)
+    I: ComplexArray  # (n_steps, n_bus)
+
+    converged: np.ndarray  # (n_steps, ), bool
+    iterations: np.ndarray  # (n_steps, ), int
+    factorizations: int
+    path: Optional[str] = None
+
+
+# dtypes of the fields of a step; V and I have one column per bus
+_QSTS_FIELDS = {
+    't': np.float64,
+    'V': np.complex128,
+    'I': np.complex128,
+    'converged': np.bool_,
+    'iterations': np.int64,
+}
+
+
+class QstsStore:
+    '''
+    Collects the results of a QSTS run in memory, or with `path` on disk,
+    one chunk of steps at a time.
+
+    On disk, each run is written to a new subdirectory of `path`, kept in
+    `self.path`, so the memory-mapped files of earlier results are never
+    overwritten. Each field is appended as raw rows to `<field>.bin` and
+    read back as a read-only memory-mapped array.
+    '''
+
+    def __init__(self, n_bus: int, path: Optional[str] = None):
+        self.n_bus = n_bus
+        self.n: int = 0
+        self.path = path
+        self.chunks: Dict[str, List[np.ndarray]] = {name: [] for name in _QSTS_FIELDS}
+        self.files: Dict[str, BinaryIO] = {}
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+            self.path = tempfile.mkdtemp(prefix='run-', dir=path)
+            self.files = {name: open(os.path.join(self.path, f'{name}.bin'), 'wb') for name in _QSTS_FIELDS}
+
+    def append(self, **chunk: np.ndarray):
+        for name, dtype in _QSTS_FIELDS.items():
+            arr = np.ascontiguousarray(chunk[name], dtype=dtype)
+            if self.path is None:
+                self.chunks[name].append(arr)
+            else:
+                arr.tofile(self.files[name])
+        self.n += len(chunk['t'])
+
+    def close(self, factorizations: int) -> QstsResult:
+        if self.path is None:
+            arrays = {name: np.concatenate(chunks) for name, chunks in self.chunks.items()}
+            return QstsResult(**arrays, factorizations=factorizations)  # type: ignore
+
+        for f in self.files.values():
+            f.close()
+        with open(os.path.join(self.path, 'qsts.json'), 'w', encoding='utf-8') as f:
+            json.dump({'n': self.n, 'n_bus': self.n_bus, 'factorizations': factorizations}, f)
+        return QstsStore.load(self.path)
+
+    @staticmethod
+    def load(path: str) -> QstsResult:
+        '''
+        Opens the results of a finished run as memory-mapped arrays.
+        '''
+        with open(os.path.join(path, 'qsts.json'), 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        n, n_bus = info['n'], info['n_bus']
+
+        arrays = {}
+        for name, dtype in _QSTS_FIELDS.items():
+            shape = (n, n_bus) if name in ('V', 'I') else (n, )
+            if n == 0:
+                arrays[name] = np.zeros(shape, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(os.path.join(path, f'{name}.bin'), dtype=dtype, mode='r', shape=shape)
+        return QstsResult(**arrays, factorizations=info['factorizations'], path=path)
+
+
+def simulate_qsts(
+    self: _PowerNetwork,
+    t: Iterable[float],
+    P: Optional[FloatArray] = None,
+    Q: Optional[FloatArray] = None,
+    V_abs: Optional[FloatArray] = None,
+    events: Iterable[QstsEvent] = (),
+    path: Optional[str] = None,
+    chunk_size: int = 1440,
+    V0: Optional[ComplexArray] = None,
+    tol: float = 1e-8,
+    max_iter: int = 30,
+) -> QstsResult:
+    '''
+    Quasi-steady-state time series: a power flow at each time step.
+
+    Each step starts from the solution of the previous converged one and
+    from the last factorization of the Jacobian, which is only renewed
+    when the convergence slows down (see `NewtonPowerFlow`). Events are
+    applied before the first step at or after their time: a setpoint
+    change overrides the profiles of its bus, and a tap change updates the
+    admittance matrix in place. The network itself is not modified.
+
+    Args:
+        t (Iterable[float]): times of the steps.
+        P (Optional[FloatArray]): active powers of PV and PQ buses.
+        Q (Optional[FloatArray]): reactive powers of PQ buses.
+        V_abs (Optional[FloatArray]): voltage magnitudes of PV and slack buses.
+          The profiles have shape (n_steps, n_bus) in the order of
+          `bus_index_map` and may be memory-mapped; entries of other buses
+          are ignored, and each defaults to the setpoints of the buses.
+        events (Iterable[QstsEvent]): setpoint and tap changes.
+        path (Optional[str]): directory under which the results of the run
+          are written to a new subdirectory, keeps them in memory if None.
+        chunk_size (int): the number of steps written at once.
+        V0 (Optional[ComplexArray]): initial voltages of the first step,
+          defaults to a flat start.
+        tol (float): the largest power mismatch.
+        max_iter (int): the maximum number of iterations per step.
+
+    Returns:
+        QstsResult: the voltages and injected currents at each step.
+    '''
+    case = get_power_flow_case(self.a_bus)
+    if case is None:
+        raise ValueError('QSTS only applies to BusSlack, BusPV and BusPQ buses.')
+
+    t = np.asarray(list(t), dtype=float)
+    n, n_steps = case.n, len(t)
+    profiles = {'P': P, 'Q': Q, 'V_abs': V_abs}
+    for name, profile in profiles.items():
+        if profile is not None and np.shape(profile) != (n_steps, n):
+            raise ValueError(f'The profile of {name} must have the shape ({n_steps}, {n}).')
+
+    # setpoints overriding the profiles, NaN where there is none
+    overrides = {name: np.full(n, np.nan) for name in profiles}
+    pending = sorted(events, key=lambda e: e.time)
+    transformers: Dict[int, BranchPiTransformer] = {}
+
+    solver = NewtonPowerFlow(self.admittance_matrix_sparse, case)
+    position = self.bus_index_map
+
+    def apply(event: QstsEvent):
+        if isinstance(event, SetpointChange):
+            for name in profiles:
+                value = getattr(event, name)
+                if value is not None:
+                    overrides[name][position[event.index]] = value
+            return
+
+        if event.branch not in transformers:
+            br = self.a_branch[event.branch]
+            if not isinstance(br, BranchPiTransformer):
+                raise TypeError(f'The branch at position {event.branch} is not a BranchPiTransformer.')
+            transformers[event.branch] = copy(br)
+        br = transformers[event.branch]
+        Y_old = br.get_admittance_matrix()
+        br.tap = event.tap
+        if event.phase is not None:
+            br.phase = event.phase
+        dY = br.get_admittance_matrix() - Y_old
+        ends = [position[br.bus1], position[br.bus2]]
+        rows, cols = np.repeat(ends, 2), np.tile(ends, 2)
+        solver.update_admittance(sp.coo_matrix((dY.ravel(), (rows, cols)), shape=(n, n)))
+
+    def get_setpoint(name: str, k: int) -> FloatArray:
+        profile = profiles[name]
+        value = getattr(case, name) if profile is None else np.asarray(profile[k], dtype=float)
+        return np.where(np.isnan(overrides[name]), value, overrides[name])
+
+    store = QstsStore(n, path)
+    V_start = V0
+    for start in range(0, n_steps, chunk_size):
+        stop = min(start + chunk_size, n_steps)
+        m = stop - start
+        V = np.zeros((m, n), dtype=complex)
+        I = np.zeros((m, n), dtype=complex)
+        converged = np.zeros(m, dtype=bool)
+        iterations = np.zeros(m, dtype=int)
+
+        for k in range(start, stop):
+            while pending and pending[0].time <= t[k]:
+                apply(pending.pop(0))
+            snapshot = replace(case, **{name: get_setpoint(name, k) for name in profiles})
+            result = solver.solve(V_start, tol, max_iter, snapshot, reuse=True)
+            # with the admittance of this step, before any later tap change
+            V[k - start] = result.V
+            I[k - start] = result.I
+            converged[k - start] = result.converged
+            iterations[k - start] = result.iterations
+            if result.converged:
+                V_start = result.V
+
+        store.append(t=t[start:stop], V=V, I=I, converged=converged, iterations=iterations)
+
+    return store.close(solver.factorizations)
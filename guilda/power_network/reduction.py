@@ -0,0 +1,437 @@
+import warnings
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Iterable, List, Literal, Optional, Sequence, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.linalg import qr, svd
+from scipy.sparse.linalg import LinearOperator, eigs, splu
+
+from guilda.power_network.base import _PowerNetwork
+from guilda.power_network.frequency import get_frequency_response
+from guilda.power_network.linear import FirstOrderHold
+from guilda.power_network.response import get_input_ports, sample_inputs
+from guilda.power_network.types import BusInput
+from guilda.utils.typing import ComplexArray, FloatArray
+
+# real shift right of the slow modes for the shift-invert iterations, as
+# `A` itself is nearly singular with the common rotor angle mode
+_SIGMA = 1.0
+
+
+@dataclass
+class ReducedModel:
+    '''
+    Reduced-order state-space model `dxr = A xr + B u`, `y = C xr + D u` of
+    the linearized network (see `get_sys`), with `x ~ V xr` and
+    `xr = W^T x`. All quantities are deviations from the equilibrium.
+
+    `error_bound` bounds the H-infinity norm of the error of a balanced
+    truncation. `error_estimate` is the largest error over the frequency
+    grid used for the reduction, for either method.
+    '''
+
+    A: FloatArray
+    B: FloatArray
+    C: FloatArray
+    D: FloatArray
+
+    V: FloatArray  # (nx, order)
+    W: FloatArray  # (nx, order)
+
+    hankel: Optional[FloatArray]  # Hankel singular values of the stable part
+    error_bound: Optional[float]
+    error_estimate: float
+
+    # (bus index, port) of each input, and rows of the output of `get_sys`
+    inputs: List[Tuple[Hashable, int]]
+    outputs: List[int]
+
+    _holds: Dict[float, FirstOrderHold] = field(default_factory=dict, repr=False)
+
+    @property
+    def order(self) -> int:
+        return self.A.shape[0]
+
+    def evaluate(self, omega: Iterable[float]) -> ComplexArray:
+        '''
+        Transfer functions at angular frequencies `omega`, in the layout of
+        `FrequencyResponse.response`.
+        '''
+        I = np.eye(self.order)
+        return np.array([
+            self.C @ np.linalg.solve(1j * w * I - self.A, self.B) + self.D
+            for w in omega
+        ], dtype=complex).reshape((-1, self.C.shape[0], self.B.shape[1]))
+
+    def simulate(
+        self,
+        inputs: Iterable[BusInput],
+        t_end: float,
+        dt: float,
+        tstart: float = 0,
+        x0: Optional[FloatArray] = None,
+    ) -> Tuple[FloatArray, FloatArray]:
+        '''
+        Simulates the reduced model over `[tstart, t_end]` with the exact
+        propagation of the linear simulation, the bus inputs being sampled
+        every `dt` and held in between.
+
+        Args:
+            inputs (Iterable[BusInput]): the inputs.
+            t_end (float): the end time.
+            dt (float): the sampling interval.
+            tstart (float): the start time.
+            x0 (Optional[FloatArray]): the initial deviation of the full
+              state, defaults to zero.
+
+        Returns:
+            Tuple[FloatArray, FloatArray]: the times and the outputs, one row each.
+        '''
+        n = int(np.floor((t_end - tstart) / dt + 1e-9)) + 1
+        t = tstart + np.arange(n) * dt
+        u = sample_inputs(self.inputs, inputs, t)
+
+        if dt not in self._holds:
+            self._holds[dt] = FirstOrderHold(self.A)
+        xr0 = np.zeros(self.order) if x0 is None else self.W.T @ np.ravel(x0)
+        W = u @ self.B.T
+        X = self._holds[dt].propagate(xr0, t, W, np.zeros_like(W), dt)
+        return t, X @ self.C.T + u @ self.D.T
+
+
+class _StateOperators:
+    '''
+    Operators of the state-space form `dx = A x + B u`, `y = C x + D u` of
+    a descriptor model with `E = diag(I, 0)`, applied through sparse
+    factorizations without forming `A`.
+
+    Since `A + p I` is the Schur complement of the shifted descriptor
+    matrix, solves with it only take one sparse factorization per shift.
+    '''
+
+    def __init__(self, E: sp.spmatrix, A: sp.spmatrix, B: FloatArray, C: sp.spmatrix):
+        nx = int(E.diagonal().sum())
+        A = sp.csc_matrix(A)
+        C = sp.csr_matrix(C)
+        self.nx = nx
+        self.Ad = A
+        self.Ex = sp.block_diag([sp.identity(nx), sp.csc_matrix((A.shape[0] - nx,) * 2)], format='csc')
+
+        self.A11 = A[:nx, :nx]
+        self.A12 = A[:nx, nx:]
+        self.A21 = A[nx:, :nx]
+        self.lu22 = splu(A[nx:, nx:].tocsc())
+
+        # eliminate the algebraic variables from the inputs and the outputs
+        KB = self.lu22.solve(B[nx:])
+        KC = self.lu22.solve(C[:, nx:].T.toarray(), trans='T')
+        self.B: FloatArray = B[:nx] - self.A12 @ KB
+        self.C: FloatArray = C[:, :nx].toarray() - (self.A21.T @ KC).T
+        self.D: FloatArray = -(C[:, nx:] @ KB)
+
+        self._lu: Dict[complex, object] = {}
+
+    def matvec(self, X: FloatArray) -> FloatArray:
+        return self.A11 @ X - self.A12 @ self.lu22.solve(np.asarray(self.A21 @ X))
+
+    def solve(self, p: complex, X: ComplexArray, trans: bool = False) -> ComplexArray:
+        '''
+        Returns `(A + p I)^-1 X`, or `(A^T + p I)^-1 X`.
+        '''
+        if p not in self._lu:
+            self._lu[p] = splu((self.Ad + p * self.Ex).tocsc())
+        lu = self._lu[p]
+        X = np.asarray(X)
+        rhs = np.zeros((self.Ad.shape[0], X.shape[1]), dtype=np.result_type(X, p))
+        rhs[:self.nx] = X
+        t = 'T' if trans else 'N'
+        if np.iscomplexobj(rhs) and not np.iscomplexobj(p):
+            # a real factorization solves the real and imaginary parts apart
+            return (lu.solve(rhs.real.copy(), t) + 1j * lu.solve(rhs.imag.copy(), t))[:self.nx]
+        return lu.solve(rhs, t)[:self.nx]
+
+    def get_modes(self, k: int, sigma: float = _SIGMA) -> Tuple[ComplexArray, ComplexArray, ComplexArray]:
+        '''
+        Returns the `k` eigenvalues nearest to `sigma` with their right and
+        left eigenvectors, scaled so that `W^T V = I`.
+        '''
+        n = self.nx
+        k = min(k, n - 2)
+        op = LinearOperator((n, n), matvec=lambda v: self.solve(-sigma, v.reshape((-1, 1))).ravel(), dtype=float)
+        op_T = LinearOperator((n, n), matvec=lambda v: self.solve(-sigma, v.reshape((-1, 1)), True).ravel(), dtype=float)
+        mu, V = eigs(op, k=k, which='LM')
+        nu, W = eigs(op_T, k=k, which='LM')
+        # the transposed operator has the same eigenvalues
+        W = W[:, [int(np.argmin(np.abs(nu - m))) for m in mu]]
+        W = W / np.sum(W * V, axis=0)
+
+        lams = sigma + 1 / mu
+        real = np.abs(lams.imag) <= 1e-8 * np.abs(lams)
+        lams[real] = lams[real].real
+        # drop complex modes whose conjugate is beyond the `k` found
+        paired = np.array([
+            r or np.min(np.abs(lams - np.conj(lam))) <= 1e-8 * abs(lam)
+            for lam, r in zip(lams, real)
+        ], dtype=bool)
+        return lams[paired], V[:, paired], W[:, paired]
+
+
+def _real_basis(lams: ComplexArray, V: ComplexArray, W: ComplexArray) -> Tuple[FloatArray, FloatArray]:
+    '''
+    Real bases of the invariant subspaces of the modes, one column for each
+    real mode and two for each conjugate pair, scaled so that `W^T V = I`.
+    '''
+    cols_V: List[FloatArray] = []
+    cols_W: List[FloatArray] = []
+    for i, lam in enumerate(lams):
+        v, w = V[:, i], W[:, i]
+        if lam.imag == 0:
+            # eigenvectors of real modes up to a complex phase
+            v = v * np.exp(-1j * np.angle(v[np.argmax(np.abs(v))]))
+            w = w * np.exp(-1j * np.angle(w[np.argmax(np.abs(w))]))
+        elif lam.imag < 0:
+            continue
+        cols_V.append(v.real)
+        cols_W.append(w.real)
+        if lam.imag > 0:
+            cols_V.append(v.imag)
+            cols_W.append(w.imag)
+    n = V.shape[0]
+    Vr = np.array(cols_V).reshape((-1, n)).T
+    Wr = np.array(cols_W).reshape((-1, n)).T
+    if Vr.shape[1]:
+        Wr = Wr @ np.linalg.inv(Vr.T @ Wr)
+    return Vr, Wr
+
+
+def _get_shifts(ops: _StateOperators, n_shifts: int, margin: float) -> List[complex]:
+    '''
+    ADI shifts chosen by Penzl's heuristic among the Ritz values of `A` and
+    of `(A - sigma I)^-1`. Conjugate shifts are kept next to each other.
+    '''
+    n = ops.nx
+    k = min(2 * n_shifts, n - 2)
+    op = LinearOperator((n, n), matvec=lambda v: ops.matvec(v.reshape((-1, 1))).ravel(), dtype=float)
+    op_i = LinearOperator((n, n), matvec=lambda v: ops.solve(-_SIGMA, v.reshape((-1, 1))).ravel(), dtype=float)
+    ritz = np.concatenate([eigs(op, k=k, which='LM', return_eigenvectors=False),
+                           _SIGMA + 1 / eigs(op_i, k=k, which='LM', return_eigenvectors=False)])
+    ritz = ritz[ritz.real < -margin]
+    ritz = np.where(np.abs(ritz.imag) <= 1e-8 * np.abs(ritz), ritz.real, ritz)
+    ritz = np.unique(np.round(ritz, 12))
+
+    def cost(p: complex, t: ComplexArray) -> FloatArray:
+        return np.abs((p - t) / (p + t))
+
+    shifts: List[complex] = []
+    worst = np.ones(len(ritz))
+    candidates = list(ritz[ritz.imag >= 0])
+    while len(shifts) < n_shifts and candidates:
+        # add the candidate which most reduces the largest value of the
+        # ADI rational function over the Ritz values
+        def value(p: complex) -> float:
+            f = worst * cost(p, ritz)
+            return float(np.max(f * cost(np.conj(p), ritz) if p.imag != 0 else f))
+
+        best = min(candidates, key=value)
+        candidates.remove(best)
+        pair = [best, np.conj(best)] if best.imag != 0 else [best.real]
+        for p in pair:
+            worst = worst * cost(p, ritz)
+        shifts += pair
+    return shifts
+
+
+def _compress(Z: FloatArray, tol: float = 1e-12) -> FloatArray:
+    '''
+    Returns `Z2` with fewer columns and `Z2 Z2^T ~ Z Z^T`.
+    '''
+    if Z.shape[1] == 0:
+        return Z
+    Q, R = qr(Z, mode='economic')
+    U, s, _ = svd(R, full_matrices=False)
+    r = int(np.sum(s > tol * s[0])) if s[0] > 0 else 0
+    return Q @ (U[:, :r] * s[:r])
+
+
+def _lr_adi(
+    ops: _StateOperators,
+    B: FloatArray,
+    shifts: List[complex],
+    trans: bool,
+    tol: float,
+    max_iter: int,
+) -> FloatArray:
+    '''
+    Low-rank factor `Z` of the solution `Z Z^T` of `A X + X A^T + B B^T = 0`,
+    or of `A^T X + X A + B B^T = 0` if `trans`, by the low-rank ADI
+    iteration with residual factors.
+    '''
+    W = B.astype(complex)
+    norm_B = np.linalg.norm(B) ** 2
+    Z = np.zeros((B.shape[0], 0))
+    blocks: List[ComplexArray] = []
+    if norm_B == 0 or not shifts:
+        return Z
+
+    n = len(shifts)
+    for i in range(max_iter):
+        p = shifts[i % n]
+        V = ops.solve(p, W, trans)
+        W = W - 2 * p.real * V
+        blocks.append(np.sqrt(-2 * p.real) * V)
+
+        # the residual is real once a conjugate pair is complete
+        if p.imag > 0:
+            continue
+        if len(blocks) * B.shape[1] >= ops.nx:
+            Zc = np.hstack(blocks)
+            Z = _compress(np.hstack([Z, Zc.real, Zc.imag]))
+            blocks = []
+        if np.linalg.norm(W) ** 2 <= tol * norm_B:
+            break
+
+    if blocks:
+        Zc = np.hstack(blocks)
+        Z = _compress(np.hstack([Z, Zc.real, Zc.imag]))
+    return Z
+
+
+def get_reduced_model(
+    self: _PowerNetwork,
+    order: Optional[int] = None,
+    method: Literal['balanced', 'modal'] = 'balanced',
+    tol: float = 1e-4,
+    inputs: Optional[Iterable[Hashable]] = None,
+    outputs: Optional[Sequence[int]] = None,
+    omega: Optional[Iterable[float]] = None,
+    margin: float = 1e-6,
+    n_shifts: int = 10,
+    adi_tol: float = 1e-10,
+    max_iter: int = 200,
+) -> ReducedModel:
+    '''
+    Reduces the linearized network by balanced or modal truncation.
+
+    Modes with a real part above `-margin`, such as the common rotor angle
+    mode, are kept exactly and the rest of the model is reduced. Balanced
+    truncation uses low-rank factors of the Gramians from the low-rank ADI
+    iteration, whose solves are sparse factorizations of the shifted
+    descriptor form, so that no dense `nx`-by-`nx` matrix is formed. Modal
+    truncation keeps the most dominant of the modes nearest to the origin,
+    searching further out until the modes left are negligible.
+
+    Args:
+        order (Optional[int]): the order of the reduced model. If None, the
+          smallest order whose error bound is within `tol` is used.
+        method (Literal['balanced', 'modal']): the reduction method.
+        tol (float): the error tolerance when `order` is None, relative to
+          the largest Hankel singular value or modal dominance. A warning
+          is issued if the error estimate exceeds it.
+        inputs (Optional[Iterable[Hashable]]): buses whose input ports are
+          included, defaults to all buses with inputs.
+        outputs (Optional[Sequence[int]]): rows of the output `[x, z, V, I]`
+          of `get_sys`, defaults to all.
+        omega (Optional[Iterable[float]]): angular frequencies on which the
+          error is estimated, defaults to 100 points from 0.01 to 1000 rad/s.
+        margin (float): the stability margin of the reduced modes.
+        n_shifts (int): the number of ADI shifts.
+        adi_tol (float): the relative residual of the Gramians.
+        max_iter (int): the maximum number of ADI iterations.
+
+    Returns:
+        ReducedModel: the reduced model.
+    '''
+    E, A, B, C, _ = self.get_sys(descriptor=True)
+    ports, cols = get_input_ports(self, inputs)
+    rows = list(range(C.shape[0])) if outputs is None else list(outputs)
+    ops = _StateOperators(E, A, B[:, cols].toarray(), C[rows])
+
+    # modes kept exactly
+    lams, V0, W0 = ops.get_modes(6)
+    slow = lams.real >= -margin
+    Vu, Wu = _real_basis(lams[slow], V0[:, slow], W0[:, slow])
+
+    def project(X: FloatArray, trans: bool = False) -> FloatArray:
+        if trans:
+            return X - Wu @ (Vu.T @ X)
+        return X - Vu @ (Wu.T @ X)
+
+    hankel: Optional[FloatArray] = None
+    error_bound: Optional[float] = None
+
+    if method == 'balanced':
+        shifts = _get_shifts(ops, n_shifts, margin)
+        Zc = project(_lr_adi(ops, project(ops.B), shifts, False, adi_tol, max_iter))
+        Zo = project(_lr_adi(ops, project(ops.C.T, True), shifts, True, adi_tol, max_iter), True)
+        U, hankel, Vh = svd(Zo.T @ Zc, full_matrices=False)
+        if order is None:
+            tail = 2 * np.cumsum(hankel[::-1])[::-1]
+            r = int(np.sum(tail > tol * hankel.max(initial=0)))
+        else:
+            r = min(max(order - Vu.shape[1], 0), len(hankel))
+        error_bound = float(2 * np.sum(hankel[r:]))
+        scale = hankel.max(initial=0)
+        s = np.sqrt(hankel[:r])
+        Vs = project(Zc @ Vh[:r].T / s)
+        Ws = project(Zo @ U[:, :r] / s, True)
+
+    elif method == 'modal':
+        k = max(2 * (order or 0), 20)
+        while True:
+            lams, V0, W0 = ops.get_modes(k)
+            fast = ~(lams.real >= -margin)
+            lams, V0, W0 = lams[fast], V0[:, fast], W0[:, fast]
+            # dominance of each mode on the transfer function
+            dominance = np.array([
+                np.linalg.norm(np.outer(ops.C @ V0[:, i], W0[:, i] @ ops.B), 2) / abs(lam.real)
+                for i, lam in enumerate(lams)
+            ])
+            # the modes not found yet are farther from the shift than these;
+            # look further until the farthest half of the found modes is
+            # negligible
+            far = np.argsort(np.abs(lams - _SIGMA))[len(lams) // 2:]
+            if order is not None or k >= ops.nx - 2 or np.sum(dominance[far]) <= tol * dominance.max(initial=0):
+                break
+            k *= 2
+        keep: List[int] = []
+        n_kept = Vu.shape[1]
+        for i in np.argsort(-dominance):
+            if i in keep:
+                continue
+            if order is None and np.sum(np.delete(dominance, keep)) <= tol * dominance.max():
+                break
+            # keep the conjugate mode as well
+            mode = [i] if lams[i].imag == 0 else [i, int(np.argmin(np.abs(lams - np.conj(lams[i]))))]
+            if order is not None and n_kept + len(mode) > order:
+                continue
+            keep += mode
+            n_kept += len(mode)
+        Vs, Ws = _real_basis(lams[keep], V0[:, keep], W0[:, keep])
+        scale = dominance.max(initial=0)
+
+    else:
+        raise ValueError(f'Unknown reduction method: {method}')
+
+    V = np.hstack([Vu, Vs])
+    W = np.hstack([Wu, Ws])
+    Ar = W.T @ ops.matvec(V)
+    Br = W.T @ ops.B
+    Cr = ops.C @ V
+
+    if omega is None:
+        omega = np.logspace(-2, 3, 100)
+    omega = np.asarray(list(omega), dtype=float)
+    reduced = ReducedModel(
+        A=Ar, B=Br, C=Cr, D=np.asarray(ops.D),
+        V=V, W=W,
+        hankel=hankel, error_bound=error_bound, error_estimate=0,
+        inputs=ports, outputs=rows,
+    )
+    H = get_frequency_response(self, omega, inputs, outputs).response
+    errors = H - reduced.evaluate(omega)
+    reduced.error_estimate = float(max(np.linalg.norm(e, 2) for e in errors)) if len(omega) else 0
+    if order is None and reduced.error_estimate > tol * scale:
+        warnings.warn(f'The error estimate {reduced.error_estimate:.3g} of the reduced model '
+                      f'exceeds the tolerance {tol * scale:.3g}.')
+    return reduced
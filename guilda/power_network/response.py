@@ -0,0 +1,175 @@
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.fft import rfft, irfft, next_fast_len
+from scipy.linalg import expm
+
+from guilda.power_network.base import _PowerNetwork
+from guilda.power_network.types import BusInput
+from guilda.utils.typing import FloatArray
+
+
+@dataclass
+class ResponseLibrary:
+    '''
+    Sampled responses of the linearized network (see `get_sys`) from its
+    input ports to selected outputs, used to answer input profiles by
+    superposition instead of time integration.
+
+    `pulse[k]` is the output at `k * dt` for a unit input held over
+    `[0, dt)`, so that `pulse[0]` is the feedthrough. Inputs are held
+    constant between samples, which matches the default (zero order hold)
+    interpolation of `BusInput`. All quantities are deviations from the
+    equilibrium, and controllers are not included.
+    '''
+
+    dt: float
+    pulse: FloatArray  # (nt, n_outputs, n_inputs)
+
+    # (bus index, port) of each input, and rows of the output of `get_sys`
+    inputs: List[Tuple[Hashable, int]]
+    outputs: List[int]
+
+    _pulse_f: Dict[int, FloatArray] = field(default_factory=dict, repr=False)
+
+    @property
+    def nt(self) -> int:
+        return self.pulse.shape[0]
+
+    @property
+    def t(self) -> FloatArray:
+        return np.arange(self.nt) * self.dt
+
+    @property
+    def step(self) -> FloatArray:
+        '''
+        Step responses, in the same layout as `pulse`.
+        '''
+        return np.cumsum(self.pulse, axis=0)
+
+    def respond(self, u: FloatArray) -> FloatArray:
+        '''
+        Outputs for sampled inputs.
+
+        Args:
+            u (FloatArray): inputs of shape `(..., n, n_inputs)`, one row per
+              sample, with `n` at most `nt`. Leading axes are batches of
+              profiles.
+
+        Returns:
+            FloatArray: outputs of shape `(..., n, n_outputs)`.
+        '''
+        u = np.asarray(u, dtype=float)
+        n = u.shape[-2]
+        if n > self.nt:
+            raise ValueError(f'The inputs have {n} samples, but the library only covers {self.nt}.')
+        n_fft = next_fast_len(2 * n - 1, real=True)
+        if n_fft not in self._pulse_f:
+            self._pulse_f[n_fft] = rfft(self.pulse, n_fft, axis=0)
+        U = rfft(u, n_fft, axis=-2)
+        Y = np.einsum('fyu,...fu->...fy', self._pulse_f[n_fft], U)
+        return irfft(Y, n_fft, axis=-2)[..., :n, :]
+
+    def sample_inputs(self, inputs: Iterable[BusInput], n: Optional[int] = None, tstart: float = 0) -> FloatArray:
+        '''
+        Samples bus inputs at `tstart + k * dt` into the layout of `respond`.
+        As in a simulation, each input only acts between its first and last
+        time.
+        '''
+        n = self.nt if n is None else n
+        return sample_inputs(self.inputs, inputs, tstart + np.arange(n) * self.dt)
+
+    def respond_inputs(self, profiles: Iterable[Iterable[BusInput]], n: Optional[int] = None, tstart: float = 0) -> FloatArray:
+        '''
+        Outputs for several input profiles, each a list of bus inputs.
+        Returns an array of shape `(n_profiles, n, n_outputs)`.
+        '''
+        u = np.array([self.sample_inputs(p, n, tstart) for p in profiles])
+        return self.respond(u)
+
+
+def sample_inputs(ports: List[Tuple[Hashable, int]], inputs: Iterable[BusInput], t: FloatArray) -> FloatArray:
+    '''
+    Samples bus inputs at times `t` into one column per (bus index, port).
+    As in a simulation, each input only acts between its first and last
+    time.
+    '''
+    u = np.zeros((len(t), len(ports)))
+    for b in inputs:
+        cols = [k for k, (index, _) in enumerate(ports) if index == b.index]
+        if not cols:
+            raise KeyError(f'Bus {b.index} has no selected input.')
+        mask = (t >= b.time[0]) & (t < b.time[-1])
+        f = b.value if callable(b.value) else b.get_interp()
+        u[mask, cols[0]: cols[-1] + 1] += np.reshape([f(tk) for tk in t[mask]], (-1, len(cols)))
+    return u
+
+
+def get_input_ports(
+    self: _PowerNetwork,
+    inputs: Optional[Iterable[Hashable]] = None,
+) -> Tuple[List[Tuple[Hashable, int]], List[int]]:
+    '''
+    Returns the (bus index, port) of the input ports of the given buses, or
+    of all buses, and their columns in the inputs of `get_sys`.
+    '''
+    ports: List[Tuple[Hashable, int]] = []
+    cols: List[int] = []
+    buses = None if inputs is None else set(inputs)
+    k = 0
+    for index in self.bus_index_map:
+        for port in range(self.a_bus_dict[index].component.nu):
+            if buses is None or index in buses:
+                ports.append((index, port))
+                cols.append(k)
+            k += 1
+    return ports, cols
+
+
+def get_response_library(
+    self: _PowerNetwork,
+    t_end: float,
+    dt: float,
+    inputs: Optional[Iterable[Hashable]] = None,
+    outputs: Optional[Sequence[int]] = None,
+) -> ResponseLibrary:
+    '''
+    Computes the responses of the linearized network over `[0, t_end]`.
+
+    Args:
+        t_end (float): the time horizon.
+        dt (float): the sampling interval.
+        inputs (Optional[Iterable[Hashable]]): buses whose input ports are
+          included, defaults to all buses with inputs.
+        outputs (Optional[Sequence[int]]): rows of the output `[x, z, V, I]`
+          of `get_sys`, defaults to all.
+
+    Returns:
+        ResponseLibrary: the sampled pulse responses.
+    '''
+    A, B, C, D = self.get_sys()
+
+    ports, cols = get_input_ports(self, inputs)
+    rows = list(range(C.shape[0])) if outputs is None else list(outputs)
+    B = B[:, cols]
+    C = C[rows]
+    D = D[rows][:, cols]
+
+    # zero order hold discretization
+    nx, nu = B.shape
+    M = np.zeros((nx + nu, nx + nu))
+    M[:nx, :nx] = A
+    M[:nx, nx:] = B
+    E = expm(M * dt)
+    Ad, Bd = E[:nx, :nx], E[:nx, nx:]
+
+    nt = int(np.floor(t_end / dt + 1e-9)) + 1
+    pulse = np.zeros((nt, len(rows), nu))
+    pulse[0] = D
+    X = Bd
+    for i in range(1, nt):
+        pulse[i] = C @ X
+        X = Ad @ X
+
+    return ResponseLibrary(dt=dt, pulse=pulse, inputs=ports, outputs=rows)
@@ -5,7 +5,7 @@ import numpy as np
 
 from functools import reduce
 
-from typing import Set, Tuple, List, Callable, Iterable, Dict
+from typing import Set, Tuple, List, Callable, Iterable, Dict, Optional
 
 
 from guilda.power_network.base import _PowerNetwork
@@ -14,39 +14,32 @@ from guilda.power_network.types import BusConnect, BusEvent, BusFault, BusInput,
 
 from guilda.base import ComponentEmpty
 
-from guilda.utils.calc import complex_mat_to_float
+from guilda.utils.calc import complex_mat_to_float, reduce_admittance_matrix
 from guilda.utils.typing import ComplexArray, FloatArray
 
 
 
-def reduce_admittance_matrix(Y: ComplexArray, index: Iterable[int]) -> Tuple[
-    ComplexArray,
-    FloatArray,
-    ComplexArray,
-    FloatArray
-]:
-
-    n_bus = Y.shape[0]
-    reduced = np.array([i not in index for i in range(n_bus)])
-    n_reduced = np.logical_not(reduced)
-
-    Y11 = Y[n_reduced][:, n_reduced]
-    Y12 = Y[n_reduced][:, reduced]
-    Y21 = Y[reduced][:, n_reduced]
-    Y22 = Y[reduced][:, reduced]
-
-    Y_reduced = Y11 - Y12 @ np.linalg.inv(Y22) @ Y21
-    Y_mat_reduced = complex_mat_to_float(Y_reduced)
-
-    nr_n_reduced = int(np.sum(n_reduced))
-
-    A_reproduce: ComplexArray = np.zeros((n_bus, nr_n_reduced), dtype=complex)
-    A_reproduce[n_reduced] = np.eye(nr_n_reduced)
-    A_reproduce[reduced] = -np.linalg.inv(Y22) @ Y21
+def augment_2(input_lst: List[int]):
+    return reduce(
+        lambda x, y: [*x, *y], 
+        [[x * 2, x * 2 + 1] for x in input_lst],
+        []
+    )
 
-    A_mat_reproduce = complex_mat_to_float(A_reproduce)
 
-    return Y_reduced, Y_mat_reduced, A_reproduce, A_mat_reproduce
+def reproduce_VI(
+    segment: SimulationSegment,
+    meta: SimulationMetadata,
+    V_sim: FloatArray,
+    I_fault: FloatArray,
+) -> Tuple[FloatArray, FloatArray]:
+    '''
+    Voltages and currents of all buses from the raw rows of a segment.
+    '''
+    V = V_sim @ segment.admittance_reproduce.T
+    I = (meta.system_admittance_f @ V.T).T
+    I[:, augment_2(segment.buses_fault)] = I_fault
+    return V, I
 
 
 def parse_scenario(s: SimulationScenario, n: _PowerNetwork):
@@ -122,10 +115,13 @@ def parse_scenario(s: SimulationScenario, n: _PowerNetwork):
         if t_max <= t_min:
             raise RuntimeError('Invalid input time duration.')
 
+        timestamps.add(t_min)
+        timestamps.add(t_max)
         events[t_min].append((f, i, True))
         events[t_max].append((f, i, False))
 
     for i, c in enumerate(s.conn):
+        timestamps.add(c.time)
         events[c.time].append((c, i, not c.disconnect))
 
     timestamp_list = list(timestamps)
@@ -157,7 +153,7 @@ def parse_scenario(s: SimulationScenario, n: _PowerNetwork):
     nx_ctrl_global = [c.nx for c in ctrls_global]
     nx_ctrl = [c.nx for c in ctrls]
 
-    Y = n.get_admittance_matrix(bus_index_map)
+    Y = n.admittance_matrix_sparse
 
     meta = SimulationMetadata(
         buses=buses,
@@ -186,7 +182,20 @@ def gen_segments(
     important_timestamps: List[float],
     events: Dict[float, List[Tuple[BusEvent, int, bool]]],
 
+    reduce_admittance: Optional[Callable[[List[int]], Tuple[ComplexArray, FloatArray, ComplexArray, FloatArray]]] = None,
+
 ):
+    '''
+    Splits the simulation into segments between the timestamps.
+
+    `reduce_admittance` maps the simulated buses to the reduced matrices
+    (see `reduce_admittance_matrix`), e.g. `_PowerNetwork.get_reduced_admittance`
+    to share them between segments and runs.
+    '''
+
+    if reduce_admittance is None:
+        def reduce_admittance(index: List[int]):
+            return reduce_admittance_matrix(m.system_admittance, index)
 
     # :27
 
@@ -267,7 +276,7 @@ def gen_segments(
 
         # get reduced and reproduce admittance matrices
         _, admittance_reduced, __, admittance_reproduce \
-            = reduce_admittance_matrix(m.system_admittance, cur_sim_buses)
+            = reduce_admittance(cur_sim_buses)
 
         # create segment record
         segment = SimulationSegment(
@@ -1,6 +1,7 @@
 # pylint: disable=W0640
 
 from collections import defaultdict
+from dataclasses import replace
 import numpy as np
 
 from functools import reduce
@@ -12,10 +13,12 @@ from guilda.bus.bus import Bus
 from guilda.controller.controller import Controller
 
 from guilda.power_network.base import _PowerNetwork
-from guilda.power_network.segment import gen_segments, parse_scenario
+from guilda.power_network.segment import gen_segments, parse_scenario, augment_2, reproduce_VI
 
-from guilda.power_network.types import BusConnect, BusEvent, BusFault, BusInput, SimulationMetadata, SimulationOptions, SimulationResult, SimulationResultComponent, SimulationSegment, SimulationScenario
-from guilda.power_network.dae import get_dx_con
+from guilda.power_network.types import BusConnect, BusEvent, BusFault, BusInput, SimulationMetadata, SimulationOptions, SimulationResult, SimulationResultPart, SimulationSegment, SimulationScenario
+from guilda.power_network.dae import SegmentResidual
+from guilda.power_network.linear import LinearSegmentSolver
+from guilda.power_network.store import ResultBuffer, ResultStore
 
 from guilda.base import ComponentEmpty
 
@@ -29,124 +32,251 @@ from assimulo.solvers import IDA
 
 
 
-def augment_2(input_lst: List[int]):
-    return reduce(
-        lambda x, y: [*x, *y], 
-        [[x * 2, x * 2 + 1] for x in input_lst],
-        []
-    )
+def _clear_solution(sim: IDA):
+    # IDA appends the points of every call to `simulate` to these lists
+    for name in ('t_sol', 'y_sol', 'yd_sol'):
+        if hasattr(sim, name):
+            setattr(sim, name, [])
 
-def solve_dae(
-    segment: SimulationSegment,
-    meta: SimulationMetadata,
-    options: SimulationOptions,
-    
-    x_init: FloatArray, # col vec
-    V_init: FloatArray, # col vec
-    I_init: FloatArray, # col vec
-    
-    dy_init: Optional[FloatArray] = None,
-    e: Optional[Callable[[float], None]] = None,
-):
-    
-    idx_sim_buses = augment_2(segment.buses_simulated)
-    idx_fault_buses = augment_2(segment.buses_fault)
 
-    nx = x_init.shape[0]
-    nV = len(idx_sim_buses)
-    nI = len(idx_fault_buses)
-    nVI = nV + nI
-    
-    y_init = np.vstack([
-        x_init,
-        V_init[idx_sim_buses],
-        I_init[idx_fault_buses],
-    ]).flatten()
-
-    # define the equation
-
-    def func(
-        t: float,
-        y: FloatArray,
-        dy: FloatArray,
+class SegmentSolver:
+    '''
+    Solves the segments of a simulation one after another with a single
+    IDA instance.
+
+    When a segment has the same state layout as the previous one, the
+    solver is reinitialized at the event instead of being rebuilt, and
+    starts from the last step size taken where IDA reports it. The order and the Jacobian are
+    not carried over: reinitializing IDA restarts it at order 1, and the
+    Jacobian before the event does not hold after it. The points of each
+    segment are dropped from the solver once they are returned.
+    '''
+
+    def __init__(
+        self,
+        meta: SimulationMetadata,
+        options: SimulationOptions,
+        e: Optional[Callable[[float], None]] = None,
     ):
+        self.meta = meta
+        self.options = options
+        self.e = e
 
-        dx_calc, con = get_dx_con(
-            
-            t, 
-            y.reshape((-1, 1)), 
-            
-            options.linear,
-            meta.buses, meta.ctrls_global, meta.ctrls, 
-            meta.ctrls_global_indices, meta.ctrls_indices,
-            
-            meta.nx_bus, meta.nx_ctrl_global, meta.nx_ctrl, meta.nu_bus,
-            
-            
-            lambda t, i: segment.buses_input[i](t).reshape((-1, 1)), 
-            list(segment.buses_input.keys()), 
-            segment.buses_fault,
-            segment.buses_simulated,
-            
-            segment.admittance_reduced,
-        )
+        self.residual: Optional[SegmentResidual] = None
+        self.sim: Optional[IDA] = None
+        # (nx, nV, nI) of the current solver
+        self.shape: Tuple[int, int, int] = (-1, -1, -1)
 
-        n = dx_calc.size
+    def func(self, t: float, y: FloatArray, dy: FloatArray):
+        assert self.residual is not None
+        ret = self.residual(t, y, dy)
 
         # event reporter
-        if e:
-            e(t)
+        if self.e:
+            self.e(t)
 
-        ret = np.concatenate([dx_calc.flatten() - dy[:n], con.flatten()])
         return ret
 
-    # solve the equation
-    if dy_init is None:
-        dy_init = func(segment.time_start, y_init, np.zeros(y_init.shape))
-    # this will partially be computed by the solver
+    def jac(self, c: float, t: float, y: FloatArray, dy: FloatArray):
+        assert self.residual is not None
+        return self.residual.jacobian(c, t, y, dy)
 
-    model = Implicit_Problem(func, y_init, dy_init, segment.time_start)
-    sim = IDA(model)
+    def _build(self, y_init: FloatArray, dy_init: FloatArray, t0: float, nx: int, nVI: int):
+        options = self.options
 
-    sim.rtol = options.rtol
-    sim.atol = options.atol
+        model = Implicit_Problem(self.func, y_init, dy_init, t0)
+        if options.use_jacobian:
+            model.jac = self.jac
+        sim = IDA(model)
+        sim.usejac = options.use_jacobian
 
-    sim.algvar = [True] * nx + [False] * nVI
-    con = sim.make_consistent('IDA_YA_YDP_INIT')
-    sim.display_progress = False  # this one is useless, dunno if it is buggy of my fault
-    
-    ncp_list = None
-    if options.t_interval > 0:
-        ss, se = (segment.time_start, segment.time_end)
-        ncp_list = np.arange(ss, se, options.t_interval)
+        sim.rtol = options.rtol
+        sim.atol = options.atol
 
-    @suppress_stdout
-    def s():
-        return sim.simulate(segment.time_end, 0, ncp_list)
+        sim.algvar = [True] * nx + [False] * nVI
+        sim.display_progress = False  # this one is useless, dunno if it is buggy of my fault
+        return sim
 
-    t_sol, y_orig, dy = s()
-    y = y_orig.T
+    def solve(
+        self,
+        segment: SimulationSegment,
 
-    # concatenate results
+        x_init: FloatArray, # col vec
+        V_init: FloatArray, # col vec
+        I_init: FloatArray, # col vec
 
-    t = t_sol[0:]
-    X = y[:nx, :].T
-    V = y[nx: nx + nV, :].T @ segment.admittance_reproduce.T
-    I = V @ meta.system_admittance_f.T
-    
-    I[:, idx_fault_buses] = y[nx + nV:, :].T
-    
-    solution = (t, X, V, I)
+        dy_init: Optional[FloatArray] = None,
+    ):
+        meta = self.meta
+        options = self.options
+
+        idx_sim_buses = augment_2(segment.buses_simulated)
+        idx_fault_buses = augment_2(segment.buses_fault)
+
+        nx = x_init.shape[0]
+        nV = len(idx_sim_buses)
+        nI = len(idx_fault_buses)
+        nVI = nV + nI
+
+        y_init = np.vstack([
+            x_init,
+            V_init[idx_sim_buses],
+            I_init[idx_fault_buses],
+        ]).flatten()
+
+        # define the equation
+
+        self.residual = SegmentResidual(segment, meta, options.linear)
+
+        # solve the equation
+        if dy_init is None:
+            dy_init = self.func(segment.time_start, y_init, np.zeros(y_init.shape)).copy()
+        # this will partially be computed by the solver
+
+        sim = self.sim
+        if sim is not None and self.shape == (nx, nV, nI):
+            # only some versions of IDA report the last step size
+            get_last_step = getattr(sim, 'get_last_step', None)
+            h = get_last_step() if get_last_step is not None else 0
+            sim.re_init(segment.time_start, y_init, dy_init)
+            if h > 0:
+                sim.inith = h
+        else:
+            sim = self._build(y_init, dy_init, segment.time_start, nx, nVI)
+            self.sim = sim
+            self.shape = (nx, nV, nI)
+
+        con = sim.make_consistent('IDA_YA_YDP_INIT')
+
+        ncp_list = None
+        if options.t_interval > 0:
+            ss, se = (segment.time_start, segment.time_end)
+            ncp_list = np.arange(ss, se, options.t_interval)
+
+        @suppress_stdout
+        def s():
+            return sim.simulate(segment.time_end, 0, ncp_list)
+
+        t_sol, y_orig, dy = s()
+        t_sol = np.array(t_sol)
+        y = np.array(y_orig).T
+        _clear_solution(sim)
+
+        # raw results: voltages of simulated buses and currents of faulted buses
+
+        t = t_sol[0:]
+        X = y[:nx, :].T
+        V_sim = y[nx: nx + nV, :].T
+        I_fault = y[nx + nV:, :].T
 
-    # prepare for the next scenario
+        solution = (t, X, V_sim, I_fault)
 
-    x_k = X[-1:].T
-    V_k = V[-1:].T
-    I_k = I[-1:].T
+        # prepare for the next scenario
+
+        x_k = X[-1:].T
+        V_k, I_k = reproduce_VI(segment, meta, V_sim[-1:], I_fault[-1:])
+
+        sol_end = (x_k, V_k.T, I_k.T)
+
+        return solution, sol_end
+
+
+def solve_dae(
+    segment: SimulationSegment,
+    meta: SimulationMetadata,
+    options: SimulationOptions,
     
-    sol_end = (x_k, V_k, I_k)
+    x_init: FloatArray, # col vec
+    V_init: FloatArray, # col vec
+    I_init: FloatArray, # col vec
     
-    return solution, sol_end
+    dy_init: Optional[FloatArray] = None,
+    e: Optional[Callable[[float], None]] = None,
+):
+    (t, X, V_sim, I_fault), sol_end = SegmentSolver(meta, options, e).solve(
+        segment, x_init, V_init, I_init, dy_init)
+    V, I = reproduce_VI(segment, meta, V_sim, I_fault)
+    return (t, X, V, I), sol_end
+
+
+class OutputChannels:
+    '''
+    Quantities recorded by a simulation, as set by the `record_*` fields
+    of `SimulationOptions`.
+
+    States are kept for the selected buses and, optionally, the
+    controllers. If voltages or currents are selected, they are computed
+    for those buses as each segment finishes, instead of storing the raw
+    solver output.
+    '''
+
+    def __init__(self, options: SimulationOptions, meta: SimulationMetadata):
+        idx = meta.bus_index_map
+        n_bus = len(meta.buses)
+        n_ctrl = len(meta.nx_ctrl_global) + len(meta.nx_ctrl)
+
+        x_buses = range(n_bus) if options.record_x is None else \
+            sorted(set(idx[b] for b in options.record_x))
+        x_ctrls = range(n_bus, n_bus + n_ctrl) if options.record_ctrl else []
+        self.x_blocks: List[int] = [*x_buses, *x_ctrls]
+
+        nx_blocks = [*meta.nx_bus, *meta.nx_ctrl_global, *meta.nx_ctrl]
+        offsets = np.cumsum([0, *nx_blocks], dtype=int)
+        self.x_cols = np.concatenate([
+            np.arange(offsets[k], offsets[k + 1]) for k in self.x_blocks
+        ] + [np.zeros(0, dtype=int)]).astype(int)
+        self.select_x = len(self.x_blocks) < len(nx_blocks)
+
+        self.resolve = options.record_V is not None or options.record_I is not None
+        self.V_buses: List[int] = list(range(n_bus)) if options.record_V is None else \
+            [idx[b] for b in options.record_V]
+        self.I_buses: List[int] = list(range(n_bus)) if options.record_I is None else \
+            [idx[b] for b in options.record_I]
+
+        self.admittance_f = meta.system_admittance_f
+
+    def select(
+        self,
+        t: FloatArray,
+        X: FloatArray,
+        V: FloatArray,
+        I: FloatArray,
+        segment: Optional[SimulationSegment] = None,
+    ):
+        '''
+        Returns the arguments of `ResultBuffer.append` for the recorded quantities.
+        '''
+        if self.select_x:
+            X = X[:, self.x_cols]
+        if not self.resolve:
+            return (t, X, V, I, segment)
+        part = SimulationResultPart(0, len(t), V, I, segment)
+        return (
+            t, X,
+            part.get_V(self.V_buses),
+            part.get_I(self.I_buses, self.admittance_f),
+            None, self.V_buses, self.I_buses,
+        )
+
+
+def get_solver(
+    meta: SimulationMetadata,
+    options: SimulationOptions,
+    e: Optional[Callable[[float], None]] = None,
+):
+    '''
+    Returns the segment solver selected by `options.solver_method`.
+    '''
+    method = options.solver_method
+    if method == 'auto':
+        method = 'expm' if options.linear else 'ida'
+    if method == 'expm':
+        if not options.linear:
+            raise ValueError('The expm solver only applies to linear simulations.')
+        return LinearSegmentSolver(meta, options, e)
+    if method == 'ida':
+        return SegmentSolver(meta, options, e)
+    raise ValueError(f'Unknown solver method: {method}')
 
 
 def simulate(
@@ -162,28 +292,22 @@ def simulate(
     meta, init_states, timestamps, events = parse_scenario(scenario, self)
     # TODO process timestamps
     
-    segments = gen_segments(meta, timestamps, events)
+    segments = gen_segments(meta, timestamps, events, self.get_reduced_admittance)
     
     
     # solve
     
 
-    sol_list: List[Tuple[FloatArray, FloatArray,
-                         FloatArray, FloatArray]] = []  # (t, x)[]
-    
     x_init_bus, x_init_kg, x_init_k, V_init, I_init = init_states
     x_k: FloatArray = np.vstack(x_init_bus + x_init_kg + x_init_k)
     V_k: FloatArray = complex_arr_to_col_vec(np.array(V_init))
     I_k: FloatArray = complex_arr_to_col_vec(np.array(I_init))
     
-    # add init condition
-    sol_list.append((
-        np.array([segments[0].time_start if segments else 0,]),
-        x_k.T,
-        V_k.T,
-        I_k.T,
-    ))
-    
+    # collect the raw results, streamed to disk if required
+    buffer = ResultStore(options.store_path) if options.store_path else ResultBuffer()
+
+    outputs = OutputChannels(options, meta)
+
     progress_bar = tqdm(total = 1)
     min_time = np.min(timestamps)
     max_time = np.max(timestamps)
@@ -192,70 +316,50 @@ def simulate(
         val = (t - min_time) / (max_time - min_time)
         progress_bar.update(val - progress_bar.n)
     
-    for segment in segments:
+    solver = get_solver(meta, options, e = set_progress_bar)
+
+    try:
+        # add init condition
+        buffer.append(*outputs.select(
+            np.array([segments[0].time_start if segments else 0,]),
+            x_k.T,
+            V_k.T,
+            I_k.T,
+        ))
+
+        for segment in segments:
         
-        # solve
-        solution, sol_end = solve_dae(
-            segment,
-            meta,
-            options,
-            x_k,
-            V_k,
-            I_k,
-            
-            e = set_progress_bar,
-        )
-        
-        # post process
-        x_k, V_k, I_k = sol_end
-        set_progress_bar(segment.time_end)
-        sol_list.append(solution)
+            # solve
+            solution, sol_end = solver.solve(
+                segment,
+                x_k,
+                V_k,
+                I_k,
+            )
         
-    progress_bar.close()
-    
-    # concatenate solutions
-    
-    t_all, x_all, V_all, I_all = [
-        np.concatenate([x[i] for x in sol_list]) if i == 0 else np.vstack(
-            [x[i] for x in sol_list])
-        for i in range(4)
-    ]
-    t_filter = np.concatenate([
-        [True],
-        t_all[1:] > t_all[:1]
-    ])
-    t_all = t_all[t_filter]
-    x_all = x_all[t_filter, :]
-    V_all = V_all[t_filter, :]
-    I_all = I_all[t_filter, :]
-
-    x_part_all = sep_col_vec(x_all.T, meta.nx_bus + meta.nx_ctrl_global + meta.nx_ctrl)
-    i1 = len(meta.nx_bus)
-    i2 = len(meta.nx_bus) + len(meta.nx_ctrl_global)
-    x_part_sys = x_part_all[:i1]
-    x_part_ctrl_global = x_part_all[i1:i2]
-    x_part_ctrl = x_part_all[i2:]
-    V_part = V_all.reshape((t_all.size, -1, 2))
-    I_part = I_all.reshape((t_all.size, -1, 2))
-
-
-    res_dict: Dict[Hashable, SimulationResultComponent] = {}
-    for key, index in meta.bus_index_map.items():
-        res_dict[key] = SimulationResultComponent(
-            x=x_part_sys[index].T,
-            V=V_part[:, index],
-            I=I_part[:, index],
-        )
+            # post process
+            x_k, V_k, I_k = sol_end
+            set_progress_bar(segment.time_end)
+            buffer.append(*outputs.select(*solution, segment))
+
+        t_all, x_all, parts = buffer.close()
+    finally:
+        # the files of a failed run are closed too
+        progress_bar.close()
+        buffer.release()
+
+    if isinstance(buffer, ResultStore):
+        # the result points to the directory of this run
+        options = replace(options, store_path=buffer.path)
 
     out = SimulationResult(
         options=options,
         meta=meta,
         segments=segments,
         t=t_all,
-        components=res_dict,
-        ctrls_global=x_part_ctrl_global,
-        ctrls=x_part_ctrl
+        x=x_all,
+        parts=parts,
+        x_blocks=outputs.x_blocks,
     )
 
     return out
-
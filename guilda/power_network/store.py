@@ -0,0 +1,201 @@
+import os
+import json
+import tempfile
+from typing import Dict, List, Tuple, Optional, BinaryIO, Any
+
+import numpy as np
+
+from guilda.power_network.types import SimulationResultPart, SimulationSegment
+from guilda.utils.typing import FloatArray
+
+
+class ResultBuffer:
+    '''
+    Collects the trajectory of a simulation in memory, one segment at a time.
+
+    Each segment gives its times, states and raw algebraic variables (see
+    `SimulationResultPart`). Rows at the starting time of the simulation
+    are only kept once.
+    '''
+
+    def __init__(self):
+        self.n: int = 0
+        self.t_first: Optional[float] = None
+        self.t: List[FloatArray] = []
+        self.x: List[FloatArray] = []
+        self.parts: List[SimulationResultPart] = []
+
+    def _get_mask(self, t: FloatArray):
+        if self.t_first is None:
+            self.t_first = float(t[0])
+            return np.concatenate([[True], t[1:] > self.t_first])
+        return t > self.t_first
+
+    def append(
+        self,
+        t: FloatArray,
+        x: FloatArray,
+        V: FloatArray,
+        I: FloatArray,
+        segment: Optional[SimulationSegment] = None,
+        V_buses: Optional[List[int]] = None,
+        I_buses: Optional[List[int]] = None,
+    ):
+        t = np.asarray(t, dtype=np.float64).flatten()
+        mask = self._get_mask(t)
+        m = int(np.sum(mask))
+        self.t.append(t[mask])
+        self.x.append(np.asarray(x).reshape((t.size, -1))[mask])
+        self.parts.append(SimulationResultPart(
+            start=self.n, end=self.n + m,
+            V=np.asarray(V).reshape((t.size, -1))[mask],
+            I=np.asarray(I).reshape((t.size, -1))[mask],
+            segment=segment,
+            V_buses=V_buses,
+            I_buses=I_buses,
+        ))
+        self.n += m
+
+    def close(self) -> Tuple[FloatArray, FloatArray, List[SimulationResultPart]]:
+        '''
+        Returns the times, the states and the parts of the trajectory.
+        '''
+        return np.concatenate(self.t), np.vstack(self.x), self.parts
+
+    def release(self):
+        '''
+        Frees what a run left open, whether it finished or failed.
+        '''
+
+
+class ResultStore(ResultBuffer):
+    '''
+    Collects the trajectory of a simulation on disk, one segment at a time.
+
+    Each run is written to a new subdirectory of `path`, kept in
+    `self.path`, so the memory-mapped files of earlier results are never
+    overwritten. The times and states are appended as raw float64 rows to
+    `t.bin` and `x.bin`, and the algebraic variables of each segment go
+    to their own files. They are read back as read-only memory-mapped
+    arrays, so only the segment being written is held in memory.
+
+    The buses and admittance matrices of the segments are kept with the
+    trajectory, so that `load` can rebuild the voltages and currents of
+    all buses without the network.
+    '''
+
+    def __init__(self, path: str):
+        super().__init__()
+        os.makedirs(path, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix='run-', dir=path)
+        self.nx: int = 0
+        self.part_info: List[Dict[str, Any]] = []
+        self.segments: List[SimulationSegment] = []
+        self.files: Dict[str, BinaryIO] = {
+            name: open(os.path.join(self.path, f'{name}.bin'), 'wb') for name in ('t', 'x')
+        }
+
+    def append(
+        self,
+        t: FloatArray,
+        x: FloatArray,
+        V: FloatArray,
+        I: FloatArray,
+        segment: Optional[SimulationSegment] = None,
+        V_buses: Optional[List[int]] = None,
+        I_buses: Optional[List[int]] = None,
+    ):
+        t = np.asarray(t, dtype=np.float64).flatten()
+        mask = self._get_mask(t)
+        m = int(np.sum(mask))
+        k = len(self.part_info)
+
+        x = np.asarray(x, dtype=np.float64).reshape((t.size, -1))
+        self.nx = x.shape[1]
+        t[mask].tofile(self.files['t'])
+        np.ascontiguousarray(x[mask]).tofile(self.files['x'])
+
+        widths = {}
+        for name, arr in (('V', V), ('I', I)):
+            arr = np.asarray(arr, dtype=np.float64).reshape((t.size, -1))
+            widths[name] = arr.shape[1]
+            np.ascontiguousarray(arr[mask]).tofile(os.path.join(self.path, f'{name}_{k}.bin'))
+
+        if segment is not None:
+            np.savez(
+                os.path.join(self.path, f'segment_{len(self.segments)}.npz'),
+                admittance_reduced=segment.admittance_reduced,
+                admittance_reproduce=segment.admittance_reproduce,
+            )
+            self.segments.append(segment)
+        self.part_info.append({
+            'start': self.n, 'end': self.n + m, 'widths': widths,
+            'segment': len(self.segments) - 1 if segment is not None else None,
+            'V_buses': V_buses, 'I_buses': I_buses,
+        })
+        self.n += m
+
+    def close(self) -> Tuple[FloatArray, FloatArray, List[SimulationResultPart]]:
+        '''
+        Finishes writing and returns the memory-mapped trajectory.
+        '''
+        self.release()
+        segments = [{
+            'time_start': float(segment.time_start),
+            'time_end': float(segment.time_end),
+            'buses_simulated': [int(b) for b in segment.buses_simulated],
+            'buses_fault': [int(b) for b in segment.buses_fault],
+            'buses_disconnect': [int(b) for b in segment.buses_disconnect],
+        } for segment in self.segments]
+        with open(os.path.join(self.path, 'store.json'), 'w', encoding='utf-8') as f:
+            json.dump({'n': self.n, 'nx': self.nx, 'parts': self.part_info, 'segments': segments}, f)
+        return ResultStore.load(self.path, self.segments)
+
+    def release(self):
+        for f in self.files.values():
+            f.close()
+
+    @staticmethod
+    def load(
+        path: str,
+        segments: Optional[List[SimulationSegment]] = None,
+    ) -> Tuple[FloatArray, FloatArray, List[SimulationResultPart]]:
+        '''
+        Opens a closed store as memory-mapped times, states and parts.
+        The parts are attached to `segments` if given, or else to segments
+        rebuilt from the store, without their inputs.
+        '''
+        with open(os.path.join(path, 'store.json'), 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        n: int = info['n']
+        if segments is None:
+            segments = []
+            for k, s in enumerate(info['segments']):
+                with np.load(os.path.join(path, f'segment_{k}.npz')) as arrays:
+                    segments.append(SimulationSegment(
+                        buses_input={}, **s,
+                        admittance_reduced=arrays['admittance_reduced'],
+                        admittance_reproduce=arrays['admittance_reproduce'],
+                    ))
+
+        t = _open_memmap(os.path.join(path, 't.bin'), n, 1).reshape(-1)
+        x = _open_memmap(os.path.join(path, 'x.bin'), n, info['nx'])
+
+        parts: List[SimulationResultPart] = []
+        for k, p in enumerate(info['parts']):
+            m = p['end'] - p['start']
+            V, I = [
+                _open_memmap(os.path.join(path, f'{name}_{k}.bin'), m, p['widths'][name])
+                for name in ('V', 'I')
+            ]
+            segment = None if p['segment'] is None else segments[p['segment']]
+            parts.append(SimulationResultPart(
+                p['start'], p['end'], V, I, segment, p['V_buses'], p['I_buses']))
+
+        return t, x, parts
+
+
+def _open_memmap(file: str, n: int, width: int) -> FloatArray:
+    if n * width == 0:
+        return np.zeros((n, width))
+    return np.memmap(file, dtype=np.float64, mode='r', shape=(n, width))
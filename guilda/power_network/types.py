@@ -1,9 +1,12 @@
 
 from dataclasses import dataclass, field
+from functools import cached_property
 from collections import defaultdict
-from typing import List, Tuple, Union, Literal, Any, Dict, Hashable, Callable, Optional, cast
+from typing import List, Tuple, Union, Literal, Any, Dict, Hashable, Callable, Optional, Iterable, cast
 import numpy as np
+from numpy.typing import NDArray
 from scipy.interpolate import interp1d
+import scipy.sparse as sp
 from guilda.bus.bus import Bus
 from guilda.controller.controller import Controller
 
@@ -84,11 +87,15 @@ class SimulationOptions:
 
     linear: bool = False
     strict_duration: bool = False  # TODO
+    # 'ida', 'expm' for the exact solver of linear simulations, which only
+    # returns the ends of the segments without t_interval, or 'auto' for
+    # 'expm' if linear
     solver_method: str = 'ida'
 
     atol: float = 1e-8
     rtol: float = 1e-8
     t_interval: float = -1
+    use_jacobian: bool = True  # analytic jacobian for the solver
 
     do_report: bool = False
     do_retry: bool = True
@@ -97,6 +104,15 @@ class SimulationOptions:
 
     tools: bool = False
     save_solution: bool = False
+    # directory to stream the trajectory to, in a new subdirectory per
+    # run (see `ResultStore`); kept in memory if None
+    store_path: Optional[str] = None
+
+    # recorded quantities, by bus index; all if None
+    record_x: Optional[List[Hashable]] = None
+    record_V: Optional[List[Hashable]] = None
+    record_I: Optional[List[Hashable]] = None
+    record_ctrl: bool = True
 
 
 @dataclass
@@ -115,8 +131,8 @@ class SimulationMetadata:
     nx_ctrl_global: List[int]
     nx_ctrl: List[int]
 
-    system_admittance: ComplexArray
-    system_admittance_f: FloatArray
+    system_admittance: sp.csr_matrix
+    system_admittance_f: sp.csr_matrix
 
 
 @dataclass
@@ -135,24 +151,230 @@ class SimulationSegment:
 
 
 @dataclass
+class SimulationResultPart:
+    '''
+    Raw algebraic variables of the solver on rows `[start, end)` of a
+    simulation result: `V` holds the voltages of the simulated buses and
+    `I` the currents of the faulted buses of `segment`, interleaved as
+    (real, imag).
+
+    A part without a segment holds the voltages and currents of the buses
+    at positions `V_buses` and `I_buses` directly (all buses if None).
+    '''
+
+    start: int
+    end: int
+    V: FloatArray
+    I: FloatArray
+    segment: Optional[SimulationSegment] = None
+    V_buses: Optional[List[int]] = None
+    I_buses: Optional[List[int]] = None
+
+    def get_V(self, indices: List[int], rows: slice = slice(None)) -> FloatArray:
+        '''
+        Voltages of the buses at positions `indices`, of shape (n_rows, 2 * n_buses).
+        '''
+        if self.segment is None:
+            return self.V[rows][:, _get_cols(_get_positions(indices, self.V_buses, 'V'))]
+        return self.V[rows] @ self.segment.admittance_reproduce[_get_cols(indices)].T
+
+    def get_I(self, indices: List[int], admittance_f: sp.spmatrix, rows: slice = slice(None)) -> FloatArray:
+        '''
+        Currents of the buses at positions `indices`, of shape (n_rows, 2 * n_buses).
+        '''
+        if self.segment is None:
+            return self.I[rows][:, _get_cols(_get_positions(indices, self.I_buses, 'I'))]
+
+        # only the voltages of the neighbors are needed
+        Y = sp.csr_matrix(admittance_f)[_get_cols(indices)]
+        nb = np.unique(Y.indices)
+        V_nb = self.V[rows] @ self.segment.admittance_reproduce[nb].T
+        out: FloatArray = (Y[:, nb] @ V_nb.T).T
+
+        for k, b in enumerate(self.segment.buses_fault):
+            if b in indices:
+                j = indices.index(b)
+                out[:, 2 * j: 2 * j + 2] = self.I[rows, 2 * k: 2 * k + 2]
+        return out
+
+
+def _get_cols(indices: Iterable[int]) -> NDArray[np.int_]:
+    return (2 * np.array(list(indices), dtype=int)[:, None] + np.arange(2)).reshape(-1)
+
+
+def _get_positions(indices: List[int], recorded: Optional[List[int]], name: str) -> List[int]:
+    if recorded is None:
+        return indices
+    pos = {b: k for k, b in enumerate(recorded)}
+    for b in indices:
+        if b not in pos:
+            raise KeyError(f'{name} of the bus at position {b} is not recorded.')
+    return [pos[b] for b in indices]
+
+
 class SimulationResultComponent:
-    x: FloatArray = field(default_factory=lambda: np.zeros((0, 0)))
-    V: FloatArray = field(default_factory=lambda: np.zeros((0, 0)))
-    I: FloatArray = field(default_factory=lambda: np.zeros((0, 0)))
+    '''
+    Trajectory of one bus. `x` is a view of the states of the result;
+    `V` and `I`, of shape (n_time, 2), are rebuilt on first access.
+    '''
 
+    def __init__(self, result: 'SimulationResult', index: int):
+        self.result = result
+        self.index = index
 
-@dataclass
-class SimulationResult:
+    @property
+    def x(self) -> FloatArray:
+        return self.result.get_x(self.index)
 
-    options: SimulationOptions
+    @cached_property
+    def V(self) -> FloatArray:
+        return self.result.get_V([self.index])[:, 0]
 
-    meta: SimulationMetadata
-    segments: List[SimulationSegment]
+    @cached_property
+    def I(self) -> FloatArray:
+        return self.result.get_I([self.index])[:, 0]
 
-    t: FloatArray
-    components: Dict[Hashable, SimulationResultComponent]
-    ctrls_global: List[FloatArray]
-    ctrls: List[FloatArray]
 
-    def __getitem__(self, x: Hashable):
-        return self.components[x]
+class SimulationResult:
+    '''
+    Result of a simulation.
+
+    Only the time, the states and the raw solver output of each segment
+    are stored; bus voltages and currents are rebuilt on demand, and only
+    for the buses asked for. `window` and `subset` return results sharing
+    the same storage.
+    '''
+
+    def __init__(
+        self,
+        options: SimulationOptions,
+        meta: SimulationMetadata,
+        segments: List[SimulationSegment],
+        t: FloatArray,
+        x: FloatArray,
+        parts: List[SimulationResultPart],
+        rows: Optional[slice] = None,
+        bus_keys: Optional[List[Hashable]] = None,
+        x_blocks: Optional[List[int]] = None,
+    ):
+        self.options = options
+        self.meta = meta
+        self.segments = segments
+        self.parts = parts
+        self._t = t
+        self._x = x
+        self.rows: slice = rows or slice(0, t.size)
+        self.bus_keys: List[Hashable] = list(meta.bus_index_map) if bus_keys is None else list(bus_keys)
+
+        # state blocks of buses and controllers that are stored in `x`
+        nx_blocks = [*meta.nx_bus, *meta.nx_ctrl_global, *meta.nx_ctrl]
+        self.x_blocks: List[int] = list(range(len(nx_blocks))) if x_blocks is None else list(x_blocks)
+        offsets = np.cumsum([0, *[nx_blocks[k] for k in self.x_blocks]], dtype=int)
+        self._x_slices: Dict[int, slice] = {
+            b: slice(int(offsets[k]), int(offsets[k + 1])) for k, b in enumerate(self.x_blocks)
+        }
+        self._components: Dict[Hashable, SimulationResultComponent] = {}
+
+    def __repr__(self):
+        return f'{type(self).__name__}(t=[{self.t[0] if self.t.size else None}, ' + \
+            f'{self.t[-1] if self.t.size else None}], n_time={self.t.size}, buses={self.bus_keys})'
+
+    # views
+
+    def window(self, t_start: float = -np.inf, t_end: float = np.inf) -> 'SimulationResult':
+        '''
+        Rows with `t_start <= t <= t_end`, sharing the storage of this result.
+        '''
+        t = self.t
+        i0 = self.rows.start + int(np.searchsorted(t, t_start, side='left'))
+        i1 = self.rows.start + int(np.searchsorted(t, t_end, side='right'))
+        return SimulationResult(
+            self.options, self.meta, self.segments, self._t, self._x, self.parts,
+            slice(i0, max(i0, i1)), self.bus_keys, self.x_blocks)
+
+    def subset(self, bus_keys: Iterable[Hashable]) -> 'SimulationResult':
+        '''
+        Restricts `components` to the given buses, sharing the storage of this result.
+        '''
+        return SimulationResult(
+            self.options, self.meta, self.segments, self._t, self._x, self.parts,
+            self.rows, list(bus_keys), self.x_blocks)
+
+    # stored data
+
+    @property
+    def t(self) -> FloatArray:
+        return self._t[self.rows]
+
+    @property
+    def x(self) -> FloatArray:
+        '''
+        Stored states, of shape (n_time, nx): buses, then global and local
+        controllers (see `x_blocks`).
+        '''
+        return self._x[self.rows]
+
+    def get_x(self, index: int) -> FloatArray:
+        '''
+        States of the bus at position `index`, or of a controller if
+        `index` is past the buses.
+        '''
+        if index not in self._x_slices:
+            raise KeyError(f'States of the block at position {index} are not recorded.')
+        return self._x[self.rows, self._x_slices[index]]
+
+    @property
+    def ctrls_global(self) -> List[FloatArray]:
+        n = len(self.meta.nx_bus)
+        return [
+            self.get_x(k).T for k in range(n, n + len(self.meta.nx_ctrl_global))
+            if k in self._x_slices
+        ]
+
+    @property
+    def ctrls(self) -> List[FloatArray]:
+        n = len(self.meta.nx_bus) + len(self.meta.nx_ctrl_global)
+        return [
+            self.get_x(k).T for k in range(n, n + len(self.meta.nx_ctrl))
+            if k in self._x_slices
+        ]
+
+    @property
+    def components(self) -> Dict[Hashable, SimulationResultComponent]:
+        return {key: self[key] for key in self.bus_keys}
+
+    def __getitem__(self, x: Hashable) -> SimulationResultComponent:
+        if x not in self._components:
+            self._components[x] = SimulationResultComponent(self, self.meta.bus_index_map[x])
+        return self._components[x]
+
+    # rebuilt data
+
+    def _iter_parts(self):
+        r0, r1 = self.rows.start, self.rows.stop
+        for p in self.parts:
+            a, b = max(r0, p.start), min(r1, p.end)
+            if a < b:
+                yield p, slice(a - p.start, b - p.start), slice(a - r0, b - r0)
+
+    def get_V(self, indices: Optional[Iterable[int]] = None) -> FloatArray:
+        '''
+        Voltages of the buses at positions `indices` (all by default),
+        of shape (n_time, n_buses, 2).
+        '''
+        indices = list(range(len(self.meta.buses)) if indices is None else indices)
+        out = np.zeros((self.t.size, 2 * len(indices)))
+        for p, local, rows in self._iter_parts():
+            out[rows] = p.get_V(indices, local)
+        return out.reshape((self.t.size, -1, 2))
+
+    def get_I(self, indices: Optional[Iterable[int]] = None) -> FloatArray:
+        '''
+        Currents of the buses at positions `indices` (all by default),
+        of shape (n_time, n_buses, 2).
+        '''
+        indices = list(range(len(self.meta.buses)) if indices is None else indices)
+        out = np.zeros((self.t.size, 2 * len(indices)))
+        for p, local, rows in self._iter_parts():
+            out[rows] = p.get_I(indices, self.meta.system_admittance_f, local)
+        return out.reshape((self.t.size, -1, 2))
@@ -1,10 +1,21 @@
-from typing import Optional, Iterable
+from typing import List, Literal, Optional, Iterable, Hashable, Sequence
 
 from guilda.power_network.types import SimulationOptions, SimulationScenario
 from guilda.power_network.base import _PowerNetwork
 from guilda.power_network.simulate import simulate
+from guilda.power_network.parallel import simulate_many
+from guilda.power_network.response import ResponseLibrary, get_response_library
+from guilda.power_network.modal import ModalAnalysis, get_modes
+from guilda.power_network.frequency import FrequencyResponse, get_frequency_response
+from guilda.power_network.reduction import ReducedModel, get_reduced_model
+from guilda.power_network.coherency import get_coherent_groups, get_dynamic_equivalent
+from guilda.power_network.external import get_external_equivalent
+from guilda.power_network.power_flow_batch import PowerFlowBatch, calculate_power_flow_batch
+from guilda.power_network.qsts import QstsEvent, QstsResult, simulate_qsts
+from guilda.power_network.continuation import ContinuationResult, trace_pv_curve
+from guilda.power_network.distribution import DistributionFactors, get_distribution_factors
 
-from guilda.utils.typing import FloatArray
+from guilda.utils.typing import ComplexArray, FloatArray
 
 class PowerNetwork(_PowerNetwork):
     
@@ -16,6 +27,147 @@ class PowerNetwork(_PowerNetwork):
         ):
         
         return simulate(self, scenario, options)
+
+    def simulate_many(
+        self,
+        scenarios: Iterable[SimulationScenario],
+        options: Optional[SimulationOptions] = None,
+        workers: Optional[int] = None,
+        ):
+
+        return simulate_many(self, scenarios, options, workers)
+
+    def get_response_library(
+        self,
+        t_end: float,
+        dt: float,
+        inputs: Optional[Iterable[Hashable]] = None,
+        outputs: Optional[Sequence[int]] = None,
+        ) -> ResponseLibrary:
+
+        return get_response_library(self, t_end, dt, inputs, outputs)
+
+    def get_modes(
+        self,
+        f_min: float = 0.1,
+        f_max: float = 2.0,
+        n_shifts: int = 4,
+        k: int = 6,
+        tol: float = 0,
+        sigma_min: float = -10.0,
+        ) -> ModalAnalysis:
+
+        return get_modes(self, f_min, f_max, n_shifts, k, tol, sigma_min)
+
+    def get_frequency_response(
+        self,
+        omega: Iterable[float],
+        inputs: Optional[Iterable[Hashable]] = None,
+        outputs: Optional[Sequence[int]] = None,
+        workers: Optional[int] = None,
+        ) -> FrequencyResponse:
+
+        return get_frequency_response(self, omega, inputs, outputs, workers)
+
+    def get_reduced_model(
+        self,
+        order: Optional[int] = None,
+        method: Literal['balanced', 'modal'] = 'balanced',
+        tol: float = 1e-4,
+        inputs: Optional[Iterable[Hashable]] = None,
+        outputs: Optional[Sequence[int]] = None,
+        omega: Optional[Iterable[float]] = None,
+        margin: float = 1e-6,
+        n_shifts: int = 10,
+        adi_tol: float = 1e-10,
+        max_iter: int = 200,
+        ) -> ReducedModel:
+
+        return get_reduced_model(
+            self, order, method, tol, inputs, outputs, omega,
+            margin, n_shifts, adi_tol, max_iter)
+
+    def get_coherent_groups(
+        self,
+        buses: Optional[Iterable[Hashable]] = None,
+        n_groups: Optional[int] = None,
+        method: Literal['modal', 'simulation'] = 'modal',
+        f_max: float = 1.0,
+        tol: float = 0.05,
+        scenario: Optional[SimulationScenario] = None,
+        ) -> List[List[Hashable]]:
+
+        return get_coherent_groups(self, buses, n_groups, method, f_max, tol, scenario)
+
+    def get_dynamic_equivalent(
+        self,
+        study_buses: Iterable[Hashable],
+        groups: Optional[Sequence[Sequence[Hashable]]] = None,
+        n_groups: Optional[int] = None,
+        method: Literal['modal', 'simulation'] = 'modal',
+        x_link: float = 1e-3,
+        reduce_network: bool = True,
+        ) -> 'PowerNetwork':
+
+        return get_dynamic_equivalent(self, study_buses, groups, n_groups, method, x_link, reduce_network)  # type: ignore
+
+    def get_external_equivalent(
+        self,
+        study_buses: Iterable[Hashable],
+        method: Literal['ward', 'rei'] = 'ward',
+        x_link: float = 1e-3,
+        tol: float = 1e-10,
+        check_stability: bool = True,
+        ) -> 'PowerNetwork':
+
+        return get_external_equivalent(self, study_buses, method, x_link, tol, check_stability)  # type: ignore
+
+    def calculate_power_flow_batch(
+        self,
+        P: Optional[FloatArray] = None,
+        Q: Optional[FloatArray] = None,
+        V_abs: Optional[FloatArray] = None,
+        V0: Optional[ComplexArray] = None,
+        tol: float = 1e-10,
+        max_iter: int = 30,
+        ) -> PowerFlowBatch:
+
+        return calculate_power_flow_batch(self, P, Q, V_abs, V0, tol, max_iter)
+
+    def simulate_qsts(
+        self,
+        t: Iterable[float],
+        P: Optional[FloatArray] = None,
+        Q: Optional[FloatArray] = None,
+        V_abs: Optional[FloatArray] = None,
+        events: Iterable[QstsEvent] = (),
+        path: Optional[str] = None,
+        chunk_size: int = 1440,
+        V0: Optional[ComplexArray] = None,
+        tol: float = 1e-8,
+        max_iter: int = 30,
+        ) -> QstsResult:
+
+        return simulate_qsts(self, t, P, Q, V_abs, events, path, chunk_size, V0, tol, max_iter)
+
+    def trace_pv_curve(
+        self,
+        dP: Optional[FloatArray] = None,
+        dQ: Optional[FloatArray] = None,
+        stop: Literal['nose', 'full'] = 'nose',
+        step: float = 0.1,
+        min_step: float = 1e-4,
+        max_step: float = 1.0,
+        max_points: int = 500,
+        tol: float = 1e-8,
+        max_iter: int = 10,
+        ) -> ContinuationResult:
+
+        return trace_pv_curve(self, dP, dQ, stop, step, min_step, max_step, max_points, tol, max_iter)
+
+    def get_distribution_factors(self) -> DistributionFactors:
+
+        return get_distribution_factors(self)
     
     def print_bus_state(self) -> None:
         for index in self.bus_index_map:
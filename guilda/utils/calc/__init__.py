@@ -1 +1 @@
-from guilda.utils.calc.funcs import complex_mat_to_float
+from guilda.utils.calc.funcs import complex_mat_to_float, numerical_jacobian, reduce_admittance_matrix
@@ -1,21 +1,96 @@
+from typing import Callable, Union, Iterable, Tuple
 import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
 
 from guilda.utils.typing import ComplexArray, FloatArray
 
+_FD_STEP = float(np.sqrt(np.finfo(float).eps))
 
-def complex_mat_to_float(m: ComplexArray) -> FloatArray:
+
+def complex_mat_to_float(m: Union[ComplexArray, sp.spmatrix]) -> Union[FloatArray, sp.spmatrix]:
     '''_summary_
 
     Args:
-        m (ComplexArray): _description_
+        m (ComplexArray): _description_. A sparse matrix gives a sparse (csr) result.
 
     Returns:
         FloatArray: _description_
     '''  
+    if sp.issparse(m):
+        return (
+            sp.kron(m.real, np.array([[1, 0], [0, 1]])) +
+            sp.kron(m.imag, np.array([[0, -1], [1, 0]]))
+        ).tocsr()
     n, p = m.shape
     r: FloatArray = np.zeros((2*n, 2*p))
     r[ ::2, ::2] =  m.real
     r[ ::2,1::2] = -m.imag
     r[1::2, ::2] =  m.imag
     r[1::2,1::2] =  m.real
-    return r
\ No newline at end of file
+    return r
+
+def numerical_jacobian(f: Callable[[FloatArray], FloatArray], x: FloatArray) -> FloatArray:
+    '''Jacobian of `f` at `x` by forward differences.
+
+    Args:
+        f (Callable[[FloatArray], FloatArray]): function of a flat vector, returning a flat vector.
+        x (FloatArray): point of evaluation.
+
+    Returns:
+        FloatArray: the Jacobian matrix, one column per entry of `x`.
+    '''
+    x = np.array(x, dtype=float).flatten()
+    f0 = np.asarray(f(x), dtype=float).flatten()
+    J: FloatArray = np.zeros((f0.size, x.size))
+    for i in range(x.size):
+        h = _FD_STEP * max(1., abs(x[i]))
+        x_h = x.copy()
+        x_h[i] += h
+        J[:, i] = (np.asarray(f(x_h), dtype=float).flatten() - f0) / h
+    return J
+
+
+def reduce_admittance_matrix(Y: Union[ComplexArray, sp.spmatrix], index: Iterable[int]) -> Tuple[
+    ComplexArray,
+    FloatArray,
+    ComplexArray,
+    FloatArray
+]:
+    '''
+    Kron reduction of `Y` onto the buses in `index`.
+
+    The block of the eliminated buses is factorized once (sparse LU), and
+    the same solve gives both the reduced matrix and the matrix reproducing
+    the voltages of all buses from those of the kept ones.
+    '''
+
+    Y = sp.csc_matrix(Y)
+    n_bus = Y.shape[0]
+    index = set(index)
+    reduced = np.array([i not in index for i in range(n_bus)])
+    n_reduced = np.logical_not(reduced)
+
+    i_kept = np.flatnonzero(n_reduced)
+    i_reduced = np.flatnonzero(reduced)
+    nr_n_reduced = i_kept.size
+
+    Y_reduced: ComplexArray = Y[i_kept][:, i_kept].toarray()
+
+    A_reproduce: ComplexArray = np.zeros((n_bus, nr_n_reduced), dtype=complex)
+    A_reproduce[i_kept] = np.eye(nr_n_reduced)
+
+    if i_reduced.size > 0:
+        Y12 = Y[i_kept][:, i_reduced]
+        Y21 = Y[i_reduced][:, i_kept].toarray()
+        Y22 = sp.csc_matrix(Y[i_reduced][:, i_reduced])
+
+        # Y22^-1 Y21
+        Y22_Y21: ComplexArray = splu(Y22).solve(Y21)
+        Y_reduced -= Y12 @ Y22_Y21
+        A_reproduce[i_reduced] = -Y22_Y21
+
+    Y_mat_reduced = complex_mat_to_float(Y_reduced)
+    A_mat_reproduce = complex_mat_to_float(A_reproduce)
+
+    return Y_reduced, Y_mat_reduced, A_reproduce, A_mat_reproduce
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+import guilda.models as sample
+from guilda.power_network import BusFault, SimulationScenario
+from guilda.power_network.segment import gen_segments, parse_scenario
+from guilda.utils.calc import complex_mat_to_float, reduce_admittance_matrix
+
+
+@pytest.fixture(scope='module')
+def net():
+    return sample.IEEE68bus()
+
+
+def dense_admittance(net) -> np.ndarray:
+    index = net.bus_index_map
+    Y = np.zeros((len(index), len(index)), dtype=complex)
+    for br in net.a_branch:
+        f, t = index[br.bus1], index[br.bus2]
+        Y[np.ix_([f, t], [f, t])] += br.get_admittance_matrix()
+    for bus, k in index.items():
+        Y[k, k] += net.a_bus_dict[bus].shunt
+    return Y
+
+
+def test_sparse_admittance_matches_dense(net):
+    Y = net.get_admittance_matrix_sparse()
+    np.testing.assert_allclose(Y.toarray(), dense_admittance(net), atol=1e-12)
+    np.testing.assert_allclose(complex_mat_to_float(Y).toarray(), complex_mat_to_float(Y.toarray()), atol=1e-12)
+
+
+def test_kron_reduction_matches_dense(net):
+    Y = dense_admittance(net)
+    kept = [0, 3, 7, 20, 40, 67]
+    rest = [k for k in range(Y.shape[0]) if k not in kept]
+    Y_reduced, Y_mat, A_reproduce, A_mat = reduce_admittance_matrix(net.get_admittance_matrix_sparse(), kept)
+
+    expected = Y[np.ix_(kept, kept)] - Y[np.ix_(kept, rest)] @ np.linalg.solve(Y[np.ix_(rest, rest)], Y[np.ix_(rest, kept)])
+    np.testing.assert_allclose(Y_reduced, expected, atol=1e-9)
+    np.testing.assert_allclose(Y_mat, complex_mat_to_float(expected), atol=1e-9)
+
+    # the reproduced voltages draw no current at the eliminated buses
+    np.testing.assert_allclose(A_reproduce[kept], np.eye(len(kept)), atol=1e-12)
+    np.testing.assert_allclose((Y @ A_reproduce)[rest], 0, atol=1e-9)
+    np.testing.assert_allclose(A_mat, complex_mat_to_float(A_reproduce), atol=1e-12)
+
+
+def test_reduced_admittance_is_cached():
+    net = sample.IEEE68bus()
+    net.reduced_admittance_cache_size = 2
+    a = net.get_reduced_admittance([7, 0, 3])
+    assert all(x is y for x, y in zip(a, net.get_reduced_admittance([0, 3, 7, 7])))
+    assert not any(x.flags.writeable for x in a)
+
+    # the least recently used entry is dropped
+    c = net.get_reduced_admittance([1, 2])
+    net.get_reduced_admittance([0, 3, 7])
+    net.get_reduced_admittance([4, 5])
+    assert net.get_reduced_admittance([0, 3, 7])[0] is a[0]
+    assert net.get_reduced_admittance([1, 2])[0] is not c[0]
+
+    # a modified shunt is only seen after clear_cache
+    net.a_bus_dict[net.bus_indices[1]].shunt += 0.5j
+    assert net.get_reduced_admittance([0, 3, 7])[0] is a[0]
+    net.clear_cache()
+    b = net.get_reduced_admittance([0, 3, 7])
+    np.testing.assert_allclose(b[0], reduce_admittance_matrix(net.get_admittance_matrix_sparse(), [0, 3, 7])[0], atol=1e-12)
+    assert np.abs(b[0] - a[0]).max() > 1e-3
+
+
+def test_segments_share_reduced_admittance():
+    net = sample.simple_3_bus_nishino()
+    net.initialize()
+    scenario = SimulationScenario(tstart=0, tend=3, fault=[BusFault(index=2, time=(1, 2))])
+    meta, _, timestamps, events = parse_scenario(scenario, net)
+    segments = gen_segments(meta, timestamps, events, net.get_reduced_admittance)
+
+    assert [s.time_start for s in segments] == [0, 1, 2]
+    assert [s.buses_fault for s in segments] == [[], [1], []]
+    # the faulted bus stays simulated, so all segments share one reduction
+    assert all(s.admittance_reduced is segments[0].admittance_reduced for s in segments)
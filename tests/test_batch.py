@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+import guilda.models as sample
+from guilda.base import ComponentBatch
+from guilda.generator import Generator, Generator2Axis
+from guilda.load import LoadCurrent, LoadImpedance, LoadPower, LoadVoltage
+
+
+def ieee68_mixed_loads():
+    net = sample.IEEE68bus()
+    models = [LoadImpedance, LoadCurrent, LoadPower, LoadVoltage]
+    loads = [bus for bus in net.a_bus if isinstance(bus.component, LoadImpedance)]
+    for k, bus in enumerate(loads):
+        bus.set_component(models[k % len(models)]())
+    return net
+
+
+def three_bus_2axis():
+    net = sample.simple_3_bus_nishino(generator_model=Generator2Axis)
+    for bus in net.a_bus:
+        if isinstance(bus.component, Generator2Axis):
+            bus.component.parameter.Xq_prime = bus.component.parameter.Xd_prime
+            bus.component.parameter.Tqo = 0.5
+    return net
+
+
+NETWORKS = {
+    'IEEE68': ieee68_mixed_loads,
+    'classical': lambda: sample.simple_3_bus_nishino(generator_model=Generator),
+    '2axis': three_bus_2axis,
+}
+
+
+@pytest.mark.parametrize('name', list(NETWORKS))
+def test_batches_match_components(name: str):
+    net = NETWORKS[name]()
+    net.initialize()
+    rng = np.random.default_rng(0)
+
+    groups = {}
+    for bus in net.a_bus:
+        key = bus.component.get_batch_key()
+        if key is not None:
+            groups.setdefault(key, []).append(bus.component)
+    assert len(groups) >= 2
+
+    for components in groups.values():
+        batch = components[0].make_batch(components)
+        assert type(batch) is not ComponentBatch
+
+        # away from the equilibrium, with inputs
+        n = len(components)
+        V = np.array([c.V_equilibrium for c in components], dtype=complex) * (1 + 0.05 * rng.standard_normal(n))
+        I = np.array([c.I_equilibrium for c in components], dtype=complex) * (1 + 0.05 * rng.standard_normal(n))
+        x = np.array([np.ravel(c.x_equilibrium) for c in components]).reshape((n, -1))
+        x = x + 0.05 * rng.standard_normal(x.shape)
+        u = 0.05 * rng.standard_normal((n, components[0].nu))
+
+        expected = ComponentBatch(components).get_dx_constraint(V, I, x, u, 0.5)
+        for value, ref in zip(batch.get_dx_constraint(V, I, x, u, 0.5), expected):
+            np.testing.assert_allclose(value, ref, rtol=1e-10, atol=1e-10)
@@ -0,0 +1,26 @@
+import numpy as np
+
+import guilda.models as sample
+
+
+def get_eigenvalues(net) -> np.ndarray:
+    A = net.get_sys()[0]
+    A = A.toarray() if hasattr(A, 'toarray') else np.asarray(A)
+    return np.sort_complex(np.round(np.linalg.eigvals(A), 7))
+
+
+def test_dynamic_equivalent_eliminates_external_buses():
+    net = sample.IEEE68bus()
+    net.initialize()
+    study = [b for b in net.bus_indices if b <= 9]
+    groups = net.get_coherent_groups([b for b in net.bus_indices if b not in study], 3)
+
+    full = net.get_dynamic_equivalent(study, groups, reduce_network=False)
+    small = net.get_dynamic_equivalent(study, groups)
+
+    # one generator bus per group besides the study buses
+    assert len(small.a_bus) == len(study) + len(groups)
+    assert len(small.a_bus) < len(net.a_bus)
+    for index in study:
+        assert abs(small.a_bus_dict[index].V_equilibrium - net.a_bus_dict[index].V_equilibrium) < 1e-8
+    np.testing.assert_allclose(get_eigenvalues(small), get_eigenvalues(full), atol=1e-6)
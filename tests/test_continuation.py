@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+import guilda.models as sample
+
+
+@pytest.fixture(scope='module', params=['3bus', 'IEEE68'])
+def net(request):
+    if request.param == '3bus':
+        return sample.simple_3_bus_nishino()
+    return sample.IEEE68bus()
+
+
+def test_nose_matches_marched_power_flow(net):
+    result = net.trace_pv_curve()
+    P = np.array([getattr(bus, 'P', 0) for bus in net.a_bus])
+    Q = np.array([getattr(bus, 'Q', 0) for bus in net.a_bus])
+
+    # the default direction scales the setpoints of PV and PQ buses
+    lam = np.linspace(0, 1.05 * result.lambda_max, 1051)
+    marched = net.calculate_power_flow_batch(P=(1 + lam[:, None]) * P, Q=(1 + lam[:, None]) * Q)
+    assert not marched.converged[lam > result.lambda_max].any()
+    assert lam[marched.converged].max() > (1 - 2e-3) * result.lambda_max
+
+    # the upper half of the curve away from the nose, where Newton is well conditioned
+    upper = np.flatnonzero(result.lam[:result.nose] < 0.95 * result.lambda_max)
+    points = net.calculate_power_flow_batch(P=(1 + result.lam[upper, None]) * P, Q=(1 + result.lam[upper, None]) * Q)
+    assert points.converged.all()
+    np.testing.assert_allclose(points.V, result.V[upper], atol=1e-8)
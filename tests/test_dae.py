@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+import guilda.models as sample
+from guilda.power_network import BusFault, BusInput, SimulationScenario
+from guilda.power_network.dae import SegmentResidual, get_dx_con
+from guilda.power_network.segment import augment_2, gen_segments, parse_scenario
+from guilda.utils.calc import numerical_jacobian
+from guilda.utils.data import complex_arr_to_col_vec
+
+
+def get_segment_states():
+    net = sample.simple_3_bus_nishino(True)
+    net.initialize()
+    scenario = SimulationScenario(
+        tstart=0, tend=3,
+        u=[BusInput(index=3, time=[0, 1, 2, 3], value=np.array([[0, 0.05, 0.1, 0.1], [0, 0, 0, 0]]).T)],
+        fault=[BusFault(index=2, time=(1, 2))],
+    )
+    meta, init_states, timestamps, events = parse_scenario(scenario, net)
+    segments = gen_segments(meta, timestamps, events)
+
+    x_bus, x_kg, x_k, V_init, I_init = init_states
+    x = np.vstack(x_bus + x_kg + x_k)
+    V = complex_arr_to_col_vec(np.array(V_init))
+    I = complex_arr_to_col_vec(np.array(I_init))
+
+    for segment in segments:
+        y = np.vstack([x, V[augment_2(segment.buses_simulated)], I[augment_2(segment.buses_fault)]]).flatten()
+        yield meta, segment, y
+
+
+@pytest.mark.parametrize('linear', [False, True])
+def test_residual_matches_reference(linear: bool):
+    rng = np.random.default_rng(0)
+    for meta, segment, y in get_segment_states():
+        residual = SegmentResidual(segment, meta, linear)
+        t = segment.time_start + 0.5
+        y = y + 0.01 * rng.standard_normal(y.shape)
+        dy = 0.01 * rng.standard_normal(y.shape)
+
+        # the residual of each call before the kernel was precompiled
+        dx, con = get_dx_con(
+            t, y.reshape((-1, 1)), linear,
+            meta.buses, meta.ctrls_global, meta.ctrls,
+            meta.ctrls_global_indices, meta.ctrls_indices,
+            meta.nx_bus, meta.nx_ctrl_global, meta.nx_ctrl, meta.nu_bus,
+            lambda t, i: segment.buses_input[i](t).reshape((-1, 1)),
+            list(segment.buses_input.keys()),
+            segment.buses_fault, segment.buses_simulated,
+            segment.admittance_reduced,
+        )
+        expected = np.concatenate([dx.flatten() - dy[:dx.size], con.flatten()])
+        np.testing.assert_allclose(residual(t, y, dy), expected, rtol=1e-10, atol=1e-12)
+
+
+@pytest.mark.parametrize('linear', [False, True])
+def test_jacobian_matches_finite_differences(linear: bool):
+    rng = np.random.default_rng(0)
+    c = 10.0
+    for meta, segment, y in get_segment_states():
+        residual = SegmentResidual(segment, meta, linear)
+        t = segment.time_start + 0.5
+        y = y + 0.01 * rng.standard_normal(y.shape)
+        dy = 0.01 * rng.standard_normal(y.shape)
+
+        J = residual.jacobian(c, t, y, dy)
+        J_y = numerical_jacobian(lambda z: residual(t, z, dy), y)
+        J_dy = numerical_jacobian(lambda z: residual(t, y, z), dy)
+        np.testing.assert_allclose(J, J_y + c * J_dy, atol=1e-5)
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+import guilda.models as sample
+
+
+@pytest.fixture(scope='module')
+def net():
+    return sample.IEEE68bus()
+
+
+def get_flows(net, V):
+    factors = net.get_distribution_factors()
+    theta = np.angle(np.ravel(V))
+    solver = net.get_power_flow_solver('dc')
+    return solver.b * (theta[factors.ends[:, 0]] - theta[factors.ends[:, 1]] - solver.phase)
+
+
+def get_radial_branch(net) -> int:
+    lodf = net.get_distribution_factors().lodf
+    return int(np.flatnonzero(np.isnan(lodf).any(axis=0))[0])
+
+
+@pytest.mark.parametrize('method', ['newton', 'fdxb', 'fdbx', 'dc'])
+def test_radial_outage_raises(net, method: str):
+    with pytest.raises(ValueError):
+        net.calculate_power_flow(method=method, outages=[get_radial_branch(net)])
+
+
+@pytest.mark.parametrize('method', ['fdxb', 'fdbx'])
+@pytest.mark.parametrize('outage', [48, 60])
+def test_fast_decoupled_outage_matches_newton(net, method: str, outage: int):
+    V, _ = net.calculate_power_flow(method=method, outages=[outage])
+    V_newton, _ = net.calculate_power_flow(outages=[outage])
+    np.testing.assert_allclose(V, V_newton, atol=1e-6)
+
+
+def test_distribution_factors_match_dc_outages(net):
+    factors = net.get_distribution_factors()
+    radial = set(np.flatnonzero(np.isnan(factors.lodf).any(axis=0)))
+    outages = [k for k in range(len(net.a_branch)) if k not in radial]
+
+    for k in outages[::5]:
+        V, _ = net.calculate_power_flow(method='dc', outages=[k])
+        expected = get_flows(net, V)
+        expected[k] = 0
+        np.testing.assert_allclose(factors.get_flows(outages=[k]), expected, atol=1e-8)
+
+    pair = outages[:2]
+    V, _ = net.calculate_power_flow(method='dc', outages=pair)
+    expected = get_flows(net, V)
+    expected[pair] = 0
+    np.testing.assert_allclose(factors.get_flows(outages=pair), expected, atol=1e-8)
+
+    # a transfer of power from the first bus to the slack buses
+    solver = net.get_power_flow_solver('dc')
+    dP = np.zeros(len(net.a_bus))
+    dP[0] = 0.1
+    theta = solver.get_angles(solver.case.P + dP, solver.case.V_angle)
+    np.testing.assert_allclose(factors.get_flows(dP), get_flows(net, np.exp(1j * theta)), atol=1e-8)
+
+
+def test_distribution_factors_raise_on_islands(net):
+    factors = net.get_distribution_factors()
+    radial = get_radial_branch(net)
+    for outages in ([radial], [radial, radial + 1]):
+        with pytest.raises(ValueError):
+            factors.get_flows(outages=outages)
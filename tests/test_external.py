@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+import guilda.models as sample
+from guilda.load import LoadCurrent, LoadImpedance
+from guilda.power_network.external import get_unstable_eigenvalues
+
+
+@pytest.fixture(scope='module')
+def net():
+    net = sample.IEEE68bus()
+    net.initialize()
+    return net
+
+
+def get_eigenvalues(net) -> np.ndarray:
+    A = net.get_sys()[0]
+    A = A.toarray() if hasattr(A, 'toarray') else np.asarray(A)
+    return np.sort_complex(np.round(np.linalg.eigvals(A), 8))
+
+
+STUDY_AREAS = {
+    '1-9': lambda b: b <= 9,
+    '1-39': lambda b: b <= 39,
+    # with external machines
+    '10-39': lambda b: 10 <= b <= 39,
+    '1,17-68': lambda b: b == 1 or b >= 17,
+}
+
+
+@pytest.mark.parametrize('method', ['ward', 'rei'])
+@pytest.mark.parametrize('area', list(STUDY_AREAS))
+def test_equivalent_is_stable_and_keeps_base_case(net, method: str, area: str):
+    study = [b for b in net.bus_indices if STUDY_AREAS[area](b)]
+    eq = net.get_external_equivalent(study, method, check_stability=False)
+
+    assert len(get_unstable_eigenvalues(eq)) == 0
+    for index in study:
+        assert abs(eq.a_bus_dict[index].V_equilibrium - net.a_bus_dict[index].V_equilibrium) < 1e-10
+    V, _ = eq.calculate_power_flow()
+    np.testing.assert_allclose(V.ravel(), np.array(eq.V_equilibrium).ravel(), atol=1e-8)
+    eq.initialize()
+    np.testing.assert_allclose(np.array(eq.V_equilibrium).ravel(), V.ravel(), atol=1e-8)
+
+
+def test_ward_of_load_area_keeps_dynamics(net):
+    # all machines are in the study area, so only impedance loads are eliminated
+    study = [b for b in net.bus_indices if b <= 39]
+    eq = net.get_external_equivalent(study, 'ward')
+    np.testing.assert_allclose(get_eigenvalues(eq), get_eigenvalues(net), atol=1e-6)
+
+
+def test_unstable_eigenvalues_match_dense_eig():
+    # current loads instead of impedances make IEEE68 unstable
+    net = sample.IEEE68bus()
+    for bus in net.a_bus:
+        if isinstance(bus.component, LoadImpedance):
+            bus.set_component(LoadCurrent())
+    net.initialize()
+
+    expected = get_eigenvalues(net)
+    expected = expected[expected.real > 1e-6]
+    found = get_unstable_eigenvalues(net)
+    assert len(expected) > 0 and len(found) == len(expected)
+    np.testing.assert_allclose(np.sort_complex(found), expected, atol=1e-6)
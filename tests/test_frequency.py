@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+import guilda.models as sample
+from guilda.power_network.response import get_input_ports
+
+
+@pytest.fixture(scope='module')
+def net():
+    net = sample.IEEE68bus()
+    net.initialize()
+    return net
+
+
+# fewer outputs than inputs are solved through the adjoint
+@pytest.mark.parametrize('outputs', [[0, 1, 200], list(range(0, 300, 7))])
+@pytest.mark.parametrize('workers', [1, 4])
+def test_frequency_response_matches_dense_solve(net, outputs, workers):
+    A, B, C, D = [m.toarray() if hasattr(m, 'toarray') else np.asarray(m) for m in net.get_sys()]
+    inputs = [1, 2, 30, 35]
+    _, cols = get_input_ports(net, inputs)
+    omega = np.logspace(-1, 2, 9)
+
+    fr = net.get_frequency_response(omega, inputs, outputs, workers=workers)
+    I = np.eye(A.shape[0])
+    expected = np.array([
+        C[outputs] @ np.linalg.solve(1j * w * I - A, B[:, cols]) + D[outputs][:, cols]
+        for w in omega
+    ])
+    assert fr.response.shape == (len(omega), len(outputs), len(cols))
+    np.testing.assert_allclose(fr.response, expected, atol=1e-9 * np.abs(expected).max())
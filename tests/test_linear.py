@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+import guilda.models as sample
+from guilda.power_network import BusFault, BusInput, SimulationOptions, SimulationScenario
+
+
+@pytest.fixture(scope='module')
+def net():
+    net = sample.simple_3_bus_nishino(True)
+    net.initialize()
+    return net
+
+
+@pytest.fixture(scope='module')
+def scenario():
+    return SimulationScenario(
+        tstart=0, tend=3,
+        u=[BusInput(index=3, time=[0, 1, 2, 3], value=np.array([[0, 0.05, 0.1, 0.1], [0, 0, 0, 0]]).T)],
+        fault=[BusFault(index=2, time=(1.5, 1.6))],
+    )
+
+
+def test_expm_matches_ida(net, scenario):
+    options = SimulationOptions(linear=True, rtol=1e-10, atol=1e-10, t_interval=0.01, solver_method='ida')
+    ida = net.simulate(scenario, options)
+    exact = net.simulate(scenario, SimulationOptions(linear=True, t_interval=0.01, solver_method='expm'))
+
+    np.testing.assert_allclose(exact.t, ida.t)
+    np.testing.assert_allclose(exact.x, ida.x, atol=1e-5)
+    # at the input steps IDA ends a segment with the next input already held
+    rows = ~np.isin(np.round(ida.t, 9), [1, 2])
+    for index in net.bus_indices:
+        np.testing.assert_allclose(exact[index].V[rows], ida[index].V[rows], atol=1e-5)
+        np.testing.assert_allclose(exact[index].I[rows], ida[index].I[rows], atol=1e-5)
+
+
+def test_linear_default_keeps_dense_output(net, scenario):
+    result = net.simulate(scenario, SimulationOptions(linear=True))
+    # the solver steps, not only the ends of the five segments
+    assert result.t.size > 20
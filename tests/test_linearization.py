@@ -0,0 +1,80 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+import guilda.models as sample
+from guilda.generator import Generator1Axis
+from guilda.power_network import SimulationScenario
+from guilda.power_network.dae import SegmentResidual
+from guilda.power_network.segment import gen_segments, parse_scenario
+from guilda.utils.calc import numerical_jacobian
+
+
+@pytest.fixture(scope='module')
+def net():
+    net = sample.IEEE68bus()
+    net.initialize()
+    return net
+
+
+def dense(m) -> np.ndarray:
+    return m.toarray() if hasattr(m, 'toarray') else np.asarray(m)
+
+
+def linearize_residual(net):
+    '''
+    Linearization of the DAE residual of the simulation by finite
+    differences, with the voltages of the simulated buses eliminated.
+    '''
+    meta, _, timestamps, events = parse_scenario(SimulationScenario(tstart=0, tend=1), net)
+    segment = gen_segments(meta, timestamps, events)[0]
+    ports = [(b, p) for b in range(len(meta.buses)) for p in range(meta.nu_bus[b])]
+    u = {b: np.zeros(meta.nu_bus[b]) for b, _ in ports}
+    segment = replace(segment, buses_input={b: (lambda t, b=b: u[b]) for b in u})
+    residual = SegmentResidual(segment, meta)
+
+    sim = segment.buses_simulated
+    buses = [meta.buses[b].component for b in sim]
+    V = np.array([meta.buses[b].component.V_equilibrium for b in sim], dtype=complex)
+    y0 = np.concatenate([np.ravel(c.x_equilibrium) for c in buses] + [np.column_stack([V.real, V.imag]).ravel()])
+    dy = np.zeros_like(y0)
+
+    J = numerical_jacobian(lambda y: residual(0, y, dy), y0)
+
+    def input_residual(v):
+        for k, (b, p) in enumerate(ports):
+            u[b][p] = v[k]
+        return residual(0, y0, dy)
+    Ju = numerical_jacobian(input_residual, np.zeros(len(ports)))
+
+    nx = residual.nx
+    # the voltages of the simulated buses as functions of the states and inputs
+    K = -np.linalg.solve(J[nx:, nx:], np.hstack([J[nx:, :nx], Ju[nx:]]))
+    A = J[:nx, :nx] + J[:nx, nx:] @ K[:, :nx]
+    B = Ju[:nx] + J[:nx, nx:] @ K[:, nx:]
+    return A, B, K, sim
+
+
+def test_get_sys_matches_finite_differences(net):
+    A, B, C, _ = [dense(m) for m in net.get_sys()]
+    A_fd, B_fd, K, sim = linearize_residual(net)
+    nx = A.shape[0]
+    nu = sum(b.component.nu for b in net.a_bus)
+
+    np.testing.assert_allclose(A, A_fd, atol=1e-5 * np.abs(A).max())
+    np.testing.assert_allclose(B[:, :nu], B_fd, atol=1e-5 * np.abs(B).max())
+
+    # rows of the voltages of the simulated buses in the outputs `[x, z, V, I]`
+    n_bus = len(net.bus_indices)
+    rows = C.shape[0] - 4 * n_bus + (2 * np.array(sim)[:, None] + np.arange(2)).ravel()
+    np.testing.assert_allclose(C[rows], K[:, :nx], atol=1e-5 * np.abs(K).max())
+
+
+def test_closed_form_matches_interconnection(net):
+    generators = [b.component for b in net.a_bus if isinstance(b.component, Generator1Axis)]
+    assert generators and all(g.get_batch_key() is not None for g in generators)
+    for g in generators:
+        expected = g.get_linear_matrix(g.V_equilibrium, g.x_equilibrium)
+        for value, ref in zip(g.system_matrix.as_tuple(), expected.as_tuple()):
+            np.testing.assert_allclose(value, ref, atol=1e-10)
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+import scipy.linalg as sl
+
+import guilda.models as sample
+
+
+@pytest.fixture(scope='module')
+def net():
+    net = sample.IEEE68bus()
+    net.initialize()
+    return net
+
+
+@pytest.fixture(scope='module')
+def eig(net):
+    A = net.get_sys()[0]
+    A = A.toarray() if hasattr(A, 'toarray') else np.asarray(A)
+    return sl.eig(A, left=True, right=True)
+
+
+def test_modes_match_dense_eig(net, eig):
+    lam, VL, VR = eig
+    m = net.get_modes(0.1, 2.0)
+    assert len(m.eigenvalues) > 0
+
+    for l, p in zip(m.eigenvalues, m.participation.T):
+        i = np.argmin(np.abs(lam - l))
+        assert abs(lam[i] - l) < 1e-6 and 0.1 <= lam[i].imag / (2 * np.pi) <= 2.0
+        P = np.abs(VL[:, i].conj() * VR[:, i])
+        np.testing.assert_allclose(p, P / P.sum(), atol=1e-6)
+
+
+def test_band_is_complete(net, eig):
+    lam = eig[0]
+    m = net.get_modes(0.1, 2.0)
+    f = lam.imag / (2 * np.pi)
+    expected = lam[(f >= 0.1) & (f <= 2.0) & (lam.real >= -10)]
+    # the well-damped modes of the band too, not only those near the axis
+    assert len(m.eigenvalues) == len(expected) and min(expected.real) < -8
+    for l in expected:
+        assert np.min(np.abs(m.eigenvalues - l)) < 1e-6
@@ -0,0 +1,28 @@
+import numpy as np
+
+import guilda.models as sample
+from guilda.power_network import BusFault, SimulationOptions, SimulationScenario
+
+
+def test_simulate_many_with_store_path_matches_sequential(tmp_path):
+    net = sample.simple_3_bus_nishino(True)
+    net.initialize()
+    scenarios = [
+        SimulationScenario(tstart=0, tend=1, fault=[BusFault(index=index, time=(0.2, 0.3))])
+        for index in (1, 2, 3)
+    ]
+    options = SimulationOptions(rtol=1e-6, atol=1e-6, t_interval=0.01)
+
+    expected = [net.simulate(s, options) for s in scenarios]
+    stored = SimulationOptions(rtol=1e-6, atol=1e-6, t_interval=0.01, store_path=str(tmp_path))
+    results = net.simulate_many(scenarios, stored, workers=2)
+
+    for a, b in zip(expected, results):
+        np.testing.assert_allclose(b.t, a.t)
+        np.testing.assert_allclose(b.x, a.x, atol=1e-8)
+        # the segments come back from the workers to rebuild all buses
+        assert [s.time_start for s in b.segments] == [s.time_start for s in a.segments]
+        for index in net.bus_indices:
+            np.testing.assert_allclose(b[index].V, a[index].V, atol=1e-8)
+            np.testing.assert_allclose(b[index].I, a[index].I, atol=1e-8)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['0', '1', '2']
@@ -0,0 +1,52 @@
+import copy
+
+import numpy as np
+import pytest
+
+import guilda.models as sample
+from guilda.bus import BusPQ
+from guilda.power_network.power_flow import NewtonPowerFlow
+
+
+@pytest.fixture(scope='module', params=['3bus', 'IEEE68'])
+def net(request):
+    if request.param == '3bus':
+        return sample.simple_3_bus_nishino(True)
+    return sample.IEEE68bus()
+
+
+def test_newton_matches_hybr(net):
+    V, I = net.calculate_power_flow()
+    V_hybr, I_hybr = net._calculate_power_flow_hybr()
+
+    np.testing.assert_allclose(V, V_hybr, atol=1e-8)
+    # hybr stops at its own step tolerance, looser than the mismatch of Newton
+    np.testing.assert_allclose(I, I_hybr, atol=1e-5)
+
+
+def test_batch_matches_single_power_flows(net, monkeypatch):
+    # the loads of the PQ buses grow over the snapshots
+    pq = [i for i, bus in enumerate(net.a_bus) if isinstance(bus, BusPQ)]
+    P = np.array([getattr(bus, 'P', 0) for bus in net.a_bus])
+    Q = np.array([getattr(bus, 'Q', 0) for bus in net.a_bus])
+    scale = np.ones((6, len(P)))
+    scale[:, pq] = np.linspace(1, 1.05, 6)[:, None]
+
+    factorize = NewtonPowerFlow.factorize
+    calls = []
+    monkeypatch.setattr(NewtonPowerFlow, 'factorize', lambda *args: calls.append(1) or factorize(*args))
+    batch = net.calculate_power_flow_batch(P=scale * P, Q=scale * Q)
+    monkeypatch.undo()
+    assert batch.converged.all()
+    # the factorizations are kept across snapshots
+    assert len(calls) < batch.iterations.sum()
+
+    for k in range(len(scale)):
+        snapshot = copy.deepcopy(net)
+        buses = list(snapshot.a_bus)
+        for i in pq:
+            buses[i].P *= scale[k, i]
+            buses[i].Q *= scale[k, i]
+        V, I = snapshot.calculate_power_flow()
+        np.testing.assert_allclose(batch.V[k], V.ravel(), atol=1e-8)
+        np.testing.assert_allclose(batch.I[k], I.ravel(), atol=1e-8)
@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pytest
+
+import guilda.models as sample
+from guilda.power_network import QstsStore, TapChange
+
+
+@pytest.fixture(scope='module')
+def net():
+    return sample.IEEE68bus()
+
+
+def get_series(net, **kwargs):
+    t = np.arange(60, dtype=float)
+    # tap changes in the middle of the first chunk of 30 steps
+    events = [TapChange(branch=3, time=10, tap=1.05), TapChange(branch=3, time=20, tap=1.0)]
+    return net.simulate_qsts(t, events=events, **kwargs)
+
+
+def test_currents_follow_the_tap_of_each_step(net):
+    result = get_series(net, chunk_size=30)
+    assert result.converged.all()
+
+    # one step per chunk has no tap change inside a chunk
+    expected = get_series(net, chunk_size=1)
+    np.testing.assert_allclose(result.V, expected.V, atol=1e-10)
+    np.testing.assert_allclose(result.I, expected.I, atol=1e-10)
+
+    # the losses change with the tap, and so the power of the slack bus
+    S = (result.V * result.I.conj()).sum(axis=1)
+    for part in (S[:10], S[10:20], S[20:]):
+        np.testing.assert_allclose(part, part[0], atol=1e-8)
+    assert abs(S[10] - S[0]) > 1e-6 and abs(S[20] - S[10]) > 1e-6
+
+    Y = net.get_admittance_matrix()
+    np.testing.assert_allclose(result.I[:10], result.V[:10] @ Y.T, atol=1e-8)
+
+
+def test_disk_matches_memory(net, tmp_path):
+    expected = get_series(net, chunk_size=30)
+    a = get_series(net, chunk_size=7, path=str(tmp_path))
+    b = get_series(net, chunk_size=30, path=str(tmp_path))
+
+    for result in (a, b):
+        np.testing.assert_allclose(result.V, expected.V, atol=1e-10)
+        np.testing.assert_allclose(result.I, expected.I, atol=1e-10)
+
+    # the second run must not overwrite the files behind the first result
+    assert a.path != b.path
+    assert all(os.path.dirname(p) == str(tmp_path) for p in (a.path, b.path))
+    np.testing.assert_array_equal(QstsStore.load(a.path).I, a.I)
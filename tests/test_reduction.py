@@ -0,0 +1,60 @@
+import warnings
+
+import numpy as np
+import pytest
+
+import guilda.models as sample
+from guilda.power_network.response import get_input_ports
+
+INPUTS = [1, 2]
+OUTPUTS = [0, 1, 2]
+
+
+@pytest.fixture(scope='module')
+def net():
+    net = sample.IEEE68bus()
+    net.initialize()
+    return net
+
+
+def dense_response(net, omega):
+    A, B, C, D = [m.toarray() if hasattr(m, 'toarray') else np.asarray(m) for m in net.get_sys()]
+    _, cols = get_input_ports(net, INPUTS)
+    I = np.eye(A.shape[0])
+    return np.array([
+        C[OUTPUTS] @ np.linalg.solve(1j * w * I - A, B[:, cols]) + D[OUTPUTS][:, cols]
+        for w in omega
+    ])
+
+
+def dense_error(net, reduced, omega) -> float:
+    return max(np.linalg.norm(e, 2) for e in dense_response(net, omega) - reduced.evaluate(omega))
+
+
+def test_balanced_truncation_is_within_its_bound(net):
+    omega = np.logspace(-2, 3, 100)
+    reduced = net.get_reduced_model(tol=1e-4, inputs=INPUTS, outputs=OUTPUTS, omega=omega)
+
+    error = dense_error(net, reduced, omega)
+    np.testing.assert_allclose(error, reduced.error_estimate, rtol=1e-5)
+    assert error <= reduced.error_bound <= 1e-4 * reduced.hankel.max()
+    assert reduced.order < net.get_sys()[0].shape[0]
+
+
+def test_modal_truncation_is_within_tolerance(net):
+    omega = np.logspace(-2, 3, 100)
+    with warnings.catch_warnings():
+        # the tolerance is met without a warning
+        warnings.simplefilter('error')
+        reduced = net.get_reduced_model(method='modal', tol=1e-4, inputs=INPUTS, outputs=OUTPUTS, omega=omega)
+
+    error = dense_error(net, reduced, omega)
+    np.testing.assert_allclose(error, reduced.error_estimate, rtol=1e-5)
+    hankel = net.get_reduced_model(inputs=INPUTS, outputs=OUTPUTS, omega=[]).hankel
+    assert error <= 1e-4 * hankel.max()
+    assert reduced.order < net.get_sys()[0].shape[0]
+
+
+def test_modal_reduction_warns_beyond_tolerance(net):
+    with pytest.warns(UserWarning):
+        net.get_reduced_model(method='modal', tol=1e-12, inputs=INPUTS, outputs=OUTPUTS)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+import guilda.models as sample
+from guilda.power_network import BusInput, SimulationOptions, SimulationScenario
+
+INPUTS = [
+    BusInput(index=3, time=[0, 0.5, 1.0, 2.0], value=np.array([[0.05, 0], [-0.02, 0.01], [0, 0], [0, 0]])),
+    BusInput(index=2, time=[0.3, 1.2], value=np.array([[0.02, 0], [0, 0]])),
+]
+
+
+@pytest.fixture(scope='module')
+def net():
+    net = sample.simple_3_bus_nishino()
+    net.initialize()
+    return net
+
+
+def test_superposition_matches_linear_simulation(net):
+    library = net.get_response_library(2.0, 0.01, inputs=[2, 3])
+    y = library.respond(library.sample_inputs(INPUTS))
+
+    # held inputs are integrated exactly by the matrix exponential
+    options = SimulationOptions(linear=True, solver_method='expm', t_interval=0.01)
+    result = net.simulate(SimulationScenario(tstart=0, tend=2, u=INPUTS), options)
+    # the voltages jump with the inputs, to the last row of each time
+    _, rows = np.unique(np.round(result.t[::-1], 9), return_index=True)
+    rows = result.t.size - 1 - rows
+    assert rows.size == library.nt
+
+    x = result.x[rows] - np.concatenate([np.ravel(b.component.x_equilibrium) for b in net.a_bus])
+    V = result.get_V()[rows].reshape((rows.size, -1)) - np.ravel(
+        [[v.real, v.imag] for v in np.ravel(net.V_equilibrium)])
+    n_bus = len(net.bus_indices)
+    nx = x.shape[1]
+    n_V = y.shape[1] - 4 * n_bus
+    np.testing.assert_allclose(y[:, :nx], x, atol=1e-10)
+    # the first row of the simulation holds the voltages before the inputs
+    np.testing.assert_allclose(y[1:, n_V: n_V + 2 * n_bus], V[1:], atol=1e-10)
+
+    # profiles in a batch are answered independently
+    u = np.array([library.sample_inputs(INPUTS[:1]), library.sample_inputs(INPUTS[1:])])
+    np.testing.assert_allclose(library.respond(u).sum(axis=0), y, atol=1e-12)
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+import guilda.models as sample
+from guilda.power_network import BusFault, SimulationOptions, SimulationScenario
+
+SCENARIO = SimulationScenario(tstart=0, tend=0.3, fault=[BusFault(index=5, time=(0.1, 0.2))])
+
+
+@pytest.fixture(scope='module')
+def net():
+    net = sample.IEEE68bus()
+    net.initialize()
+    return net
+
+
+@pytest.fixture(scope='module')
+def result(net):
+    return net.simulate(SCENARIO, SimulationOptions(t_interval=0.01))
+
+
+def to_complex(X: np.ndarray) -> np.ndarray:
+    return X[..., 0] + 1j * X[..., 1]
+
+
+def test_rebuilt_voltages_and_currents_satisfy_the_network(net, result):
+    V = to_complex(result.get_V())
+    I = to_complex(result.get_I())
+    Y = net.get_admittance_matrix()
+    k = net.bus_index_map[5]
+
+    # buses without components are rebuilt from the simulated ones, and
+    # the rows at the fault times may belong to either segment
+    fault = (result.t >= 0.1) & (result.t <= 0.2)
+    others = [i for i in range(Y.shape[0]) if i != k]
+    np.testing.assert_allclose(I[~fault], V[~fault] @ Y.T, atol=1e-8)
+    np.testing.assert_allclose(I[fault][:, others], (V[fault] @ Y.T)[:, others], atol=1e-8)
+    np.testing.assert_allclose(V[(result.t > 0.1) & (result.t < 0.2), k], 0, atol=1e-8)
+
+
+def test_views_share_the_storage(result):
+    window = result.window(0.1, 0.2)
+    rows = (result.t >= 0.1) & (result.t <= 0.2)
+    np.testing.assert_array_equal(window.t, result.t[rows])
+    assert np.shares_memory(window.x, result.x)
+    np.testing.assert_allclose(window.get_V(), result.get_V()[rows], atol=1e-12)
+    np.testing.assert_allclose(window.get_I([3, 4]), result.get_I([3, 4])[rows], atol=1e-12)
+
+    subset = result.subset([1, 5])
+    assert list(subset.components) == [1, 5]
+    np.testing.assert_allclose(subset[5].V, result.get_V([4])[:, 0], atol=1e-12)
+    np.testing.assert_array_equal(subset[1].x, result[1].x)
+
+
+def test_recorded_channels_match_the_full_result(net, result):
+    options = SimulationOptions(t_interval=0.01, record_x=[1], record_V=[2, 5], record_I=[5], record_ctrl=False)
+    recorded = net.simulate(SCENARIO, options)
+
+    np.testing.assert_array_equal(recorded.t, result.t)
+    assert recorded.x.shape[1] == result[1].x.shape[1]
+    np.testing.assert_allclose(recorded[1].x, result[1].x, atol=1e-10)
+    np.testing.assert_allclose(recorded[5].V, result[5].V, atol=1e-10)
+    np.testing.assert_allclose(recorded[2].V, result[2].V, atol=1e-10)
+    np.testing.assert_allclose(recorded[5].I, result[5].I, atol=1e-10)
+
+    with pytest.raises(KeyError):
+        recorded[3].V
+    with pytest.raises(KeyError):
+        recorded[2].I
+    with pytest.raises(KeyError):
+        recorded[2].x
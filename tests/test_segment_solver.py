@@ -0,0 +1,45 @@
+import numpy as np
+
+import guilda.models as sample
+from guilda.power_network import BusFault, BusInput, SimulationOptions, SimulationScenario
+from guilda.power_network.segment import gen_segments, parse_scenario
+from guilda.power_network.simulate import SegmentSolver
+from guilda.utils.data import complex_arr_to_col_vec
+
+
+def solve_segments(reuse: bool):
+    net = sample.simple_3_bus_nishino(True)
+    net.initialize()
+    scenario = SimulationScenario(
+        tstart=0, tend=3,
+        u=[BusInput(index=3, time=[0, 1, 2, 3], value=np.array([[0, 0.05, 0.1, 0.1], [0, 0, 0, 0]]).T)],
+        fault=[BusFault(index=2, time=(1.5, 1.6))],
+    )
+    meta, init_states, timestamps, events = parse_scenario(scenario, net)
+    segments = gen_segments(meta, timestamps, events)
+    assert len(segments) > 2
+
+    x_bus, x_kg, x_k, V_init, I_init = init_states
+    x = np.vstack(x_bus + x_kg + x_k)
+    V = complex_arr_to_col_vec(np.array(V_init))
+    I = complex_arr_to_col_vec(np.array(I_init))
+
+    options = SimulationOptions(rtol=1e-8, atol=1e-8, t_interval=0.01)
+    solver = SegmentSolver(meta, options)
+    ret = []
+    for segment in segments:
+        if not reuse:
+            solver = SegmentSolver(meta, options)
+        (t, X, _, _), (x, V, I) = solver.solve(segment, x, V, I)
+        ret.append((segment, t, X))
+    return ret
+
+
+def test_reused_solver_matches_fresh_solvers():
+    reused, fresh = solve_segments(True), solve_segments(False)
+
+    for (segment, t, X), (_, t_fresh, X_fresh) in zip(reused, fresh):
+        # only the points of this segment, as from a new solver
+        assert segment.time_start <= t.min() and t.max() <= segment.time_end
+        np.testing.assert_allclose(t, t_fresh)
+        np.testing.assert_allclose(X, X_fresh, atol=1e-6)
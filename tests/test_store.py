@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pytest
+
+import guilda.models as sample
+import guilda.power_network.simulate as simulate
+from guilda.power_network import BusFault, ResultStore, SimulationOptions, SimulationScenario
+
+
+def test_store_path_reuse_keeps_earlier_results(tmp_path):
+    net = sample.simple_3_bus_nishino(True)
+    net.initialize()
+    first = SimulationScenario(tstart=0, tend=1, fault=[BusFault(index=1, time=(0.2, 0.3))])
+    second = SimulationScenario(tstart=0, tend=2, fault=[BusFault(index=3, time=(0.5, 0.7))])
+
+    expected = net.simulate(first, SimulationOptions(rtol=1e-6, atol=1e-6, t_interval=0.01))
+    options = SimulationOptions(rtol=1e-6, atol=1e-6, t_interval=0.01, store_path=str(tmp_path))
+    a = net.simulate(first, options)
+    b = net.simulate(second, options)
+
+    # the second run must not overwrite the files behind the first result
+    np.testing.assert_allclose(a.t, expected.t)
+    np.testing.assert_allclose(a.x, expected.x, atol=1e-8)
+    np.testing.assert_allclose(a[2].V, expected[2].V, atol=1e-8)
+
+    paths = [a.options.store_path, b.options.store_path]
+    assert paths[0] != paths[1]
+    assert all(os.path.dirname(p) == str(tmp_path) for p in paths)
+
+    t, x, _ = ResultStore.load(paths[0])
+    np.testing.assert_array_equal(x, a.x)
+    assert t.size == a.t.size
+
+
+def test_loaded_store_rebuilds_all_buses(tmp_path):
+    net = sample.simple_3_bus_nishino(True)
+    net.initialize()
+    scenario = SimulationScenario(tstart=0, tend=1, fault=[BusFault(index=2, time=(0.2, 0.3))])
+    result = net.simulate(scenario, SimulationOptions(t_interval=0.01, store_path=str(tmp_path)))
+
+    # without the segments of the run, as from another process
+    _, _, parts = ResultStore.load(result.options.store_path)
+    buses = list(range(len(net.a_bus)))
+    for part, expected in zip(parts, result.parts):
+        np.testing.assert_array_equal(part.get_V(buses), expected.get_V(buses))
+        np.testing.assert_array_equal(
+            part.get_I(buses, result.meta.system_admittance_f),
+            expected.get_I(buses, result.meta.system_admittance_f))
+
+
+def test_failed_run_closes_the_files(tmp_path, monkeypatch):
+    stores = []
+
+    class FailingStore(ResultStore):
+        def __init__(self, path: str):
+            super().__init__(path)
+            stores.append(self)
+
+        def append(self, *args, **kwargs):
+            if len(self.part_info) == 2:
+                raise RuntimeError('failed')
+            super().append(*args, **kwargs)
+
+    monkeypatch.setattr(simulate, 'ResultStore', FailingStore)
+    net = sample.simple_3_bus_nishino(True)
+    net.initialize()
+    scenario = SimulationScenario(tstart=0, tend=1, fault=[BusFault(index=2, time=(0.2, 0.3))])
+    with pytest.raises(RuntimeError):
+        net.simulate(scenario, SimulationOptions(t_interval=0.01, store_path=str(tmp_path)))
+    assert all(f.closed for f in stores[0].files.values())